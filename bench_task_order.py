@@ -0,0 +1,191 @@
+"""제품 제출 순서별 크롤링 전체 시간 비교 (모의 상품 서버 사용)
+
+로컬에 SSG 상품 페이지 형식으로 응답하는 모의 서버를 호스트(포트) 여러 개로 띄우고,
+같은 카탈로그를 같은 동시 요청 수로 순서만 바꿔 크롤링해 전체 시간(makespan)을 잰다.
+
+- 요청 시간은 URL마다 로그정규분포로 정해지고, 일부 URL은 처음 몇 번 500으로 실패해
+  크롤러의 재시도·백오프를 거친다.
+- 이력 수집 실행(카탈로그 순서) 한 번으로 URL별 요청 시간(fetch_ms)을 모은 뒤
+  catalog(카탈로그 순서), shuffled(섞은 순서), longest(예상 시간이 긴 제품부터)를 번갈아 실행한다.
+
+    python bench_task_order.py --products 60 --workers 4 --repeats 3
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from crawler import PriceCompareCrawler, canonical_url, remove_results_file
+from server.durations import expected_durations, product_hosts
+from server.scheduler import longest_first_order, spread_task_order
+
+PRODUCT_PAGE = """<html><body>
+<div class="cdtl_new_price notranslate"><em class="ssg_price">{price:,}</em>원</div>
+<div class="cdtl_dl cdtl_delivery_fee"><ul><li><em class="ssg_price">3,000</em>원</li></ul></div>
+</body></html>"""
+
+
+class MockProductHandler(BaseHTTPRequestHandler):
+    """/item?id=<상품>&ms=<응답 지연>&fail=<처음 실패 횟수> 에 SSG 상품 페이지로 응답"""
+
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        time.sleep(int(query.get("ms", "0")) / 1000)
+        with self.server.lock:
+            count = self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        if count <= int(query.get("fail", "0")):
+            self.send_error(500)
+            return
+        body = PRODUCT_PAGE.format(price=10000 + int(query.get("id", "0"))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_servers(count: int) -> List[ThreadingHTTPServer]:
+    """모의 서버 count개 시작 (포트가 다르므로 서로 다른 호스트로 취급)"""
+    servers = []
+    for _ in range(count):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MockProductHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.hits = {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def make_catalog(
+    servers: List[ThreadingHTTPServer],
+    products: int,
+    median_ms: float,
+    sigma: float,
+    fail_rate: float,
+    seed: int
+) -> List[Dict]:
+    """제품마다 waffle과 경쟁사 0~3곳의 모의 URL을 가진 카탈로그"""
+    rng = random.Random(seed)
+    item_id = 0
+
+    def mock_url() -> str:
+        nonlocal item_id
+        item_id += 1
+        host, port = rng.choice(servers).server_address
+        ms = int(rng.lognormvariate(0, sigma) * median_ms)
+        fail = 1 if rng.random() < fail_rate else 0
+        return f"http://{host}:{port}/item?id={item_id}&ms={ms}&fail={fail}"
+
+    catalog = []
+    for index in range(products):
+        catalog.append({
+            "product_id": index + 1,
+            "product_name": f"모의 상품 {index + 1}",
+            "waffle": {"url": mock_url()},
+            "competitors": [
+                {"name": f"경쟁사{n + 1}", "url": mock_url()} for n in range(rng.randint(0, 3))
+            ],
+        })
+    return catalog
+
+
+def run_once(catalog: List[Dict], task_order, workers: int, delay: Tuple[float, float]) -> Tuple[float, List[Dict]]:
+    """카탈로그 한 번 크롤링 (전체 시간(초), 결과)"""
+    results: List[Dict] = []
+    results_file = os.path.join(tempfile.gettempdir(), f"bench_task_order_{os.getpid()}.jsonl")
+    crawler = PriceCompareCrawler(
+        results_file=results_file,
+        site_name="ssg",
+        products=catalog,
+        task_order=task_order,
+        result_callback=results.append
+    )
+    crawler.request_delay = delay
+    started = time.monotonic()
+    with redirect_stdout(io.StringIO()):
+        crawler.run_crawling(task_executor=ThreadPoolExecutor(max_workers=workers))
+    elapsed = time.monotonic() - started
+    remove_results_file(results_file)
+    return elapsed, results
+
+
+def fetch_durations(results: List[Dict]) -> Dict[str, float]:
+    """결과의 정규 ID별 요청 시간 (초, server.durations.url_durations와 같은 형식)"""
+    samples: Dict[str, List[float]] = {}
+    for result in results:
+        for price_info in result["prices"]:
+            if price_info.get("fetch_ms") is not None:
+                samples.setdefault(price_info["canonical_id"], []).append(price_info["fetch_ms"] / 1000)
+    return {canonical_id: statistics.mean(values) for canonical_id, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="제품 제출 순서별 크롤링 전체 시간 비교")
+    parser.add_argument("--products", type=int, default=60, help="제품 수")
+    parser.add_argument("--workers", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--hosts", type=int, default=3, help="모의 서버(호스트) 수")
+    parser.add_argument("--repeats", type=int, default=3, help="순서별 반복 횟수")
+    parser.add_argument("--median-ms", type=float, default=80, help="URL 응답 지연 중앙값 (밀리초)")
+    parser.add_argument("--sigma", type=float, default=1.0, help="응답 지연 로그정규분포의 sigma")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="처음 한 번 실패하는 URL 비율")
+    parser.add_argument("--delay", type=float, nargs=2, default=(0.05, 0.1), help="요청 사이 대기 범위 (초)")
+    parser.add_argument("--seed", type=int, default=1, help="카탈로그 생성 seed")
+    args = parser.parse_args()
+
+    servers = start_servers(args.hosts)
+    catalog = make_catalog(servers, args.products, args.median_ms, args.sigma, args.fail_rate, args.seed)
+    delay = tuple(args.delay)
+
+    def reset_servers():
+        for server in servers:
+            with server.lock:
+                server.hits.clear()
+
+    print(f"제품 {len(catalog)}개, URL {sum(1 + len(p['competitors']) for p in catalog)}개, "
+          f"호스트 {args.hosts}개, 동시 요청 {args.workers}")
+    history_time, history = run_once(catalog, None, args.workers, delay)
+    durations = fetch_durations(history)
+    expected = expected_durations(catalog, durations, sum(delay) / 2)
+    bound = max(sum(expected) / args.workers, max(expected))
+    print(f"이력 수집 실행: {history_time:.2f}초, 예상 작업 시간 합 {sum(expected):.2f}초, "
+          f"이론 하한 {bound:.2f}초\n")
+
+    hosts = [product_hosts(product) for product in catalog]
+    orders = {
+        "catalog": lambda repeat: None,
+        "shuffled": lambda repeat: spread_task_order(f"bench:{repeat}"),
+        "longest": lambda repeat: lambda products: longest_first_order(expected, hosts),
+    }
+    times: Dict[str, List[float]] = {name: [] for name in orders}
+    for repeat in range(args.repeats):
+        for name, make_order in orders.items():
+            reset_servers()
+            elapsed, _ = run_once(catalog, make_order(repeat), args.workers, delay)
+            times[name].append(elapsed)
+
+    baseline = statistics.mean(times["catalog"])
+    print(f"{'순서':<10}{'평균(초)':>10}{'최소(초)':>10}{'catalog 대비':>14}")
+    for name, values in times.items():
+        mean = statistics.mean(values)
+        print(f"{name:<10}{mean:>10.2f}{min(values):>10.2f}{(mean / baseline - 1) * 100:>+13.1f}%")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,14 @@ logging.basicConfig(
 # 서버 URL (환경변수 또는 기본값)
 SERVER_URL = os.getenv("SERVER_URL", "http://localhost:8000")
 
+# 다운로드 프록시 설정: 전달할 요청/응답 헤더와 청크 크기
+DOWNLOAD_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+DOWNLOAD_RESPONSE_HEADERS = (
+    'Content-Type', 'Content-Length', 'Content-Range', 'Content-Disposition',
+    'Accept-Ranges', 'ETag', 'Last-Modified', 'Cache-Control'
+)
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
 # PyInstaller 리소스 경로 처리
 def resource_path(relative_path):
     try:
@@ -153,7 +161,9 @@ def get_progress():
                 'current': data['current'],
                 'total': data['total'],
                 'is_crawling': data['is_crawling'],
-                'elapsed_time': data['elapsed_time']
+                'elapsed_time': data['elapsed_time'],
+                'queue_position': data.get('queue_position'),
+                'export_progress': data.get('export_progress')
             })
         else:
             return jsonify({
@@ -185,23 +195,47 @@ def download_file():
         return jsonify({'status': 'error', 'message': '로그인이 필요합니다.'})
     
     try:
+        # 캐시 검증·이어받기 헤더는 그대로 서버에 전달
+        forward_headers = dict(get_auth_headers())
+        for name in DOWNLOAD_REQUEST_HEADERS:
+            if name in request.headers:
+                forward_headers[name] = request.headers[name]
+
         response = requests.get(
             f"{SERVER_URL}/api/crawler/download",
-            headers=get_auth_headers(),
+            headers=forward_headers,
+            params={'format': request.args.get('format', 'xlsx')},
             stream=True
         )
         
-        if response.status_code == 200:
-            from flask import Response
+        if response.status_code in (200, 206, 304, 416):
+            from flask import Response, stream_with_context
+
+            def generate():
+                # 서버 응답을 청크 단위로 그대로 전달 (파일 전체를 메모리에 올리지 않음)
+                try:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            yield chunk
+                finally:
+                    response.close()
+
+            headers = {
+                name: response.headers[name]
+                for name in DOWNLOAD_RESPONSE_HEADERS
+                if name in response.headers
+            }
             return Response(
-                response.content,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                headers={
-                    'Content-Disposition': f'attachment; filename={response.headers.get("filename", "result.xlsx")}'
-                }
+                stream_with_context(generate()),
+                status=response.status_code,
+                headers=headers,
+                direct_passthrough=True
             )
         else:
-            error_data = response.json()
+            try:
+                error_data = response.json()
+            finally:
+                response.close()
             return jsonify({'status': 'error', 'message': error_data.get('detail', '다운로드 실패')})
     except Exception as e:
         logging.error(f"다운로드 에러: {e}")
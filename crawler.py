@@ -1,7 +1,7 @@
 import json
 import jsonlines
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import requests
 from bs4 import BeautifulSoup
 import time
@@ -10,11 +10,16 @@ import re
 import sys
 import os
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
 import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import random
+import mmap
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
 def get_executable_dir():
@@ -36,13 +41,470 @@ class CrawlerCancelledException(Exception):
     pass
 
 
+# Excel 출력 형식
+SUMMARY_SHEET = "전체 결과"
+INVERSION_SHEET = "가격 역전 항목"
+SUMMARY_HEADERS = ['판매처', '상품 url', '상품가격', '배송비', '배송비여부', '최종가격']
+INVERSION_HEADERS = SUMMARY_HEADERS + ['가격차이']
+MAX_COLUMN_WIDTH = 50
+
+# 같은 제품의 요청 사이 대기 시간 범위 (초, Rate Limiting 방지)
+REQUEST_DELAY = (1.0, 2.0)
+
+# 워크북 전체에서 공유하는 이름 있는 스타일 (셀마다 Font/PatternFill을 만들지 않음)
+EXCEL_STYLES = {
+    "product_title": {"font": Font(color="FF0000FF", bold=True)},
+    "summary_header": {
+        "font": Font(bold=True),
+        "fill": PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    },
+    "inversion_title": {"font": Font(bold=True, size=14)},
+    "inversion_product": {"font": Font(bold=True)},
+    "label": {"font": Font(bold=True)},
+    "inversion_header": {
+        "font": Font(bold=True),
+        "fill": PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
+    },
+    "inversion_price": {"font": Font(color="FF0000", bold=True)},
+    "no_inversion": {"font": Font(color="008000", bold=True)},
+}
+
+# 행은 (값, 스타일 이름 또는 None) 목록으로 표현
+INVERSION_TITLE_ROWS = [[("가격 역전 항목 (경쟁사가 더 저렴한 경우)", "inversion_title")], []]
+NO_INVERSION_ROW = [("가격 역전 항목이 없습니다. 모든 제품이 경쟁사보다 저렴하거나 동일합니다.", "no_inversion")]
+
+
+def add_excel_styles(wb):
+    """워크북에 공유 스타일 등록"""
+    for name, attrs in EXCEL_STYLES.items():
+        wb.add_named_style(NamedStyle(name=name, **attrs))
+
+
+def _styled_row(ws, row: List[Tuple]) -> List:
+    """(값, 스타일) 목록을 write-only 시트에 추가할 셀 목록으로 변환"""
+    cells = []
+    for value, style in row:
+        if style is None:
+            cells.append(value)
+        else:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+    return cells
+
+
+def _price_cells(price_info: Dict) -> List[Tuple]:
+    return [
+        (price_info.get('상품 url', 'N/A'), None),
+        (price_info.get('상품 가격', 'N/A'), None),
+        (price_info.get('배송비', 'N/A'), None),
+        (price_info.get('배송비 여부', 'N/A'), None),
+    ]
+
+
+def summary_sheet_rows(result: Dict) -> Iterator[List[Tuple]]:
+    """'전체 결과' 시트에 들어갈 제품 하나의 행"""
+    yield [
+        (f"제품명: {result['product_name']}", "product_title"),
+        (f"제품ID: {result['product_id']}", "product_title"),
+    ]
+    yield [(f"추출 시간: {result['timestamp']}", None)]
+    yield []  # 빈 줄
+    yield [(header, "summary_header") for header in SUMMARY_HEADERS]
+
+    for price_info in result['prices']:
+        seller_name = 'Waffle (우리회사)' if price_info['seller'] == 'waffle' else f"경쟁사 ({price_info['seller']})"
+        yield [(seller_name, None)] + _price_cells(price_info) + [(price_info.get('최종 가격', 'N/A'), None)]
+
+    yield []
+    yield []
+
+
+def _is_price(value) -> bool:
+    """유효한 최종 가격인지 (0·None·문자열 제외)"""
+    return bool(value) and isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def summarize_prices(prices: List[Dict]) -> Dict:
+    """제품 하나의 가격 비교 요약 (결과가 도착할 때 한 번만 계산)
+
+    - waffle_index / waffle_price: Waffle 가격 위치와 최종 가격
+    - min_competitor / min_competitor_price: 가장 저렴한 경쟁사
+    - price_gap: Waffle 가격 - 최저 경쟁사 가격 (양수면 경쟁사가 더 저렴)
+    - rank: Waffle 가격 순위 (1 = 최저가, 동일 가격은 같은 순위, 비교할 경쟁사 가격이 없으면 None)
+    - cheaper_indices: Waffle보다 저렴한 경쟁사의 prices 인덱스
+    """
+    waffle_index = None
+    competitors = []
+    for idx, price_info in enumerate(prices):
+        if price_info['seller'] == 'waffle':
+            if waffle_index is None:
+                waffle_index = idx
+        elif _is_price(price_info.get('최종 가격')):
+            competitors.append((idx, price_info['최종 가격']))
+
+    waffle_price = prices[waffle_index].get('최종 가격') if waffle_index is not None else None
+    if waffle_price is not None and not isinstance(waffle_price, (int, float)):
+        waffle_price = None
+
+    summary = {
+        'waffle_index': waffle_index,
+        'waffle_price': waffle_price,
+        'competitor_count': len(competitors),
+        'min_competitor': None,
+        'min_competitor_price': None,
+        'price_gap': None,
+        'rank': None,
+        'cheaper_indices': [],
+        'inversion': False,
+    }
+
+    if competitors:
+        min_idx, min_price = min(competitors, key=lambda item: item[1])
+        summary['min_competitor'] = prices[min_idx]['seller']
+        summary['min_competitor_price'] = min_price
+
+    if waffle_price is not None:
+        cheaper = [idx for idx, price in competitors if price < waffle_price]
+        summary['cheaper_indices'] = cheaper
+        summary['inversion'] = bool(cheaper)
+        if competitors:
+            summary['rank'] = len(cheaper) + 1
+            summary['price_gap'] = waffle_price - summary['min_competitor_price']
+
+    return summary
+
+
+def result_summary(result: Dict) -> Dict:
+    """결과에 저장된 요약 반환 (이전 형식의 결과면 계산해서 채움)"""
+    summary = result.get('summary')
+    if summary is None:
+        summary = result['summary'] = summarize_prices(result['prices'])
+    return summary
+
+
+class PriceSummaryStats:
+    """크롤링 전체의 가격 비교 누계 (결과가 도착할 때마다 갱신)"""
+
+    def __init__(self):
+        self.products = 0
+        self.compared = 0  # Waffle 가격과 경쟁사 가격이 모두 있는 제품 수
+        self.inversions = 0
+        self.total_gap = 0
+
+    def add(self, summary: Dict):
+        self.products += 1
+        if summary['price_gap'] is not None:
+            self.compared += 1
+        if summary['inversion']:
+            self.inversions += 1
+            self.total_gap += summary['price_gap']
+
+    def to_dict(self) -> Dict:
+        return {
+            'products': self.products,
+            'compared': self.compared,
+            'inversions': self.inversions,
+            'average_gap': round(self.total_gap / self.inversions, 1) if self.inversions else 0,
+        }
+
+
+def inversion_sheet_rows(result: Dict) -> Iterator[List[Tuple]]:
+    """'가격 역전 항목' 시트에 들어갈 제품 하나의 행 (가격 역전이 없으면 없음)"""
+    summary = result_summary(result)
+    if not summary['inversion']:
+        return
+    prices = result['prices']
+    waffle_info = prices[summary['waffle_index']]
+    waffle_price = summary['waffle_price']
+
+    yield [
+        (f"제품명: {result['product_name']}", "inversion_product"),
+        (f"제품ID: {result['product_id']}", None),
+    ]
+    yield [(header, "inversion_header") for header in INVERSION_HEADERS]
+
+    # Waffle 가격 (참고용)
+    yield [("Waffle (우리회사)", None)] + _price_cells(waffle_info) + [(waffle_price, None), ("-", None)]
+
+    # 더 저렴한 경쟁사들 (빨간색 강조)
+    for idx in summary['cheaper_indices']:
+        comp = prices[idx]
+        comp_price = comp.get('최종 가격')
+        price_diff = waffle_price - comp_price
+        yield [(f"경쟁사 ({comp['seller']})", None)] + _price_cells(comp) + [
+            (comp_price, "inversion_price"),
+            (f"-{price_diff}원 저렴", "inversion_price"),
+        ]
+
+    yield []
+    yield []
+
+
+class ExcelColumnWidths:
+    """시트별 열 너비 누적 계산
+
+    write-only 모드는 행보다 열 너비를 먼저 기록해야 하므로, 결과가 기록될 때마다
+    너비를 갱신해 두고 내보내기 시 사용한다.
+    """
+
+    def __init__(self):
+        self.result_count = 0
+        self.has_inversion = False
+        self._max_lengths = {SUMMARY_SHEET: {}, INVERSION_SHEET: {}}
+        self._add_rows(INVERSION_SHEET, INVERSION_TITLE_ROWS)
+
+    def _add_rows(self, sheet: str, rows) -> bool:
+        return measure_rows(rows, self._max_lengths[sheet])
+
+    def add_result(self, result: Dict):
+        """결과 하나의 행 너비 반영"""
+        self.result_count += 1
+        self._add_rows(SUMMARY_SHEET, summary_sheet_rows(result))
+        if self._add_rows(INVERSION_SHEET, inversion_sheet_rows(result)):
+            self.has_inversion = True
+
+    def to_dict(self) -> Dict:
+        """결과 색인에 함께 저장하는 형식"""
+        return {
+            'result_count': self.result_count,
+            'has_inversion': self.has_inversion,
+            'lengths': {sheet: list(lengths.items()) for sheet, lengths in self._max_lengths.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ExcelColumnWidths":
+        widths = cls()
+        widths.result_count = data['result_count']
+        widths.has_inversion = data['has_inversion']
+        for sheet, lengths in data['lengths'].items():
+            widths._max_lengths[sheet] = {int(col_idx): length for col_idx, length in lengths}
+        return widths
+
+    def column_widths(self, sheet: str) -> Dict[int, float]:
+        """{열 번호: 너비}"""
+        lengths = dict(self._max_lengths[sheet])
+        if sheet == INVERSION_SHEET and not self.has_inversion:
+            length = len(str(NO_INVERSION_ROW[0][0]))
+            lengths[1] = max(lengths.get(1, 0), length)
+        return widths_from_lengths(lengths)
+
+
+def measure_rows(rows, lengths: Dict[int, int]) -> bool:
+    """행의 열별 최대 글자 수를 lengths에 반영 (행이 하나라도 있으면 True)"""
+    added = False
+    for row in rows:
+        added = True
+        for col_idx, (value, _) in enumerate(row, 1):
+            if value is None:
+                continue
+            length = len(str(value))
+            if length > lengths.get(col_idx, 0):
+                lengths[col_idx] = length
+    return added
+
+
+def widths_from_lengths(lengths: Dict[int, int]) -> Dict[int, float]:
+    """열별 최대 글자 수 -> {열 번호: 너비}"""
+    return {
+        col_idx: min(length + 2, MAX_COLUMN_WIDTH)
+        for col_idx, length in lengths.items()
+    }
+
+
+# 결과 JSONL 옆에 두는 제품별 바이트 위치 색인
+RESULTS_INDEX_SUFFIX = ".idx.json"
+
+
+class ResultsIndex:
+    """결과 JSONL의 제품 ID -> (바이트 위치, 길이) 색인
+
+    결과를 기록하면서 함께 만들고, 읽을 때는 결과 파일을 메모리 매핑해 필요한 줄만
+    해석하므로 일부 제품 조회·재변환에 파일 전체를 파싱하지 않는다.
+    결과를 기록하며 누적한 Excel 열 너비도 함께 저장해, 다른 프로세스의 Excel 변환이
+    너비 계산을 위해 결과 파일을 다시 훑지 않게 한다.
+    """
+
+    def __init__(self, results_file: str):
+        self.results_file = results_file
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}  # 같은 ID가 여러 줄일 수 있음
+        self.size = 0
+        self.excel_widths: Optional[ExcelColumnWidths] = None  # 전체 결과의 Excel 열 너비
+
+    @staticmethod
+    def path_for(results_file: str) -> str:
+        return results_file + RESULTS_INDEX_SUFFIX
+
+    def __len__(self) -> int:
+        return sum(len(positions) for positions in self.positions.values())
+
+    def __contains__(self, product_id) -> bool:
+        return str(product_id) in self.positions
+
+    def add(self, product_id, offset: int, length: int):
+        self.positions.setdefault(str(product_id), []).append((offset, length))
+        self.size = max(self.size, offset + length)
+
+    def append(self, f, result: Dict):
+        """결과 한 줄을 바이너리 파일에 기록하고 위치를 색인에 추가"""
+        line = (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+        self.add(result.get('product_id'), f.tell(), len(line))
+        f.write(line)
+
+    def save(self):
+        """색인 파일 저장 (결과 파일 크기를 함께 기록해 오래된 색인을 구분)"""
+        path = self.path_for(self.results_file)
+        entries = [
+            [product_id, offset, length]
+            for product_id, positions in self.positions.items()
+            for offset, length in positions
+        ]
+        data = {"size": self.size, "entries": entries}
+        if self.excel_widths is not None:
+            data["excel_widths"] = self.excel_widths.to_dict()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, results_file: str) -> Optional["ResultsIndex"]:
+        """저장된 색인 로드 (없거나 결과 파일과 크기가 다르면 None)"""
+        try:
+            with open(cls.path_for(results_file), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("size") != os.path.getsize(results_file):
+            return None
+        index = cls(results_file)
+        positions = index.positions
+        for product_id, offset, length in data["entries"]:
+            if product_id in positions:
+                positions[product_id].append((offset, length))
+            else:
+                positions[product_id] = [(offset, length)]
+        index.size = data["size"]
+        if data.get("excel_widths"):
+            index.excel_widths = ExcelColumnWidths.from_dict(data["excel_widths"])
+        return index
+
+    @classmethod
+    def build(cls, results_file: str) -> "ResultsIndex":
+        """결과 파일을 한 번 훑어 색인을 만들고 저장 (색인 없이 기록된 이전 결과용)"""
+        index = cls(results_file)
+        with open(results_file, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    index.add(json.loads(line).get('product_id'), offset, len(line))
+                offset += len(line)
+        index.size = offset
+        index.save()
+        return index
+
+    @classmethod
+    def open(cls, results_file: str) -> "ResultsIndex":
+        """저장된 색인을 쓰고, 없으면 만들어서 반환"""
+        return cls.load(results_file) or cls.build(results_file)
+
+    def read(self, product_ids) -> Iterator[Dict]:
+        """요청한 제품의 결과를 요청 순서대로 (메모리 매핑으로 해당 줄만 해석)"""
+        wanted = [
+            position
+            for product_id in product_ids
+            for position in self.positions.get(str(product_id), [])
+        ]
+        if not wanted or self.size == 0:
+            return
+        with open(self.results_file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset, length in wanted:
+                    yield json.loads(mm[offset:offset + length])
+
+
+def remove_results_file(results_file: str):
+    """결과 JSONL과 색인 파일 삭제"""
+    for path in (results_file, ResultsIndex.path_for(results_file)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# 상품 URL 정규화: 추적용 쿼리를 떼고 사이트별 고유 상품 ID로 식별
+# (검색·유입 경로마다 쿼리가 달라도 같은 상품은 같은 정규 ID를 갖는다)
+TRACKING_PARAMS = {
+    "srchwdRslt", "trackSearchType", "trackCurationType", "prePg", "pgArea", "listNum", "odd",
+    "siteNo", "salestrNo", "itemSsgCollectYn", "ckwhere", "appPopYn", "advertBidId", "tlidSrchWd",
+    "src_area", "fbclid", "gclid", "NaPm",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def _canonical_ssg(parts, query: Dict) -> Optional[Tuple[str, str]]:
+    """ssg.com 상품 페이지: itemId"""
+    item_id = query.get("itemId")
+    if parts.path.endswith("/item/itemView.ssg") and item_id and item_id.isdigit():
+        return f"ssg:{item_id}", f"https://www.ssg.com/item/itemView.ssg?itemId={item_id}"
+    return None
+
+
+def _canonical_shinsegaetv(parts, query: Dict) -> Optional[Tuple[str, str]]:
+    """shinsegaetvshopping.com 상품 페이지: /display/detail/{상품 번호}"""
+    match = re.match(r"^/display/detail/(\d+)/?$", parts.path)
+    if match:
+        detail_id = match.group(1)
+        return f"sstv:{detail_id}", f"https://www.shinsegaetvshopping.com/display/detail/{detail_id}"
+    return None
+
+
+# (호스트 도메인, 정규화 함수)
+URL_ADAPTERS = [
+    ("ssg.com", _canonical_ssg),
+    ("shinsegaetvshopping.com", _canonical_shinsegaetv),
+]
+
+
+def canonical_url(url: str) -> Tuple[str, str]:
+    """상품 URL -> (정규 ID, 요청에 사용할 정규 URL)
+
+    알려진 사이트는 상품 고유 ID를, 그 외에는 추적용 쿼리와 #을 뗀 URL의 해시를 ID로 쓴다.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    for domain, adapter in URL_ADAPTERS:
+        if host == domain or host.endswith("." + domain):
+            canonical = adapter(parts, query)
+            if canonical:
+                return canonical
+
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+    )
+    netloc = host + (f":{parts.port}" if parts.port else "")
+    normalized = urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", urlencode(params), ""))
+    return f"{host}:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:20]}", normalized
+
+
+class _FetchEntry:
+    """같은 실행에서 정규 ID 하나에 대한 요청 결과 (먼저 온 스레드가 요청하고 나머지는 대기)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+
+
 class PriceCompareCrawler:
     def __init__(
         self,
         config_file: str = None,
         results_file: str = None,
         site_name: str = None,
-        cancel_event: Optional[threading.Event] = None
+        cancel_event: Optional[threading.Event] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        result_callback: Optional[Callable[[Dict], None]] = None,
+        products: Optional[List[Dict]] = None,
+        task_order: Optional[Callable[[List[Dict]], List[int]]] = None
     ):
 
         self.site_name = site_name
@@ -50,6 +512,8 @@ class PriceCompareCrawler:
         if config_file is None:
             config_file = f"{site_name}_input_list.jsonl"
         self.config_file = config_file
+        self.products = products  # 이미 불러온 제품 목록 (있으면 입력 파일을 읽지 않음)
+        self.task_order = task_order  # 제품 목록 -> 제출 순서(인덱스), 결과 파일은 항상 제품 목록 순서
 
         if results_file is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")    
@@ -71,9 +535,19 @@ class PriceCompareCrawler:
         self.current_product = 0  # 현재 처리 중인 제품 번호
         self.progress_lock = threading.Lock()  # 진행률 업데이트용 락
         self.cancel_event = cancel_event or threading.Event()
+        self.progress_callback = progress_callback  # 진행률 변경 시 호출 (get_progress 형식)
+        self.result_callback = result_callback  # 제품 결과가 도착할 때마다 호출 (결과 dict)
+        self.excel_widths: Optional[ExcelColumnWidths] = None  # 결과 기록 중 누적한 Excel 열 너비
+        self.price_stats = PriceSummaryStats()  # 가격 역전 누계
+        self._results_index: Optional[ResultsIndex] = None  # 불러온 결과 색인
+        self._fetch_cache: Dict[str, _FetchEntry] = {}  # 이번 실행의 정규 ID별 요청 결과
+        self._fetch_lock = threading.Lock()
+        self.request_delay = REQUEST_DELAY  # 요청 사이 대기 시간 범위 (초)
         
     def load_products(self) -> List[Dict]:
         """JSONL 파일에서 제품 정보 로드"""
+        if self.products is not None:
+            return list(self.products)
         products = []
         try:
             with jsonlines.open(self.config_file) as reader:
@@ -90,6 +564,22 @@ class PriceCompareCrawler:
             'total': self.total_products,
             'percentage': self.progress
         }
+
+    def _notify_progress(self):
+        """진행률 콜백 호출"""
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.get_progress())
+            except Exception as e:
+                print(f"  ⚠️ 진행률 콜백 오류: {e}")
+
+    def _notify_result(self, result: Dict):
+        """결과 콜백 호출"""
+        if self.result_callback:
+            try:
+                self.result_callback(result)
+            except Exception as e:
+                print(f"  ⚠️ 결과 콜백 오류: {e}")
     
     def crawl_ssg(self, url: str) -> Dict:
         """SSG에서 가격 정보 크롤링"""
@@ -269,6 +759,48 @@ class PriceCompareCrawler:
         elif self.site_name == 'samsung':
             return self.crawl_samsung(url)
     
+    def fetch_price(self, url: str) -> Tuple[Dict, bool]:
+        """정규 URL로 가격 조회 (같은 실행에서 같은 정규 ID는 한 번만 요청)
+
+        (가격 정보, 실제로 요청했는지)를 반환한다. 가격 정보의 상품 url은 카탈로그의 원래 URL이다.
+        """
+        if not url:
+            return self.crawl_price(url), True
+        canonical_id, fetch_url = canonical_url(url)
+        with self._fetch_lock:
+            entry = self._fetch_cache.get(canonical_id)
+            fetched = entry is None
+            if fetched:
+                entry = self._fetch_cache[canonical_id] = _FetchEntry()
+
+        timing = None
+        if fetched:
+            try:
+                entry.result, timing = self._timed_crawl(fetch_url)
+            finally:
+                entry.done.set()
+            result = entry.result
+        else:
+            entry.done.wait()
+            result = entry.result
+            if result is None:
+                # 먼저 요청한 스레드가 예외로 끝난 경우 직접 요청
+                (result, timing), fetched = self._timed_crawl(fetch_url), True
+
+        data = dict(result)
+        if data.get('상품 url') is not None:
+            data['상품 url'] = url
+        data['canonical_id'] = canonical_id
+        if timing:
+            data.update(timing)
+        return data, fetched
+
+    def _timed_crawl(self, url: str) -> Tuple[Dict, Dict]:
+        """crawl_price 결과와 요청 시간 (fetch_ms: 재시도·백오프 포함 밀리초)"""
+        started = time.monotonic()
+        result = self.crawl_price(url)
+        return result, {'fetch_ms': int((time.monotonic() - started) * 1000)}
+
     def request_cancel(self):
         """취소 요청"""
         self.cancel_event.set()
@@ -295,42 +827,53 @@ class PriceCompareCrawler:
             # Waffle (우리 회사) 크롤링
             if 'waffle' in product:
                 self._ensure_not_cancelled()
-                waffle_data = self.crawl_price(product['waffle']['url'])
+                waffle_data, fetched = self.fetch_price(product['waffle']['url'])
                 result['prices'].append({
                     'seller': 'waffle',
                     **waffle_data   
                 })
-                # 랜덤 딜레이 (1-2초) - Rate Limiting 방지
-                time.sleep(random.uniform(1.0, 2.0))
+                # 랜덤 딜레이 (1-2초) - Rate Limiting 방지 (요청하지 않았으면 생략)
+                if fetched:
+                    time.sleep(random.uniform(*self.request_delay))
             
             # 경쟁사 크롤링
             if 'competitors' in product:
                 for competitor in product['competitors']:
                     self._ensure_not_cancelled()
-                    comp_data = self.crawl_price(competitor['url'])
+                    comp_data, fetched = self.fetch_price(competitor['url'])
                     result['prices'].append({
                         'seller': competitor['name'],
                         **comp_data
                     })
-                    # 랜덤 딜레이 (1-2초) - Rate Limiting 방지
-                    time.sleep(random.uniform(1.0, 2.0))
+                    # 랜덤 딜레이 (1-2초) - Rate Limiting 방지 (요청하지 않았으면 생략)
+                    if fetched:
+                        time.sleep(random.uniform(*self.request_delay))
         except Exception as e:
             # 에러 발생 시 로깅
             print(f"  ⚠️ 제품 {product.get('product_name', 'Unknown')} 크롤링 중 오류: {e}")
             result['error'] = str(e)
+
+        # 가격 비교 요약은 결과가 도착할 때 한 번만 계산해 함께 저장
+        result['summary'] = summarize_prices(result['prices'])
         
         # 진행률 업데이트 (스레드 안전)
         with self.progress_lock:
             self.current_product += 1
+            self.price_stats.add(result['summary'])
             self.progress = int((self.current_product / self.total_products) * 100)
             print(f"\n[{self.progress}%] 크롤링 완료 ({self.current_product}/{self.total_products}): {product.get('product_name', 'Unknown')}")
+            self._notify_progress()
         
         return result
 
 
 
-    def run_crawling(self, max_workers: int = None) -> bool:
-        """전체 제품에 대해 크롤링 실행 (멀티스레드)"""
+    def run_crawling(self, max_workers: int = None, task_executor=None) -> bool:
+        """전체 제품에 대해 크롤링 실행 (멀티스레드)
+
+        task_executor를 지정하면 자체 스레드풀 대신 해당 실행기(submit/shutdown 지원)에
+        제품 단위 작업을 제출한다.
+        """
         # 워커 수 설정 (환경 변수 또는 기본값)
         if max_workers is None:
             max_workers = int(os.getenv("CRAWLER_WORKERS", "7"))  # 기본값 3개 (안정성 우선)
@@ -342,12 +885,15 @@ class PriceCompareCrawler:
         self.total_products = len(products)
         self.current_product = 0
         self.progress = 0
+        self.price_stats = PriceSummaryStats()
+        self._fetch_cache = {}
+        self._notify_progress()
         
         print(f"\n=== 멀티스레드 크롤링 시작 ===")
         print(f"전체 제품 수: {self.total_products}")
         print(f"워커 수: {max_workers}")
         print(f"예상 속도 향상: 약 {max_workers}배")
-        print(f"⚠️ 안정성을 위해 요청 간격: 1-2초 (랜덤)\n")
+        print(f"⚠️ 안정성을 위해 요청 간격: {self.request_delay[0]:g}-{self.request_delay[1]:g}초 (랜덤)\n")
         
         # 결과를 순서대로 저장하기 위한 딕셔너리
         results_dict = {}
@@ -356,12 +902,14 @@ class PriceCompareCrawler:
         error_lock = threading.Lock()
         cancelled = False
         
-        with jsonlines.open(self.results_file, mode='w') as writer:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 모든 제품에 대해 Future 제출
+        results_index = ResultsIndex(self.results_file)
+        with open(self.results_file, 'wb') as writer:
+            with (task_executor or ThreadPoolExecutor(max_workers=max_workers)) as executor:
+                # 모든 제품에 대해 Future 제출 (task_order가 있으면 그 순서로)
+                order = self.task_order(products) if self.task_order else range(len(products))
                 future_to_product = {
-                    executor.submit(self.crawl_single_product, product): idx 
-                    for idx, product in enumerate(products)
+                    executor.submit(self.crawl_single_product, products[idx]): idx
+                    for idx in order
                 }
                 
                 # 완료된 작업부터 처리
@@ -376,6 +924,7 @@ class PriceCompareCrawler:
                         # 결과를 인덱스 순서로 저장
                         with results_lock:
                             results_dict[idx] = result
+                        self._notify_result(result)
                     except CrawlerCancelledException:
                         cancelled = True
                         print("사용자 취소 요청을 감지하여 크롤링을 중단합니다.")
@@ -391,15 +940,22 @@ class PriceCompareCrawler:
                                 'product_name': products[idx].get('product_name', 'Unknown'),
                                 'timestamp': datetime.now().isoformat(),
                                 'prices': [],
+                                'summary': summarize_prices([]),
                                 'error': str(e)
                             }
+                        self._notify_result(results_dict[idx])
                         with error_lock:
                             error_count += 1
             
-            # 인덱스 순서대로 결과 파일에 저장
+            # 인덱스 순서대로 결과 파일에 저장 (Excel 열 너비와 제품별 위치 색인도 함께 기록)
+            self.excel_widths = ExcelColumnWidths()
             for idx in range(len(products)):
                 if idx in results_dict:
-                    writer.write(results_dict[idx])
+                    results_index.append(writer, results_dict[idx])
+                    self.excel_widths.add_result(results_dict[idx])
+        results_index.excel_widths = self.excel_widths
+        results_index.save()
+        self._results_index = results_index
         
         self.progress = 100
         if cancelled or self.is_cancelled():
@@ -414,16 +970,82 @@ class PriceCompareCrawler:
             print(f"   성공률: {((self.total_products - error_count) / self.total_products * 100):.1f}%")
         else:
             print(f"✅ 모든 제품 크롤링 성공!")
+        stats = self.price_stats.to_dict()
+        print(f"가격 역전 제품: {stats['inversions']}/{stats['compared']}개")
         return False
     
-    def analyze_prices(self):
-        """가격 분석 및 비교"""
-        results = []
+    def merge_results(
+        self,
+        products: List[Dict],
+        fallback: Callable[[Dict, str], Optional[Dict]]
+    ) -> int:
+        """일부 (제품, 판매처)만 크롤링한 결과를 카탈로그 전체 결과로 합치기
+
+        이번에 크롤링한 판매처는 결과 파일의 가격을, 나머지는 fallback(제품, 판매처)이
+        돌려준 가격 정보(없으면 None)를 쓴다. 결과 파일을 카탈로그 순서로 다시 쓰고
+        제품 수를 반환한다.
+        """
+        crawled = {str(result['product_id']): result for result in self.iter_results()}
+        self.excel_widths = ExcelColumnWidths()
+        self.price_stats = PriceSummaryStats()
+
+        results_index = ResultsIndex(self.results_file)
+        tmp_path = self.results_file + ".merge"
+        with open(tmp_path, 'wb') as writer:
+            for product in products:
+                result = crawled.get(str(product['product_id']))
+                new_prices = {p['seller']: p for p in (result or {}).get('prices', [])}
+                sellers = (['waffle'] if 'waffle' in product else []) + [
+                    competitor['name'] for competitor in product.get('competitors', [])
+                ]
+                prices = []
+                for seller in sellers:
+                    price_info = new_prices.get(seller) or fallback(product, seller)
+                    if price_info is None:
+                        price_info = {
+                            'seller': seller, '상품 url': None, '상품 가격': None, '배송비': None,
+                            '배송비 여부': None, '최종 가격': None, '에러 발생': '관측 기록 없음',
+                        }
+                    prices.append({**price_info, 'seller': seller})
+
+                merged = {
+                    'product_id': product['product_id'],
+                    'product_name': product['product_name'],
+                    'timestamp': (result or {}).get('timestamp') or datetime.now().isoformat(),
+                    'prices': prices,
+                    'summary': summarize_prices(prices),
+                }
+                if result and 'error' in result:
+                    merged['error'] = result['error']
+                results_index.append(writer, merged)
+                self.excel_widths.add_result(merged)
+                self.price_stats.add(merged['summary'])
+        os.replace(tmp_path, self.results_file)
+        results_index.excel_widths = self.excel_widths
+        results_index.save()
+        self._results_index = results_index
+
+        self.total_products = self.current_product = len(products)
+        return len(products)
+
+    def results_index(self) -> ResultsIndex:
+        """결과 색인 (결과 파일이 그대로면 불러온 색인을 재사용)"""
+        index = self._results_index
+        if index is None or index.size != os.path.getsize(self.results_file):
+            index = self._results_index = ResultsIndex.open(self.results_file)
+        return index
+
+    def iter_results(self, product_ids=None) -> Iterator[Dict]:
+        """결과 읽기 (product_ids를 주면 색인으로 해당 제품만 읽음)"""
+        if product_ids is not None:
+            yield from self.results_index().read(product_ids)
+            return
         with jsonlines.open(self.results_file) as reader:
-            for obj in reader:
-                results.append(obj)
-        
-        for result in results:
+            yield from reader
+
+    def analyze_prices(self, product_ids=None):
+        """가격 분석 및 비교 (product_ids를 주면 해당 제품만)"""
+        for result in self.iter_results(product_ids):
             print(f"\n{'='*50}")
             print(f"제품: {result['product_name']}")
             print(f"{'='*50}")
@@ -449,174 +1071,117 @@ class PriceCompareCrawler:
                     print(f"  배송비 여부: {p['배송비 여부']}")
                     print(f"  최종 가격: {p['최종 가격']}")
             
-            # 간단한 가격 비교
+            # 간단한 가격 비교 (크롤링 시 계산된 요약 사용)
             if waffle_price and competitor_prices:
+                summary = result_summary(result)
                 print(f"\n📊 가격 비교 분석")
                 print(f"   우리 회사와 경쟁사 {len(competitor_prices)}곳의 가격을 비교했습니다.")
+                if summary['rank'] is not None:
+                    print(f"   가격 순위: {summary['rank']}위")
+                if summary['inversion']:
+                    print(f"   ⚠️ 최저가 경쟁사 {summary['min_competitor']}보다 {summary['price_gap']}원 비쌉니다.")
+
+
+
+    def _excel_widths_for_results(self, product_ids=None) -> "ExcelColumnWidths":
+        """열 너비 조회
 
+        결과를 기록하며 누적한 값(이 인스턴스 또는 결과 색인에 저장된 값)을 쓰고,
+        저장된 값이 없거나 일부 제품만 변환하면 결과를 한 번 훑어 계산한다.
+        """
+        if product_ids is None:
+            if self.excel_widths is None:
+                index = ResultsIndex.load(self.results_file)
+                if index is not None:
+                    self._results_index = index
+                    self.excel_widths = index.excel_widths
+            if self.excel_widths is not None:
+                return self.excel_widths
 
+        widths = ExcelColumnWidths()
+        for result in self.iter_results(product_ids):
+            widths.add_result(result)
+        return widths
 
-    def export_to_excel_format(self, excel_file: str = None):
-        """Excel 파일 생성 - Sheet1: 전체 결과, Sheet2: 가격 역전 항목"""
+    def export_to_excel_format(
+        self,
+        excel_file: str = None,
+        extra_sheets: List[Tuple[str, List]] = None,
+        keep_results_file: bool = False,
+        on_product: Optional[Callable[[int], None]] = None,
+        on_result: Optional[Callable[[Dict], None]] = None,
+        product_ids: Optional[List] = None
+    ):
+        """Excel 파일 생성 - Sheet1: 전체 결과, Sheet2: 가격 역전 항목
+
+        write-only 모드로 결과 파일을 한 줄씩 읽으며 두 시트를 동시에 기록하므로
+        제품 수와 관계없이 메모리 사용량이 일정하다.
+        extra_sheets: 뒤에 덧붙일 (시트 이름, (값, 스타일) 행 목록) 목록 (서버 분석 시트 등)
+            행 목록 대신 함수를 주면 전체 결과를 기록한 뒤 호출해 행 목록을 얻는다.
+        keep_results_file: True면 변환 후 결과 JSONL을 지우지 않음 (다른 형식도 만들 때)
+        on_product: 제품 하나를 기록할 때마다 누적 제품 수로 호출
+        on_result: 읽은 결과마다 호출 (결과 파일을 다시 읽지 않고 함께 집계할 때)
+        product_ids: 주면 해당 제품만 색인으로 읽어 변환 (결과 파일은 남김)
+        """
         try:
             if excel_file is None:
                 excel_file = self.csv_file.replace('.csv', '.xlsx')
-            
-            results = []
-            with jsonlines.open(self.results_file) as reader:
-                for obj in reader:
-                    results.append(obj)
-            
-            if not results:
+
+            if product_ids is not None:
+                keep_results_file = True
+            widths = self._excel_widths_for_results(product_ids)
+            if widths.result_count == 0:
                 print("변환할 데이터가 없습니다.")
                 return
-            
-            # Excel 워크북 생성
-            wb = openpyxl.Workbook()
-            
-            # Sheet1: 전체 결과
-            ws1 = wb.active
-            ws1.title = "전체 결과"
-            
-            # Sheet2: 가격 역전 항목
-            ws2 = wb.create_sheet("가격 역전 항목")
-            
-            # Sheet1 작성
-            row = 1
-            for result in results:
-                cell1 = ws1.cell(row, 1, f"제품명: {result['product_name']}")
-                cell2 = ws1.cell(row, 2, f"제품ID: {result['product_id']}")
-                cell1.font = Font(color="FF0000FF", bold=True)
-                cell2.font = Font(color="FF0000FF", bold=True)
-                row += 1
-                
-                ws1.cell(row, 1, f"추출 시간: {result['timestamp']}")
-                row += 1
-                row += 1  # 빈 줄
-                
-                # 헤더
-                headers = ['판매처', '상품 url', '상품가격', '배송비', '배송비여부', '최종가격']
-                for col, header in enumerate(headers, 1):
-                    cell = ws1.cell(row, col, header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                row += 1
-                
-                # 데이터
-                for price_info in result['prices']:
-                    seller_name = 'Waffle (우리회사)' if price_info['seller'] == 'waffle' else f"경쟁사 ({price_info['seller']})"
-                    ws1.cell(row, 1, seller_name)
-                    ws1.cell(row, 2, price_info.get('상품 url', 'N/A'))
-                    ws1.cell(row, 3, price_info.get('상품 가격', 'N/A'))
-                    ws1.cell(row, 4, price_info.get('배송비', 'N/A'))
-                    ws1.cell(row, 5, price_info.get('배송비 여부', 'N/A'))
-                    ws1.cell(row, 6, price_info.get('최종 가격', 'N/A'))
-                    row += 1
-                
-                row += 2
 
-            
-            # Sheet2 작성: 가격 역전 항목만
-            ws2.cell(1, 1, "가격 역전 항목 (경쟁사가 더 저렴한 경우)")
-            ws2.cell(1, 1).font = Font(bold=True, size=14)
-            row2 = 3
-            
+            # Excel 워크북 생성 (write-only, 공유 스타일)
+            wb = openpyxl.Workbook(write_only=True)
+            add_excel_styles(wb)
+
+            # Sheet1: 전체 결과 / Sheet2: 가격 역전 항목
+            ws1 = wb.create_sheet(SUMMARY_SHEET)
+            ws2 = wb.create_sheet(INVERSION_SHEET)
+
+            # write-only 모드에서는 행보다 열 너비를 먼저 지정해야 함
+            for ws in (ws1, ws2):
+                for col_idx, width in widths.column_widths(ws.title).items():
+                    ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+            for row in INVERSION_TITLE_ROWS:
+                ws2.append(_styled_row(ws2, row))
+
             found_cheaper = False
-            
-            for result in results:
-                # Waffle 가격 찾기
-                waffle_price = None
-                for price_info in result['prices']:
-                    if price_info['seller'] == 'waffle':
-                        waffle_price = price_info.get('최종 가격')
-                        break
-                
-                if waffle_price is None or not isinstance(waffle_price, (int, float)):
-                    continue
-                
-                # 경쟁사 중 더 저렴한 곳 찾기
-                cheaper_competitors = []
-                for price_info in result['prices']:
-                    if price_info['seller'] != 'waffle':
-                        comp_price = price_info.get('최종 가격')
-                        if comp_price and isinstance(comp_price, (int, float)) and comp_price < waffle_price:
-                            cheaper_competitors.append(price_info)
-                
-                # 가격 역전이 있는 경우만 Sheet2에 추가
-                if cheaper_competitors:
+            for count, result in enumerate(self.iter_results(product_ids), 1):
+                if on_result:
+                    on_result(result)
+                for row in summary_sheet_rows(result):
+                    ws1.append(_styled_row(ws1, row))
+                for row in inversion_sheet_rows(result):
                     found_cheaper = True
-                    
-                    ws2.cell(row2, 1, f"제품명: {result['product_name']}")
-                    ws2.cell(row2, 1).font = Font(bold=True)
-                    ws2.cell(row2, 2, f"제품ID: {result['product_id']}")
-                    row2 += 1
-
-                    # 헤더
-                    headers = ['판매처', '상품 url', '상품가격', '배송비', '배송비여부', '최종가격', '가격차이']
-                    for col, header in enumerate(headers, 1):
-                        cell = ws2.cell(row2, col, header)
-                        cell.font = Font(bold=True)
-                        cell.fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
-                    row2 += 1
-                    
-                    # Waffle 가격 (참고용)
-                    ws2.cell(row2, 1, "Waffle (우리회사)")
-                    for price_info in result['prices']:
-                        if price_info['seller'] == 'waffle':
-                            ws2.cell(row2, 2, price_info.get('상품 url', 'N/A'))
-                            ws2.cell(row2, 3, price_info.get('상품 가격', 'N/A'))
-                            ws2.cell(row2, 4, price_info.get('배송비', 'N/A'))
-                            ws2.cell(row2, 5, price_info.get('배송비 여부', 'N/A'))
-                            ws2.cell(row2, 6, waffle_price)
-                            ws2.cell(row2, 7, "-")
-                            break
-                    row2 += 1
-                    
-                    # 더 저렴한 경쟁사들
-                    for comp in cheaper_competitors:
-                        seller_name = f"경쟁사 ({comp['seller']})"
-                        comp_price = comp.get('최종 가격')
-                        price_diff = waffle_price - comp_price
-                        
-                        ws2.cell(row2, 1, seller_name)
-                        ws2.cell(row2, 2, comp.get('상품 url', 'N/A'))
-                        ws2.cell(row2, 3, comp.get('상품 가격', 'N/A'))
-                        ws2.cell(row2, 4, comp.get('배송비', 'N/A'))
-                        ws2.cell(row2, 5, comp.get('배송비 여부', 'N/A'))
-                        ws2.cell(row2, 6, comp_price)
-                        ws2.cell(row2, 7, f"-{price_diff}원 저렴")
-                        
-                        # 빨간색 강조
-                        ws2.cell(row2, 6).font = Font(color="FF0000", bold=True)
-                        ws2.cell(row2, 7).font = Font(color="FF0000", bold=True)
-                        row2 += 1
-                    
-                    row2 += 2
-            
+                    ws2.append(_styled_row(ws2, row))
+                if on_product:
+                    on_product(count)
+
             if not found_cheaper:
-                ws2.cell(row2, 1, "가격 역전 항목이 없습니다. 모든 제품이 경쟁사보다 저렴하거나 동일합니다.")
-                ws2.cell(row2, 1).font = Font(color="008000", bold=True)
-            
-            # 열 너비 자동 조정
-            for ws in [ws1, ws2]:
-                for column in ws.columns:
-                    max_length = 0
-                    column = list(column)
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column[0].column_letter].width = adjusted_width
-            
+                ws2.append(_styled_row(ws2, NO_INVERSION_ROW))
+
+            for title, rows in extra_sheets or []:
+                if callable(rows):
+                    rows = rows()
+                ws = wb.create_sheet(title)
+                lengths = {}
+                measure_rows(rows, lengths)
+                for col_idx, width in widths_from_lengths(lengths).items():
+                    ws.column_dimensions[get_column_letter(col_idx)].width = width
+                for row in rows:
+                    ws.append(_styled_row(ws, row))
+
             wb.save(excel_file)
             print(f"✓ Excel 파일 생성 완료: {excel_file}")
                 # JSONL 파일 삭제
             try:
-                if os.path.exists(self.results_file):
-                    os.remove(self.results_file)
+                if not keep_results_file and os.path.exists(self.results_file):
+                    remove_results_file(self.results_file)
                     print(f"임시 파일 삭제됨: {self.results_file}")
             except:
                 pass  # 삭제 실패해도 무시
@@ -633,12 +1198,9 @@ class PriceCompareCrawler:
             return None 
     
     def get_latest_prices(self, product_id: int) -> Dict:
-        """특정 제품의 최신 가격 정보 조회"""
+        """특정 제품의 최신 가격 정보 조회 (색인으로 해당 줄만 읽음)"""
         try:
-            with jsonlines.open(self.results_file) as reader:
-                for obj in reader:
-                    if obj['product_id'] == product_id:
-                        return obj
+            return next(self.results_index().read([product_id]), None)
         except FileNotFoundError:
             print(f"{self.results_file} 파일이 없습니다.")
         return None
@@ -1,64 +1,173 @@
-import pandas as pd
+"""가격조사 엑셀 -> 크롤링 입력 카탈로그(JSONL) 변환
+
+시트마다 read-only 모드로 행을 한 줄씩 읽어 곧바로 구조화된 형식
+(product_id, product_name, waffle, competitors)으로 기록한다. 중간 JSONL 없이
+한 번만 읽으므로 행 수와 관계없이 메모리 사용량이 일정하며, 시트는 프로세스별로 병렬 변환한다.
+
+시트 이름이 사이트 이름이 된다: ssg 시트 -> ssg_input_list.jsonl
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
 import json
+import os
 
-def excel_to_jsonl(excel_path, jsonl_path, sheet_name="ssg"):
-    """엑셀 → JSONL 변환"""
-    df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
-    with open(jsonl_path, 'w', encoding='utf-8-sig') as f:
-        for _, row in df.iterrows():
-            record = row.dropna().to_dict()
-            f.write(json.dumps(record, ensure_ascii=False) + '\n')
-
-    print(f"✅ 1단계 완료: 엑셀 → JSONL 변환 ({jsonl_path})")
-
-
-def restructure_jsonl(input_path, output_path):
-    """JSONL 구조 재정렬"""
-    with open(input_path, "r", encoding="utf-8-sig") as infile, \
-         open(output_path, "w", encoding="utf-8-sig") as outfile:
-        
-        for line in infile:
-            data = json.loads(line.strip())
-            
-            product = {
-                "product_id": data.get("상품 번호"),
-                "product_name": data.get("상품명"),
-                "waffle": {
-                    "url": data.get("와플커머스_url")
-                },
-                "competitors": []
-            }
-            
-            # 경쟁사(name_N, <name>_url) 자동 매핑
-            for i in range(1, 10):  # 경쟁사 많을 때 대비
-                name_key = f"name_{i}"
-                if name_key in data:
-                    name = data[name_key]
-                    name = name.strip()
-                    url_key = f"{name}_url"
-                    url = data.get(url_key)
-                    product["competitors"].append({
-                        "name": name,
-                        "url": url
-                    })
-                else:
-                    break
-
-            outfile.write(json.dumps(product, ensure_ascii=False) + '\n')
-
-    print(f"✅ 2단계 완료: JSONL 구조화 ({output_path})")
+import openpyxl
 
+# 필수 열
+PRODUCT_ID_COLUMN = "상품 번호"
+PRODUCT_NAME_COLUMN = "상품명"
+WAFFLE_URL_COLUMN = "와플커머스_url"
+# 경쟁사 이름 열 (name_1, name_2, ...)과 URL 열 (<경쟁사 이름>_url)
+COMPETITOR_NAME_PREFIX = "name_"
+URL_SUFFIX = "_url"
 
-if __name__ == "__main__":
-    excel_path = "가격조사.xlsx"
-    temp_jsonl = "가격조사.jsonl"
-    final_jsonl = "가격조사_구조화.jsonl"
+OUTPUT_SUFFIX = "_input_list.jsonl"
+
+
+class CatalogFormatError(ValueError):
+    """시트 형식이 카탈로그 형식이 아닌 경우"""
+    pass
+
+
+def _cell_value(value):
+    """빈 문자열은 None, 정수로 저장된 실수는 int로"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class SheetLayout:
+    """머리글 행에서 찾은 열 위치"""
+
+    def __init__(self, header: Iterable):
+        names = [_cell_value(name) for name in header]
+        self.columns: Dict[str, int] = {}
+        for idx, name in enumerate(names):
+            if isinstance(name, str) and name not in self.columns:
+                self.columns[name] = idx
+
+        missing = [
+            name for name in (PRODUCT_ID_COLUMN, PRODUCT_NAME_COLUMN, WAFFLE_URL_COLUMN)
+            if name not in self.columns
+        ]
+        if missing:
+            raise CatalogFormatError(f"필수 열이 없습니다: {', '.join(missing)}")
+
+        # name_1부터 빠짐없이 이어지는 경쟁사 이름 열
+        self.competitor_columns: List[int] = []
+        while f"{COMPETITOR_NAME_PREFIX}{len(self.competitor_columns) + 1}" in self.columns:
+            self.competitor_columns.append(
+                self.columns[f"{COMPETITOR_NAME_PREFIX}{len(self.competitor_columns) + 1}"]
+            )
+
+    def _get(self, values: Tuple, idx: Optional[int]):
+        if idx is None or idx >= len(values):
+            return None
+        return _cell_value(values[idx])
 
-    # 1단계: 엑셀 → JSONL
-    excel_to_jsonl(excel_path, temp_jsonl, sheet_name="ssg")
+    def product(self, values: Tuple) -> Optional[Dict]:
+        """행 하나 -> 카탈로그 제품 (빈 행이면 None)"""
+        if all(_cell_value(value) is None for value in values):
+            return None
 
-    # 2단계: JSONL 구조 변환
-    restructure_jsonl(temp_jsonl, final_jsonl)
+        product = {
+            "product_id": self._get(values, self.columns[PRODUCT_ID_COLUMN]),
+            "product_name": self._get(values, self.columns[PRODUCT_NAME_COLUMN]),
+            "waffle": {
+                "url": self._get(values, self.columns[WAFFLE_URL_COLUMN])
+            },
+            "competitors": []
+        }
+        for name_idx in self.competitor_columns:
+            name = self._get(values, name_idx)
+            if name is None:
+                break
+            name = str(name)
+            product["competitors"].append({
+                "name": name,
+                "url": self._get(values, self.columns.get(f"{name}{URL_SUFFIX}"))
+            })
+        return product
+
+
+def iter_sheet_products(ws) -> Iterator[Dict]:
+    """시트의 행을 카탈로그 제품으로 변환 (머리글 행이 형식에 맞지 않으면 CatalogFormatError)"""
+    rows = ws.iter_rows(values_only=True)
+    layout = SheetLayout(next(rows, ()))
+    for values in rows:
+        product = layout.product(values)
+        if product is not None:
+            yield product
+
+
+def convert_sheet(excel_path: str, sheet_name: str, output_path: str) -> int:
+    """시트 하나를 카탈로그 JSONL로 변환하고 제품 수를 반환"""
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        count = 0
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8-sig") as f:
+            for product in iter_sheet_products(wb[sheet_name]):
+                f.write(json.dumps(product, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, output_path)
+        return count
+    finally:
+        wb.close()
+
+
+def _convert_sheet_task(args: Tuple[str, str, str]) -> Tuple[str, Optional[int], Optional[str]]:
+    excel_path, sheet_name, output_path = args
+    try:
+        return sheet_name, convert_sheet(excel_path, sheet_name, output_path), None
+    except CatalogFormatError as e:
+        if os.path.exists(f"{output_path}.tmp"):
+            os.remove(f"{output_path}.tmp")
+        return sheet_name, None, str(e)
+
+
+def convert_workbook(
+    excel_path: str,
+    output_dir: str = ".",
+    sheet_names: Optional[List[str]] = None,
+    workers: Optional[int] = None
+) -> Dict[str, int]:
+    """모든(또는 지정한) 시트를 병렬 변환하고 {시트 이름: 제품 수}를 반환
+
+    형식이 맞지 않는 시트는 건너뛴다.
+    """
+    if sheet_names is None:
+        wb = openpyxl.load_workbook(excel_path, read_only=True)
+        sheet_names = wb.sheetnames
+        wb.close()
+
+    tasks = [
+        (excel_path, sheet_name, os.path.join(output_dir, f"{sheet_name}{OUTPUT_SUFFIX}"))
+        for sheet_name in sheet_names
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for sheet_name, count, error in executor.map(_convert_sheet_task, tasks):
+            if error:
+                print(f"⚠️ {sheet_name} 시트 건너뜀: {error}")
+                continue
+            results[sheet_name] = count
+            print(f"✅ {sheet_name}: {count}개 제품 -> {sheet_name}{OUTPUT_SUFFIX}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가격조사 엑셀을 크롤링 입력 카탈로그로 변환")
+    parser.add_argument("excel_path", nargs="?", default="가격조사.xlsx")
+    parser.add_argument("--sheet", action="append", dest="sheets", help="변환할 시트 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 변환할 시트 수 (기본: CPU 수)")
+    args = parser.parse_args()
 
+    convert_workbook(args.excel_path, args.output_dir, args.sheets, args.workers)
     print("🎉 전체 변환 완료!")
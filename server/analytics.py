@@ -0,0 +1,309 @@
+"""가격 분석 (NumPy 벡터 연산)
+
+크롤링 결과를 판매처 단위 행의 열 배열로 적재한 뒤, 제품·판매처별 통계를
+파이썬 반복문 없이 계산한다. 결과는 Excel 분석 시트와 요약 API에서 사용한다.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import json
+import os
+
+import jsonlines
+import numpy as np
+
+WAFFLE_SELLER = "waffle"
+ANALYTICS_SHEET = "경쟁사 분석"
+
+
+class PriceTable(NamedTuple):
+    """판매처 단위 가격 관측값 (행 = 제품 x 판매처)"""
+    product_ids: List                # 제품 순서대로의 제품 ID
+    product_names: List[str]
+    sellers: List[str]               # 판매처 코드 -> 이름
+    product_idx: np.ndarray          # 행별 제품 번호 (int32)
+    seller_idx: np.ndarray           # 행별 판매처 코드 (int32)
+    item_price: np.ndarray           # 상품 가격 (float64, 없으면 NaN)
+    shipping_fee: np.ndarray         # 배송비 (float64, 없으면 NaN)
+    final_price: np.ndarray          # 최종 가격 (float64, 없으면 NaN)
+
+    @property
+    def product_count(self) -> int:
+        return len(self.product_ids)
+
+
+def _to_float(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+class PriceTableBuilder:
+    """결과를 하나씩 받아 열 배열을 만듦 (Excel 변환처럼 결과를 한 번 읽는 동안 함께 적재)"""
+
+    def __init__(self):
+        self.product_ids, self.product_names = [], []
+        self.seller_codes: Dict[str, int] = {WAFFLE_SELLER: 0}
+        self.product_idx, self.seller_idx = [], []
+        self.item_price, self.shipping_fee, self.final_price = [], [], []
+
+    def add(self, result: Dict):
+        p_idx = len(self.product_ids)
+        self.product_ids.append(result.get('product_id'))
+        self.product_names.append(result.get('product_name'))
+        for price_info in result.get('prices', []):
+            seller = price_info['seller']
+            code = self.seller_codes.setdefault(seller, len(self.seller_codes))
+            self.product_idx.append(p_idx)
+            self.seller_idx.append(code)
+            self.item_price.append(_to_float(price_info.get('상품 가격')))
+            self.shipping_fee.append(_to_float(price_info.get('배송비')))
+            self.final_price.append(_to_float(price_info.get('최종 가격')))
+
+    def build(self) -> PriceTable:
+        return PriceTable(
+            product_ids=self.product_ids,
+            product_names=self.product_names,
+            sellers=list(self.seller_codes),
+            product_idx=np.asarray(self.product_idx, dtype=np.int32),
+            seller_idx=np.asarray(self.seller_idx, dtype=np.int32),
+            item_price=np.asarray(self.item_price, dtype=np.float64),
+            shipping_fee=np.asarray(self.shipping_fee, dtype=np.float64),
+            final_price=np.asarray(self.final_price, dtype=np.float64),
+        )
+
+
+def build_price_table(results: Iterable[Dict]) -> PriceTable:
+    """결과 목록을 열 배열로 변환"""
+    builder = PriceTableBuilder()
+    for result in results:
+        builder.add(result)
+    return builder.build()
+
+
+def load_price_table(results_file: str) -> PriceTable:
+    """결과 JSONL 파일을 열 배열로 적재"""
+    with jsonlines.open(results_file) as reader:
+        return build_price_table(reader)
+
+
+def _waffle_prices(table: PriceTable, prices: np.ndarray) -> np.ndarray:
+    """제품별 Waffle 가격 (제품에 Waffle 행이 여러 개면 첫 행 기준)"""
+    waffle = np.full(table.product_count, np.nan)
+    rows = np.flatnonzero(table.seller_idx == 0)
+    # 반복 인덱스 대입의 순서에 기대지 않고 제품별 첫 Waffle 행을 명시적으로 고름
+    products, first = np.unique(table.product_idx[rows], return_index=True)
+    waffle[products] = prices[rows[first]]
+    return waffle
+
+
+def _competitor_stats(table: PriceTable, prices: np.ndarray, waffle: np.ndarray, with_median: bool = True):
+    """제품별 경쟁사 최저가·중앙값과 Waffle보다 저렴한 경쟁사 수"""
+    n = table.product_count
+    # 기존 역전 판정과 같이 0·결측 가격은 비교에서 제외
+    mask = (table.seller_idx != 0) & np.isfinite(prices) & (prices != 0)
+    products = table.product_idx[mask]
+    values = prices[mask]
+
+    counts = np.bincount(products, minlength=n)
+    has = counts > 0
+    min_price = np.full(n, np.nan)
+    median_price = np.full(n, np.nan)
+
+    if values.size:
+        # (제품, 가격) 두 키 정렬 대신 제품 번호로 구간을 나눈 단일 키를 정렬
+        low = values.min()
+        key = products * (values.max() - low + 1) + (values - low)
+        sorted_values = values[np.argsort(key)]
+        starts = np.cumsum(counts) - counts
+        min_price[has] = sorted_values[starts[has]]
+        if with_median:
+            lo = starts[has] + (counts[has] - 1) // 2
+            hi = starts[has] + counts[has] // 2
+            median_price[has] = (sorted_values[lo] + sorted_values[hi]) / 2
+
+    with np.errstate(invalid="ignore"):
+        cheaper = values < waffle[products]
+    cheaper_count = np.bincount(products, weights=cheaper, minlength=n).astype(np.int64)
+    return mask, cheaper, counts, min_price, median_price, cheaper_count
+
+
+def _round(value: float, digits: int = 1) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+class PriceAnalytics(NamedTuple):
+    """카탈로그 전체 가격 분석 결과"""
+    table: PriceTable
+    waffle_price: np.ndarray         # 제품별 Waffle 최종 가격
+    competitor_count: np.ndarray     # 제품별 유효 경쟁사 가격 수
+    min_competitor_price: np.ndarray
+    median_competitor_price: np.ndarray
+    rank: np.ndarray                 # 제품별 Waffle 순위 (1 = 최저가, 비교할 경쟁사 가격이 없으면 0)
+    inversion_delta: np.ndarray      # Waffle - 경쟁사 최저가 (양수면 역전)
+    seller_stats: List[Dict]
+    fee_impact: Dict
+
+    def summary(self, top: int = 20) -> Dict:
+        """JSON 요약"""
+        compared = np.isfinite(self.inversion_delta)
+        inversion = compared & (self.inversion_delta > 0)
+        deltas = self.inversion_delta[inversion]
+
+        top_idx = np.flatnonzero(inversion)
+        top_idx = top_idx[np.argsort(-self.inversion_delta[top_idx], kind="stable")][:top]
+        table = self.table
+
+        return {
+            "products": table.product_count,
+            "observations": int(table.product_idx.size),
+            "compared": int(compared.sum()),
+            "inversions": int(inversion.sum()),
+            "inversion_rate": _round(inversion.sum() / compared.sum() * 100) if compared.any() else 0,
+            "average_delta": _round(deltas.mean()) if deltas.size else 0,
+            "max_delta": _round(deltas.max()) if deltas.size else 0,
+            "cheapest_rate": _round((self.rank[compared] == 1).mean() * 100) if compared.any() else 0,
+            "sellers": self.seller_stats,
+            "fee_impact": self.fee_impact,
+            "top_inversions": [
+                {
+                    "product_id": table.product_ids[i],
+                    "product_name": table.product_names[i],
+                    "waffle_price": _round(self.waffle_price[i]),
+                    "min_competitor_price": _round(self.min_competitor_price[i]),
+                    "median_competitor_price": _round(self.median_competitor_price[i]),
+                    "rank": int(self.rank[i]) or None,
+                    "delta": _round(self.inversion_delta[i]),
+                }
+                for i in top_idx
+            ],
+        }
+
+    def sheet_rows(self) -> List[List[Tuple]]:
+        """Excel '경쟁사 분석' 시트 행 ((값, 스타일) 목록)"""
+        summary = self.summary(top=0)
+        rows = [
+            [("경쟁사 가격 분석", "inversion_title")],
+            [],
+            [("비교 가능 제품", "label"), (summary["compared"], None)],
+            [("가격 역전 제품", "label"), (summary["inversions"], None)],
+            [("가격 역전 비율(%)", "label"), (summary["inversion_rate"], None)],
+            [("평균 가격차", "label"), (summary["average_delta"], None)],
+            [("최저가 비율(%)", "label"), (summary["cheapest_rate"], None)],
+            [("배송비로 인한 역전", "label"), (self.fee_impact["fee_caused_inversions"], None)],
+            [],
+            [(header, "summary_header") for header in (
+                '판매처', '비교 제품 수', '경쟁사 저렴', '경쟁사 저렴 비율(%)',
+                '평균 가격차', '평균 배송비', '유료 배송 비율(%)'
+            )],
+        ]
+        for stats in self.seller_stats:
+            rows.append([
+                (stats["seller"], None),
+                (stats["compared"], None),
+                (stats["cheaper"], None),
+                (stats["win_rate"], None),
+                (stats["average_delta"], None),
+                (stats["average_fee"], None),
+                (stats["paid_shipping_rate"], None),
+            ])
+        return rows
+
+
+def analyze_table(table: PriceTable) -> PriceAnalytics:
+    """열 배열 기준 가격 분석"""
+    n = table.product_count
+    waffle = _waffle_prices(table, table.final_price)
+    mask, cheaper, comp_count, min_price, median_price, cheaper_count = _competitor_stats(
+        table, table.final_price, waffle
+    )
+
+    comparable = np.isfinite(waffle) & (comp_count > 0)
+    rank = np.where(comparable, cheaper_count + 1, 0)
+    delta = np.where(comparable, waffle - min_price, np.nan)
+
+    # 판매처별 통계: 비교 가능 제품에서 경쟁사가 Waffle보다 저렴했던 비율
+    sellers = table.sellers
+    s = len(sellers)
+    comp_sellers = table.seller_idx[mask]
+    comp_products = table.product_idx[mask]
+    compared_rows = np.isfinite(waffle[comp_products])
+    row_gap = waffle[comp_products] - table.final_price[mask]
+
+    compared_n = np.bincount(comp_sellers[compared_rows], minlength=s)
+    cheaper_n = np.bincount(comp_sellers[cheaper], minlength=s)
+    gap_sum = np.bincount(comp_sellers[compared_rows], weights=row_gap[compared_rows], minlength=s)
+
+    fee = table.shipping_fee
+    fee_known = np.isfinite(fee)
+    fee_rows = np.bincount(table.seller_idx[fee_known], minlength=s)
+    fee_sum = np.bincount(table.seller_idx[fee_known], weights=fee[fee_known], minlength=s)
+    paid_n = np.bincount(table.seller_idx[fee_known & (fee > 0)], minlength=s)
+
+    seller_stats = []
+    for code in range(s):
+        if code == 0 and not fee_rows[0]:
+            continue
+        seller_stats.append({
+            "seller": sellers[code],
+            "compared": int(compared_n[code]),
+            "cheaper": int(cheaper_n[code]),
+            "win_rate": _round(cheaper_n[code] / compared_n[code] * 100) if compared_n[code] else None,
+            "average_delta": _round(gap_sum[code] / compared_n[code]) if compared_n[code] else None,
+            "average_fee": _round(fee_sum[code] / fee_rows[code]) if fee_rows[code] else None,
+            "paid_shipping_rate": _round(paid_n[code] / fee_rows[code] * 100) if fee_rows[code] else None,
+        })
+
+    # 배송비 영향: 상품 가격만 비교했을 때와 최종 가격으로 비교했을 때의 역전 차이
+    item_waffle = _waffle_prices(table, table.item_price)
+    _, _, item_count, item_min, _, _ = _competitor_stats(
+        table, table.item_price, item_waffle, with_median=False
+    )
+    item_comparable = np.isfinite(item_waffle) & (item_count > 0)
+    with np.errstate(invalid="ignore"):
+        item_inversion = item_comparable & (item_waffle > item_min)
+        final_inversion = comparable & (delta > 0)
+    both = comparable & item_comparable
+    fee_impact = {
+        "item_price_inversions": int(item_inversion.sum()),
+        "final_price_inversions": int(final_inversion.sum()),
+        "fee_caused_inversions": int((both & final_inversion & ~item_inversion).sum()),
+        "fee_resolved_inversions": int((both & item_inversion & ~final_inversion).sum()),
+    }
+
+    return PriceAnalytics(
+        table=table,
+        waffle_price=waffle,
+        competitor_count=comp_count,
+        min_competitor_price=min_price,
+        median_competitor_price=median_price,
+        rank=rank,
+        inversion_delta=delta,
+        seller_stats=seller_stats,
+        fee_impact=fee_impact,
+    )
+
+
+def analyze_results_file(results_file: str) -> PriceAnalytics:
+    """결과 JSONL 파일 분석"""
+    return analyze_table(load_price_table(results_file))
+
+
+def summary_path_for(result_file_path: str) -> str:
+    """결과 파일에 대응하는 요약 JSON 경로"""
+    return os.path.splitext(result_file_path)[0] + ".summary.json"
+
+
+def save_summary(analytics: PriceAnalytics, result_file_path: str) -> str:
+    """요약 JSON을 결과 파일 옆에 저장"""
+    path = summary_path_for(result_file_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(analytics.summary(), f, ensure_ascii=False)
+    return path
+
+
+def load_summary(result_file_path: str) -> Optional[Dict]:
+    """저장된 요약 JSON 로드 (없으면 None)"""
+    path = summary_path_for(result_file_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
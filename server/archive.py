@@ -0,0 +1,360 @@
+"""가격 관측 보관 계층
+
+OBSERVATION_ARCHIVE_DAYS보다 오래된 관측을 월별 Parquet 파일(zstd 압축, 열 기반)로 옮기고
+price_observations에서 삭제한다. 파일마다 observation_archives(목록)에 기간·제품 ID·가격의
+최소/최대를 기록하고, 가격 이력 조회는 조회 범위와 겹치는 파일만 읽는다.
+최근 기간 조회는 보관 파일을 열지 않으므로 전체 이력 크기와 무관하게 빠르다.
+
+pyarrow가 없으면 보관하지 않는다 (관측은 모두 price_observations에 남는다).
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import sys
+import threading
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from server.config import get_output_dir
+from server.database import SessionLocal
+from server.models import ObservationArchive, PriceObservation
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # 보관 계층은 pyarrow가 있을 때만 사용
+    pa = None
+    pc = None
+    pq = None
+
+# 보관 파일 디렉토리
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or os.path.join(get_output_dir(), "archive")
+# 이 기간(일)보다 오래된 관측을 보관 (0이면 보관 안 함)
+OBSERVATION_ARCHIVE_DAYS = int(os.getenv("OBSERVATION_ARCHIVE_DAYS", "90"))
+# 보관 작업 실행 주기 (초)
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+# 한 번에 읽어 기록하는 관측 수 (Parquet 행 그룹 크기)
+ARCHIVE_BATCH_ROWS = int(os.getenv("ARCHIVE_BATCH_ROWS", "50000"))
+# 이 시간(초)이 지나도 writing인 목록 항목은 중단된 것으로 보고 정리
+ARCHIVE_STALE_SECONDS = 24 * 3600
+
+ARCHIVE_COLUMNS = [
+    "job_id", "site_name", "product_id", "product_name", "seller", "url",
+    "product_price", "delivery_fee", "final_price", "status", "observed_at", "canonical_id",
+]
+
+# 집계 값: [최저, 최고, 합계, 건수]
+Aggregate = List
+HistoryKey = Tuple[str, str, str, datetime]
+
+logger = logging.getLogger(__name__)
+
+
+def is_archive_available() -> bool:
+    return pq is not None and OBSERVATION_ARCHIVE_DAYS > 0
+
+
+def _archive_schema():
+    return pa.schema([
+        ("job_id", pa.int64()),
+        ("site_name", pa.string()),
+        ("product_id", pa.string()),
+        ("product_name", pa.string()),
+        ("seller", pa.string()),
+        ("url", pa.string()),
+        ("product_price", pa.int64()),
+        ("delivery_fee", pa.int64()),
+        ("final_price", pa.int64()),
+        ("status", pa.string()),
+        ("observed_at", pa.timestamp("us")),
+        ("canonical_id", pa.string()),
+    ])
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _oldest_before(db: Session, since: Optional[datetime], cutoff: datetime) -> Optional[datetime]:
+    query = db.query(func.min(PriceObservation.observed_at)).filter(PriceObservation.observed_at < cutoff)
+    if since is not None:
+        query = query.filter(PriceObservation.observed_at >= since)
+    return _naive(query.scalar())
+
+
+def _clear_stale_entries(db: Session):
+    """중단된 보관(writing) 항목과 임시 파일 정리"""
+    deadline = datetime.utcnow() - timedelta(seconds=ARCHIVE_STALE_SECONDS)
+    stale = db.query(ObservationArchive).filter(
+        ObservationArchive.status == "writing",
+        ObservationArchive.created_at < deadline
+    ).all()
+    for entry in stale:
+        for path in (entry.path, f"{entry.path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        db.delete(entry)
+    db.commit()
+
+
+def _claim_part(db: Session, month: str) -> Optional[ObservationArchive]:
+    """이번 달의 다음 보관 파일 번호 선점 (다른 프로세스가 보관 중이면 None)"""
+    completed = db.query(func.count(ObservationArchive.id)).filter(
+        ObservationArchive.month == month,
+        ObservationArchive.status == "completed"
+    ).scalar()
+    part = completed + 1
+    entry = ObservationArchive(
+        month=month,
+        part=part,
+        path=os.path.join(ARCHIVE_DIR, "price_observations", month, f"part-{part:04d}.parquet"),
+        status="writing"
+    )
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return entry
+
+
+def _archive_range(db: Session, month: str, start: datetime, end: datetime) -> int:
+    """[start, end) 관측을 보관 파일 하나로 옮기고 옮긴 건수를 반환"""
+    entry = _claim_part(db, month)
+    if entry is None:
+        return 0
+
+    columns = [getattr(PriceObservation, name) for name in ARCHIVE_COLUMNS]
+    stmt = select(PriceObservation.id, *columns).where(
+        PriceObservation.observed_at >= start,
+        PriceObservation.observed_at < end
+    ).order_by(
+        PriceObservation.product_id, PriceObservation.seller, PriceObservation.observed_at
+    ).execution_options(yield_per=ARCHIVE_BATCH_ROWS)
+
+    schema = _archive_schema()
+    tmp_path = f"{entry.path}.tmp"
+    os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+    rows = 0
+    max_id = None
+    stats = {"product_id": [None, None], "final_price": [None, None], "observed_at": [None, None]}
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for partition in db.execute(stmt).partitions():
+                batch = {name: [] for name in ARCHIVE_COLUMNS}
+                for row in partition:
+                    max_id = row[0] if max_id is None else max(max_id, row[0])
+                    for name, value in zip(ARCHIVE_COLUMNS, row[1:]):
+                        if name == "observed_at":
+                            value = _naive(value)
+                        batch[name].append(value)
+                        bounds = stats.get(name)
+                        if bounds is not None and value is not None:
+                            bounds[0] = value if bounds[0] is None else min(bounds[0], value)
+                            bounds[1] = value if bounds[1] is None else max(bounds[1], value)
+                rows += len(partition)
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+
+        if not rows:
+            os.remove(tmp_path)
+            db.delete(entry)
+            db.commit()
+            return 0
+
+        os.replace(tmp_path, entry.path)
+        # 파일 목록 갱신과 원본 삭제를 한 트랜잭션으로
+        db.query(PriceObservation).filter(
+            PriceObservation.observed_at >= start,
+            PriceObservation.observed_at < end,
+            PriceObservation.id <= max_id
+        ).delete(synchronize_session=False)
+        entry.status = "completed"
+        entry.rows = rows
+        entry.size = os.path.getsize(entry.path)
+        entry.min_product_id, entry.max_product_id = stats["product_id"]
+        entry.min_final_price, entry.max_final_price = stats["final_price"]
+        entry.min_observed_at, entry.max_observed_at = stats["observed_at"]
+        db.commit()
+    except Exception:
+        db.rollback()
+        for path in (tmp_path, entry.path):
+            if os.path.exists(path):
+                os.remove(path)
+        db.query(ObservationArchive).filter(ObservationArchive.id == entry.id).delete()
+        db.commit()
+        raise
+    logger.info("가격 관측 %d건 보관: %s", rows, entry.path)
+    return rows
+
+
+def archive_observations(db: Session, now: Optional[datetime] = None) -> int:
+    """OBSERVATION_ARCHIVE_DAYS보다 오래된 관측을 월별로 보관하고 보관한 건수를 반환"""
+    if not is_archive_available():
+        return 0
+    _clear_stale_entries(db)
+    cutoff = (now or datetime.utcnow()) - timedelta(days=OBSERVATION_ARCHIVE_DAYS)
+
+    total = 0
+    oldest = _oldest_before(db, None, cutoff)
+    while oldest is not None:
+        month_start = _month_start(oldest)
+        month_end = _next_month(month_start)
+        total += _archive_range(db, month_start.strftime("%Y-%m"), month_start, min(month_end, cutoff))
+        oldest = _oldest_before(db, month_end, cutoff)
+    return total
+
+
+def _overlapping_archives(
+    db: Session,
+    product_ids: List[str],
+    start: datetime,
+    end: datetime
+) -> List[ObservationArchive]:
+    """조회 기간·제품 ID 범위가 겹치는 보관 파일"""
+    entries = db.query(ObservationArchive).filter(
+        ObservationArchive.status == "completed",
+        ObservationArchive.min_observed_at < end,
+        ObservationArchive.max_observed_at >= start
+    ).order_by(ObservationArchive.id).all()
+    return [
+        entry for entry in entries
+        if any(entry.min_product_id <= product_id <= entry.max_product_id for product_id in product_ids)
+    ]
+
+
+def archived_history(
+    db: Session,
+    product_ids: Iterable[str],
+    interval: str,
+    start: datetime,
+    end: datetime,
+    site_name: Optional[str] = None,
+    seller: Optional[str] = None,
+    canonical_id: Optional[str] = None
+) -> Dict[HistoryKey, Aggregate]:
+    """보관 파일의 (제품, 판매처, 사이트, 구간)별 [최저, 최고, 합계, 건수]
+
+    canonical_id를 지정하면 정규 ID가 기록되기 전에 만든 보관 파일은 건너뛴다.
+    """
+    if pq is None:
+        return {}
+    product_ids = [str(product_id) for product_id in product_ids]
+    entries = _overlapping_archives(db, product_ids, start, end)
+    if not entries:
+        return {}
+
+    filters = [
+        ("product_id", "in", product_ids),
+        ("observed_at", ">=", start),
+        ("observed_at", "<", end),
+    ]
+    if site_name:
+        filters.append(("site_name", "=", site_name))
+    if seller:
+        filters.append(("seller", "=", seller))
+    if canonical_id:
+        filters.append(("canonical_id", "=", canonical_id))
+
+    result: Dict[HistoryKey, Aggregate] = {}
+    for entry in entries:
+        try:
+            if canonical_id and "canonical_id" not in pq.read_schema(entry.path).names:
+                continue
+            table = pq.read_table(
+                entry.path,
+                columns=["product_id", "seller", "site_name", "final_price", "observed_at"],
+                filters=filters
+            )
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("보관 파일을 읽을 수 없습니다 %s: %s", entry.path, e)
+            continue
+        table = table.filter(pc.is_valid(table["final_price"]))
+        if not table.num_rows:
+            continue
+        table = table.append_column("bucket", pc.floor_temporal(table["observed_at"], unit=interval))
+        grouped = table.group_by(["product_id", "seller", "site_name", "bucket"]).aggregate([
+            ("final_price", "min"), ("final_price", "max"), ("final_price", "sum"), ("final_price", "count"),
+        ]).to_pydict()
+        for values in zip(
+            grouped["product_id"], grouped["seller"], grouped["site_name"], grouped["bucket"],
+            grouped["final_price_min"], grouped["final_price_max"],
+            grouped["final_price_sum"], grouped["final_price_count"]
+        ):
+            merge_aggregate(result, tuple(values[:4]), list(values[4:]))
+    return result
+
+
+def merge_aggregate(result: Dict[HistoryKey, Aggregate], key: HistoryKey, value: Aggregate):
+    """같은 구간의 집계 합치기"""
+    current = result.get(key)
+    if current is None:
+        result[key] = value
+        return
+    current[0] = min(current[0], value[0])
+    current[1] = max(current[1], value[1])
+    current[2] += value[2]
+    current[3] += value[3]
+
+
+class ObservationArchiver(threading.Thread):
+    """주기적으로 오래된 관측을 보관하는 백그라운드 스레드"""
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL):
+        super().__init__(name="observation-archiver", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            db = SessionLocal()
+            try:
+                archive_observations(db)
+            except Exception as e:
+                logger.warning("가격 관측 보관 실패: %s", e)
+            finally:
+                db.close()
+            if self._stop_event.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+
+_archiver: Optional[ObservationArchiver] = None
+
+
+def start_archiver():
+    """보관 스레드 시작 (pyarrow가 없거나 보관 기간이 0이면 시작하지 않음)"""
+    global _archiver
+    if _archiver is None and is_archive_available():
+        _archiver = ObservationArchiver()
+        _archiver.start()
+
+
+def stop_archiver():
+    """보관 스레드 종료"""
+    global _archiver
+    if _archiver is not None:
+        _archiver.stop()
+        _archiver = None
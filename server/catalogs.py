@@ -0,0 +1,465 @@
+"""크롤링 입력 카탈로그 버전 관리
+
+카탈로그(JSONL 또는 가격조사 엑셀)는 업로드할 때 한 번만 파싱·검증해 정규화한 JSONL로
+저장하고, 사이트별로 버전을 붙여 catalogs 테이블에 기록한다. 내용 해시가 직전 버전과 같으면
+새 버전을 만들지 않는다.
+
+새 버전을 저장할 때 (제품, 판매처)별 URL을 사이트별 정규 ID(crawler.canonical_url)로 바꿔
+catalog_entries에 함께 기록하므로, 정규 ID로 그 상품을 참조하는 카탈로그 행을 찾을 수 있다.
+
+파싱된 제품 목록은 버전(catalog id)별로 메모리에 캐시하므로 작업 시작과 실행 시
+파일을 다시 읽지 않는다. 업로드된 카탈로그가 없는 사이트는 데이터 폴더의
+{site}_input_list.jsonl을 처음 한 번 가져온다.
+"""
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import logging
+
+import openpyxl
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.config import get_data_dir, get_output_dir
+from server.database import SessionLocal
+from server.models import Catalog, CatalogEntry
+from make_jsonl import CatalogFormatError, iter_sheet_products
+from crawler import canonical_url
+
+# 정규화한 카탈로그 저장 폴더 ({사이트}/{내용 해시}.jsonl)
+CATALOG_DIR = os.getenv("CATALOG_DIR") or os.path.join(get_output_dir(), "catalogs")
+# 메모리에 캐시할 카탈로그 버전 수
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "8"))
+# 검증 오류 메시지를 최대 몇 개까지 돌려줄지
+MAX_VALIDATION_ERRORS = 20
+
+CATALOG_FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".xlsx": "xlsx"}
+DATA_FILE_SUFFIX = "_input_list.jsonl"
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogValidationError(ValueError):
+    """카탈로그 내용이 형식에 맞지 않는 경우 (errors: 행별 오류 메시지)"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def _is_url(value) -> bool:
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def _check_product(product, errors: List[str], where: str) -> Optional[Dict]:
+    """제품 하나 검증 후 정규화 (product_id, product_name, waffle, competitors 순)"""
+    if not isinstance(product, dict):
+        errors.append(f"{where}: 제품은 JSON 객체여야 합니다.")
+        return None
+
+    normalized = {}
+    product_id = product.get("product_id")
+    if isinstance(product_id, bool) or not isinstance(product_id, (int, str)) or product_id == "":
+        errors.append(f"{where}: product_id가 없습니다.")
+        return None
+    normalized["product_id"] = product_id
+
+    name = product.get("product_name")
+    if not isinstance(name, str) or not name.strip():
+        errors.append(f"{where}: product_name이 없습니다.")
+        return None
+    normalized["product_name"] = name
+
+    if "waffle" in product:
+        waffle = product["waffle"]
+        url = waffle.get("url") if isinstance(waffle, dict) else None
+        if url is not None and not _is_url(url):
+            errors.append(f"{where}: waffle URL이 올바르지 않습니다: {url}")
+            return None
+        normalized["waffle"] = {"url": url}
+
+    competitors = product.get("competitors", [])
+    if not isinstance(competitors, list):
+        errors.append(f"{where}: competitors는 목록이어야 합니다.")
+        return None
+    normalized["competitors"] = []
+    for competitor in competitors:
+        seller = competitor.get("name") if isinstance(competitor, dict) else None
+        if seller is None or not str(seller).strip():
+            errors.append(f"{where}: 경쟁사 이름이 없습니다.")
+            return None
+        url = competitor.get("url")
+        if url is not None and not _is_url(url):
+            errors.append(f"{where}: {seller} URL이 올바르지 않습니다: {url}")
+            return None
+        normalized["competitors"].append({"name": str(seller), "url": url})
+    return normalized
+
+
+def validate_products(products, errors: Optional[List[str]] = None) -> List[Dict]:
+    """(위치, 제품) 목록을 검증하고 정규화한 제품 목록을 반환 (오류가 있으면 CatalogValidationError)"""
+    errors = list(errors or [])
+    normalized: List[Dict] = []
+    seen: Dict[str, str] = {}
+    for where, product in products:
+        checked = _check_product(product, errors, where)
+        if checked is not None:
+            key = str(checked["product_id"])
+            if key in seen:
+                errors.append(f"{where}: product_id {key}가 {seen[key]}과 중복됩니다.")
+            else:
+                seen[key] = where
+                normalized.append(checked)
+        if len(errors) >= MAX_VALIDATION_ERRORS:
+            break
+
+    if not errors and not normalized:
+        errors.append("제품이 없습니다.")
+    if errors:
+        raise CatalogValidationError(errors)
+    return normalized
+
+
+def parse_jsonl(content: bytes) -> List[Dict]:
+    """JSONL 카탈로그 파싱·검증"""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise CatalogValidationError(["UTF-8 텍스트가 아닙니다."])
+
+    products, errors = [], []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            products.append((f"{line_no}행", json.loads(line)))
+        except json.JSONDecodeError as e:
+            errors.append(f"{line_no}행: JSON 형식이 아닙니다 ({e.msg})")
+    return validate_products(products, errors[:MAX_VALIDATION_ERRORS])
+
+
+def parse_excel(content: bytes, sheet_name: Optional[str] = None) -> List[Dict]:
+    """가격조사 엑셀 시트 파싱·검증 (시트를 지정하지 않으면 첫 시트)"""
+    try:
+        wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    except Exception as e:
+        raise CatalogValidationError([f"엑셀 파일을 열 수 없습니다: {e}"])
+    try:
+        if sheet_name is None:
+            sheet_name = wb.sheetnames[0]
+        elif sheet_name not in wb.sheetnames:
+            raise CatalogValidationError([f"{sheet_name} 시트가 없습니다."])
+        # 빈 행은 건너뛰므로 위치는 제품 순번으로 표시
+        rows = (
+            (f"{sheet_name} 시트 {idx}번째 제품", product)
+            for idx, product in enumerate(iter_sheet_products(wb[sheet_name]), start=1)
+        )
+        return validate_products(rows)
+    except CatalogFormatError as e:
+        raise CatalogValidationError([f"{sheet_name} 시트: {e}"])
+    finally:
+        wb.close()
+
+
+def parse_catalog(content: bytes, fmt: str, sheet_name: Optional[str] = None) -> List[Dict]:
+    """업로드 형식(jsonl, xlsx)에 맞게 파싱·검증"""
+    if fmt == "xlsx":
+        return parse_excel(content, sheet_name)
+    return parse_jsonl(content)
+
+
+def catalog_format(filename: str) -> Optional[str]:
+    """파일 이름 확장자로 카탈로그 형식 판단 (지원하지 않으면 None)"""
+    return CATALOG_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def serialize_products(products: List[Dict]) -> bytes:
+    """정규화한 JSONL 내용 (내용 해시의 기준)"""
+    return b"".join(
+        json.dumps(product, ensure_ascii=False).encode("utf-8") + b"\n" for product in products
+    )
+
+
+def product_urls(product: Dict):
+    """제품의 (판매처, URL) 목록 (waffle 먼저)"""
+    if "waffle" in product:
+        yield "waffle", product["waffle"].get("url")
+    for competitor in product.get("competitors", []):
+        yield competitor["name"], competitor.get("url")
+
+
+def catalog_entry_rows(catalog_id: int, products: List[Dict]) -> List[Dict]:
+    """카탈로그의 (제품, 판매처) 행과 URL 정규 ID"""
+    rows = []
+    for product in products:
+        for seller, url in product_urls(product):
+            rows.append({
+                "catalog_id": catalog_id,
+                "product_id": str(product["product_id"]),
+                "seller": seller,
+                "url": url,
+                "canonical_id": canonical_url(url)[0] if url else None,
+            })
+    return rows
+
+
+class EntryChange(NamedTuple):
+    """두 카탈로그 버전 사이에서 바뀐 (제품, 판매처) 행"""
+    product_id: str
+    seller: str
+    url: Optional[str]
+    previous_url: Optional[str]
+
+
+class CatalogDiff(NamedTuple):
+    added: List[EntryChange]
+    changed: List[EntryChange]  # 정규 ID가 바뀐 행 (추적용 쿼리만 바뀐 URL은 같은 상품)
+    removed: List[EntryChange]
+
+
+def _entry_keys(products) -> "OrderedDict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]":
+    """(제품 ID, 판매처) -> (URL, 비교 키)"""
+    entries: "OrderedDict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]" = OrderedDict()
+    for product in products:
+        for seller, url in product_urls(product):
+            entries[(str(product["product_id"]), seller)] = (url, canonical_url(url)[0] if url else None)
+    return entries
+
+
+def diff_products(base_products, products) -> CatalogDiff:
+    """이전 버전 대비 추가·변경·삭제된 (제품, 판매처) 행"""
+    before = _entry_keys(base_products)
+    after = _entry_keys(products)
+    diff = CatalogDiff([], [], [])
+    for key, (url, canonical) in after.items():
+        previous = before.get(key)
+        if previous is None:
+            diff.added.append(EntryChange(key[0], key[1], url, None))
+        elif previous[1] != canonical:
+            diff.changed.append(EntryChange(key[0], key[1], url, previous[0]))
+    for key, (url, _) in before.items():
+        if key not in after:
+            diff.removed.append(EntryChange(key[0], key[1], None, url))
+    return diff
+
+
+def previous_catalog(db: Session, catalog: Catalog) -> Optional[Catalog]:
+    """같은 사이트의 바로 이전 버전"""
+    return db.query(Catalog).filter(
+        Catalog.site_name == catalog.site_name,
+        Catalog.version < catalog.version
+    ).order_by(Catalog.version.desc()).first()
+
+
+def diff_catalogs(base: Optional[Catalog], catalog: Catalog) -> CatalogDiff:
+    """두 카탈로그 버전의 차이 (base가 없으면 모든 행이 추가)"""
+    base_products = catalog_cache.get(base) if base is not None else ()
+    return diff_products(base_products, catalog_cache.get(catalog))
+
+
+def _write_catalog_file(site_name: str, content: bytes, content_hash: str) -> str:
+    path = os.path.join(CATALOG_DIR, site_name, f"{content_hash}.jsonl")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return os.path.abspath(path)
+
+
+def latest_catalog(db: Session, site_name: str) -> Optional[Catalog]:
+    """사이트의 최신 카탈로그 버전"""
+    return db.query(Catalog).filter(
+        Catalog.site_name == site_name
+    ).order_by(Catalog.version.desc()).first()
+
+
+def get_catalog(db: Session, site_name: str, version: Optional[int] = None) -> Optional[Catalog]:
+    """사이트의 지정한 카탈로그 버전 (version이 없으면 최신)"""
+    if version is None:
+        return latest_catalog(db, site_name)
+    return db.query(Catalog).filter(
+        Catalog.site_name == site_name,
+        Catalog.version == version
+    ).first()
+
+
+def store_catalog(
+    db: Session,
+    site_name: str,
+    products: List[Dict],
+    source_name: Optional[str] = None,
+    source_format: str = "jsonl",
+    uploaded_by: Optional[int] = None
+) -> Tuple[Catalog, bool]:
+    """검증된 제품 목록을 새 카탈로그 버전으로 저장
+
+    (카탈로그, 새 버전 여부)를 반환한다. 내용이 최신 버전과 같으면 최신 버전을 그대로 돌려준다.
+    """
+    content = serialize_products(products)
+    content_hash = hashlib.sha256(content).hexdigest()
+    file_path = _write_catalog_file(site_name, content, content_hash)
+
+    for _ in range(3):
+        latest = latest_catalog(db, site_name)
+        if latest and latest.content_hash == content_hash:
+            catalog_cache.put(latest.id, products)
+            return latest, False
+
+        diff = diff_products(catalog_cache.get(latest), products) if latest else None
+        catalog = Catalog(
+            site_name=site_name,
+            version=(latest.version if latest else 0) + 1,
+            content_hash=content_hash,
+            file_path=file_path,
+            product_count=len(products),
+            source_name=source_name,
+            source_format=source_format,
+            uploaded_by=uploaded_by,
+            base_version=latest.version if latest else None,
+            added_entries=len(diff.added) if diff else None,
+            changed_entries=len(diff.changed) if diff else None,
+            removed_entries=len(diff.removed) if diff else None
+        )
+        db.add(catalog)
+        try:
+            db.flush()
+            db.execute(insert(CatalogEntry), catalog_entry_rows(catalog.id, products))
+            db.commit()
+        except IntegrityError:
+            # 같은 사이트에 동시에 업로드되어 버전 번호가 겹침
+            db.rollback()
+            continue
+        db.refresh(catalog)
+        catalog_cache.put(catalog.id, products)
+        logger.info("카탈로그 %s v%s 저장 (%s개 제품)", site_name, catalog.version, len(products))
+        return catalog, True
+    raise RuntimeError(f"{site_name} 카탈로그 버전을 저장하지 못했습니다.")
+
+
+def ensure_catalog_entries(db: Session, catalog: Catalog):
+    """색인이 없는 (색인 도입 전에 저장한) 카탈로그 버전의 행 기록"""
+    if db.query(CatalogEntry.id).filter(CatalogEntry.catalog_id == catalog.id).first() is not None:
+        return
+    db.execute(insert(CatalogEntry), catalog_entry_rows(catalog.id, list(catalog_cache.get(catalog))))
+    db.commit()
+
+
+def url_index(
+    db: Session,
+    catalog: Catalog,
+    canonical_id: Optional[str] = None,
+    shared_only: bool = False
+) -> "OrderedDict[str, List[CatalogEntry]]":
+    """정규 ID -> 참조하는 카탈로그 행 (shared_only면 두 행 이상이 참조하는 ID만)"""
+    ensure_catalog_entries(db, catalog)
+    query = db.query(CatalogEntry).filter(
+        CatalogEntry.catalog_id == catalog.id,
+        CatalogEntry.canonical_id.isnot(None)
+    )
+    if canonical_id:
+        query = query.filter(CatalogEntry.canonical_id == canonical_id)
+    if shared_only:
+        shared = db.query(CatalogEntry.canonical_id).filter(
+            CatalogEntry.catalog_id == catalog.id,
+            CatalogEntry.canonical_id.isnot(None)
+        ).group_by(CatalogEntry.canonical_id).having(func.count(CatalogEntry.id) > 1)
+        query = query.filter(CatalogEntry.canonical_id.in_(shared))
+
+    index: "OrderedDict[str, List[CatalogEntry]]" = OrderedDict()
+    for entry in query.order_by(CatalogEntry.canonical_id, CatalogEntry.id):
+        index.setdefault(entry.canonical_id, []).append(entry)
+    return index
+
+
+def find_data_file(site_name: str) -> Tuple[Optional[str], List[str]]:
+    """데이터 폴더의 {site}_input_list.jsonl 위치와 확인한 경로 목록"""
+    filename = f"{site_name}{DATA_FILE_SUFFIX}"
+    base_dir = os.path.dirname(__file__)
+    search_paths = [
+        os.path.join(get_data_dir(), filename),
+        os.path.join(os.getcwd(), filename),
+        os.path.join(base_dir, "data", filename),
+        os.path.join(os.path.dirname(base_dir), "data", filename),
+    ]
+    found = next((os.path.abspath(p) for p in search_paths if os.path.exists(p)), None)
+    return found, search_paths
+
+
+def import_data_file(db: Session, site_name: str, path: str) -> Catalog:
+    """데이터 폴더의 입력 파일을 카탈로그 버전으로 가져오기"""
+    with open(path, "rb") as f:
+        products = parse_jsonl(f.read())
+    catalog, _ = store_catalog(
+        db, site_name, products, source_name=os.path.basename(path), source_format="file"
+    )
+    return catalog
+
+
+class CatalogCache:
+    """카탈로그 버전(catalog id)별 파싱된 제품 목록 (LRU)
+
+    저장된 카탈로그는 바뀌지 않으므로 무효화가 필요 없다. 캐시에 없으면
+    (다른 프로세스가 저장한 버전 등) 정규화된 파일을 검증 없이 읽어 채운다.
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[int, Tuple[Dict, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, catalog_id: int, products: List[Dict]) -> Tuple[Dict, ...]:
+        products = tuple(products)
+        with self._lock:
+            self._entries[catalog_id] = products
+            self._entries.move_to_end(catalog_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return products
+
+    def get(self, catalog: Catalog) -> Tuple[Dict, ...]:
+        """카탈로그 버전의 제품 목록 (읽기 전용으로 사용)"""
+        with self._lock:
+            products = self._entries.get(catalog.id)
+            if products is not None:
+                self._entries.move_to_end(catalog.id)
+                return products
+
+        with open(catalog.file_path, "r", encoding="utf-8") as f:
+            products = [json.loads(line) for line in f if line.strip()]
+        return self.put(catalog.id, products)
+
+    def get_by_id(self, catalog_id: int) -> Optional[Tuple[Dict, ...]]:
+        """catalog id로 제품 목록 조회 (DB 조회는 캐시에 없을 때만)"""
+        with self._lock:
+            products = self._entries.get(catalog_id)
+            if products is not None:
+                self._entries.move_to_end(catalog_id)
+                return products
+
+        db = SessionLocal()
+        try:
+            catalog = db.query(Catalog).filter(Catalog.id == catalog_id).first()
+            return self.get(catalog) if catalog else None
+        finally:
+            db.close()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 이 프로세스의 카탈로그 캐시
+catalog_cache = CatalogCache()
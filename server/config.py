@@ -1,7 +1,11 @@
 """서버 설정"""
 import os
+import socket
 from pathlib import Path
 
+# 이 서버 프로세스의 식별자 (작업·내보내기 선점 기록용)
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
 
 def get_project_root():
     """프로젝트 루트 경로 반환"""
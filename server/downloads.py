@@ -0,0 +1,159 @@
+"""파일 다운로드 응답 (ETag / Last-Modified / Range)
+
+If-None-Match·If-Modified-Since 조건부 요청에는 304를, 단일 Range 요청에는 206을
+돌려준다. 파일은 고정 크기 청크로 읽어 보내므로 메모리에 통째로 올리지 않는다.
+"""
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+import os
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+# 다운로드 청크 크기 (바이트)
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match / If-Range 값이 ETag와 일치하는지 (약한 비교)"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 bytes 범위 -> (시작, 끝) (끝 포함)
+
+    형식이 잘못됐거나 여러 범위면 None(전체 전송), 만족할 수 없으면 ValueError.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, sep, end_text = spec.strip().partition("-")
+    start_text, end_text = start_text.strip(), end_text.strip()
+    if not sep or not all(text.isdigit() for text in (start_text, end_text) if text):
+        return None
+
+    if not start_text:
+        # bytes=-N: 마지막 N바이트
+        if not end_text or int(end_text) == 0 or size == 0:
+            raise ValueError("범위를 만족할 수 없음")
+        return max(0, size - int(end_text)), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("범위를 만족할 수 없음")
+    return start, min(end, size - 1)
+
+
+def bytes_response(content: bytes, media_type: str, filename: str) -> Response:
+    """메모리에서 만든 작은 파일 응답 (첨부 파일명 포함)"""
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": _content_disposition(filename), "Cache-Control": "no-store"}
+    )
+
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    size: Optional[int] = None
+) -> Response:
+    """조건부 요청과 Range를 지원하는 파일 응답"""
+    stat = os.stat(path)
+    size = stat.st_size if size is None else size
+    if last_modified is None:
+        last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    elif last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    quoted_etag = f'"{etag}"' if etag else None
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Last-Modified": formatdate(last_modified.timestamp(), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if quoted_etag:
+        headers["ETag"] = quoted_etag
+
+    # 조건부 요청 (If-None-Match가 있으면 If-Modified-Since보다 우선)
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if quoted_etag and _etag_matches(if_none_match, quoted_etag):
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since and _not_modified_since(if_modified_since, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(filename)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header:
+        # If-Range가 현재 버전과 다르면 전체 전송
+        if_range = request.headers.get("if-range")
+        if if_range is None or (quoted_etag and if_range.strip() == quoted_etag) or (
+            not if_range.strip().startswith(('"', "W/")) and _not_modified_since(if_range, last_modified)
+        ):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "Content-Range": f"bytes */{size}"}
+                )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _iter_file(path, start, length), status_code=206, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,96 @@
+"""예상 작업 시간 기반 제품 제출 순서
+
+제품 작업 하나는 판매처 URL을 차례로 요청하므로 작업 시간은 URL별 요청 시간(재시도·백오프 포함)과
+요청 사이 대기 시간의 합이다. 최근 TASK_DURATION_WINDOW_DAYS일 관측의 상품 정규 ID별 평균 요청
+시간으로 제품마다 예상 작업 시간을 추정해 긴 작업부터 제출한다(LPT). 동시 요청 수가 정해져 있을 때
+긴 작업이 마지막에 홀로 남는 꼬리가 줄어 전체 작업 시간이 짧아진다.
+
+- 요청 시간 기록이 없는 URL은 기록이 있는 URL의 중앙값으로 추정하고, 사이트에 기록이 전혀 없으면
+  카탈로그 순서(예약 작업은 섞은 순서)를 그대로 쓴다.
+- 재시도 비율은 따로 추정하지 않는다. fetch_ms는 한 URL의 첫 요청부터 재시도·백오프를 모두 거친
+  마지막 응답까지의 시간이므로, 자주 재시도되는 URL은 평균 요청 시간이 그만큼 길게 잡힌다.
+- 제품 작업은 판매처 URL의 호스트 여러 곳을 요청하므로, 호스트 집합이 겹치는 작업이 연달아
+  제출되지 않도록 호스트 집합별 대기열을 번갈아 꺼낸다.
+- 예약 작업은 예상 시간이 TASK_DURATION_BUCKET_RATIO배 안쪽인 구간마다 순서를 실행별로 섞는다.
+  긴 구간부터 제출하는 순서는 유지하면서 같은 상품 페이지에 요청이 몰리는 시각을 흩뜨린다.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional
+from urllib.parse import urlsplit
+import os
+import statistics
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from server.catalogs import product_urls
+from server.models import PriceObservation
+from server.scheduler import longest_first_order, spread_task_order
+from crawler import REQUEST_DELAY, canonical_url
+
+# 요청 시간을 평균하는 최근 기간 (일)
+TASK_DURATION_WINDOW_DAYS = int(os.getenv("TASK_DURATION_WINDOW_DAYS", "14"))
+# 제품 제출 순서 (longest: 예상 시간이 긴 제품부터, catalog: 카탈로그 순서)
+CRAWL_TASK_ORDER = os.getenv("CRAWL_TASK_ORDER", "longest")
+# 예약 작업에서 순서를 섞는 예상 시간 구간의 배율 (1이면 예상 시간이 같은 제품끼리만 섞음)
+TASK_DURATION_BUCKET_RATIO = float(os.getenv("TASK_DURATION_BUCKET_RATIO", "1.25"))
+
+
+def url_durations(db: Session, site_name: str, now: Optional[datetime] = None) -> Dict[str, float]:
+    """최근 관측의 상품 정규 ID별 평균 요청 시간 (초, 요청을 공유한 관측은 제외)"""
+    since = (now or datetime.utcnow()) - timedelta(days=TASK_DURATION_WINDOW_DAYS)
+    rows = db.query(
+        PriceObservation.canonical_id, func.avg(PriceObservation.fetch_ms)
+    ).filter(
+        PriceObservation.site_name == site_name,
+        PriceObservation.observed_at >= since,
+        PriceObservation.canonical_id.isnot(None),
+        PriceObservation.fetch_ms.isnot(None)
+    ).group_by(PriceObservation.canonical_id)
+    return {canonical_id: float(avg_ms) / 1000 for canonical_id, avg_ms in rows}
+
+
+def product_hosts(product: Dict) -> FrozenSet[str]:
+    """제품 작업이 요청하는 호스트 전체"""
+    return frozenset(urlsplit(url).netloc.lower() for _, url in product_urls(product) if url)
+
+
+def expected_durations(
+    products: List[Dict],
+    durations: Dict[str, float],
+    delay: float = sum(REQUEST_DELAY) / 2
+) -> List[float]:
+    """제품별 예상 작업 시간 (초, URL별 평균 요청 시간 + 요청 사이 평균 대기 시간 delay)"""
+    default = statistics.median(durations.values()) if durations else 0.0
+    expected = []
+    for product in products:
+        total = 0.0
+        for _, url in product_urls(product):
+            if url:
+                total += durations.get(canonical_url(url)[0], default) + delay
+        expected.append(total)
+    return expected
+
+
+def crawl_task_order(
+    durations: Dict[str, float],
+    seed: Optional[str] = None
+) -> Optional[Callable[[List[Dict]], List[int]]]:
+    """크롤러의 task_order (요청 시간 기록이 없으면 seed로 섞은 순서, seed도 없으면 None)"""
+    if CRAWL_TASK_ORDER != "longest" or not durations:
+        return spread_task_order(seed) if seed is not None else None
+
+    def order(products: List[Dict]) -> List[int]:
+        return longest_first_order(
+            expected_durations(products, durations),
+            [product_hosts(product) for product in products],
+            seed,
+            TASK_DURATION_BUCKET_RATIO
+        )
+    return order
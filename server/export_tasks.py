@@ -0,0 +1,430 @@
+"""결과 내보내기 작업 실행기
+
+크롤링이 끝나면 형식별 내보내기 작업(export_tasks)을 대기열에 넣고 곧바로 작업 슬롯을
+반환한다. 디스패처 스레드가 대기 작업을 조건부 UPDATE로 선점해 프로세스 풀에서
+실행하므로 여러 형식이 병렬로 생성되고, openpyxl 변환이 API 프로세스의 GIL을
+점유하지 않는다.
+
+- Excel(xlsx)이 완료되면 크롤링 작업이 exporting -> completed로 바뀐다.
+- 모든 형식이 끝나면 원본 결과 JSONL(과 색인)을 삭제한다.
+- 선점한 작업을 제출하지 못하면(종료 중, 프로세스 풀 오류) 바로 대기열로 되돌린다.
+  내보내기 프로세스가 비정상 종료돼 풀이 깨지면 풀을 새로 만든다.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from server.config import WORKER_ID
+from server.database import SessionLocal
+from server.models import CrawlingJob, ExportTask
+from server.exports import enabled_export_formats, export_path, store_export, write_export
+from server.progress import PROGRESS_FLUSH_INTERVAL
+from crawler import remove_results_file
+
+# 동시에 실행되는 내보내기 프로세스 수
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+# 실행 중인 내보내기를 실패로 처리하는 시간 (초, 프로세스가 중단된 경우)
+EXPORT_TASK_TIMEOUT = int(os.getenv("EXPORT_TASK_TIMEOUT", "1800"))
+# 대기열 확인 주기 (초)
+EXPORT_POLL_INTERVAL = float(os.getenv("EXPORT_POLL_INTERVAL", os.getenv("JOB_POLL_INTERVAL", "2")))
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+logger = logging.getLogger(__name__)
+
+
+class _ExportProgress:
+    """내보내기 진행률을 일정 주기로 DB에 기록 (프로세스 풀 안에서 사용)"""
+
+    def __init__(self, task_id: int, total: int, interval: float = PROGRESS_FLUSH_INTERVAL):
+        self.task_id = task_id
+        self.total = max(total, 1)
+        self.interval = interval
+        self._last_write = time.monotonic()
+
+    def __call__(self, count: int):
+        now = time.monotonic()
+        if now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        db = SessionLocal()
+        try:
+            db.query(ExportTask).filter(
+                ExportTask.id == self.task_id,
+                ExportTask.status == "running"
+            ).update(
+                {"progress": min(99, int(count / self.total * 100))},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning("내보내기 %s 진행률 기록 실패: %s", self.task_id, e)
+        finally:
+            db.close()
+
+
+def run_export_task(task_id: int, fmt: str, results_file: str, file_path: str, total: int) -> Dict:
+    """내보내기 실행 (프로세스 풀 워커에서 호출)
+
+    생성된 파일은 내용 해시 저장소에 보관하고, 기록한 행 수와 저장 정보를 반환한다.
+    """
+    rows = write_export(results_file, fmt, file_path, on_product=_ExportProgress(task_id, total))
+    result = {"rows_written": rows}
+    if os.path.exists(file_path):
+        stored = store_export(file_path, fmt)
+        result.update({
+            "content_hash": stored.content_hash,
+            "stored_path": stored.stored_path,
+            "size": stored.size
+        })
+    return result
+
+
+def schedule_exports(
+    db: Session,
+    job_id: int,
+    results_file: str,
+    excel_file: str,
+    total_products: int
+) -> List[ExportTask]:
+    """크롤링 결과의 형식별 내보내기 작업 등록 (Excel은 항상 포함)
+
+    작업에 같은 파일의 내보내기가 이미 있으면(재시도 결과를 원래 작업에 합친 경우) 그 행을
+    새 결과 파일로 다시 대기시킨다. 끝난 내보내기만 다시 대기시킬 수 있으며, 새 파일이
+    완성되면 내용 해시(ETag)가 바뀐다.
+    """
+    existing = {
+        task.file_path: task
+        for task in db.query(ExportTask).filter(ExportTask.job_id == job_id)
+    }
+    tasks = []
+    for fmt in ["xlsx"] + enabled_export_formats():
+        file_path = export_path(excel_file, fmt)
+        task = existing.get(file_path)
+        if task is None:
+            task = ExportTask(job_id=job_id, format=fmt, file_path=file_path)
+            db.add(task)
+        task.status = "pending"
+        task.progress = 0
+        task.total_products = total_products
+        task.results_file = results_file
+        task.rows_written = None
+        task.error_message = None
+        task.worker_id = None
+        task.started_at = None
+        task.completed_at = None
+        tasks.append(task)
+    db.commit()
+    export_executor.poke()
+    return tasks
+
+
+def find_export(db: Session, file_path: str) -> Optional[ExportTask]:
+    """파일 경로로 가장 최근 내보내기 작업 조회"""
+    return db.query(ExportTask).filter(
+        ExportTask.file_path == file_path
+    ).order_by(ExportTask.id.desc()).first()
+
+
+def job_exports(db: Session, job: CrawlingJob) -> List[ExportTask]:
+    """작업(또는 결과를 공유하는 리더 작업)의 내보내기 목록"""
+    if not job.result_file_path:
+        return []
+    leader_id = job.coalesced_into_id or job.id
+    tasks = db.query(ExportTask).filter(ExportTask.job_id == leader_id).order_by(ExportTask.id).all()
+    if tasks:
+        return tasks
+    # 최근 결과를 재사용한 작업은 원본 결과 파일 기준으로 조회
+    excel_task = find_export(db, job.result_file_path)
+    if not excel_task:
+        return []
+    return db.query(ExportTask).filter(
+        ExportTask.job_id == excel_task.job_id
+    ).order_by(ExportTask.id).all()
+
+
+def source_job_id(db: Session, job: CrawlingJob) -> int:
+    """작업 결과를 실제로 만든 크롤링(리더) 작업 ID (합류·최근 결과 재사용 포함)
+
+    원래 작업의 결과 파일로 다시 내보낸 재시도 작업은 재시도 작업 자신이다.
+    """
+    if job.coalesced_into_id:
+        return job.coalesced_into_id
+    if job.result_file_path and job.scope != "retry":
+        excel_task = find_export(db, job.result_file_path)
+        if excel_task:
+            return excel_task.job_id
+    return job.id
+
+
+def exports_finished(tasks: List[ExportTask]) -> bool:
+    """내보내기가 모두 끝났는지 (완료 또는 실패)"""
+    return all(task.status in TERMINAL_STATUSES for task in tasks)
+
+
+def _export_members(db: Session, task: ExportTask):
+    """내보내기를 기다리는 크롤링 작업 조회 쿼리
+
+    리더와 합류 작업, 그리고 결과를 이 파일로 다시 내보내는 재시도 작업
+    """
+    return db.query(CrawlingJob).filter(
+        or_(
+            CrawlingJob.id == task.job_id,
+            CrawlingJob.coalesced_into_id == task.job_id,
+            CrawlingJob.result_file_path == task.file_path
+        ),
+        CrawlingJob.status == "exporting"
+    )
+
+
+def _finish_task(db: Session, task: ExportTask, result: Optional[Dict], error: Optional[str]):
+    """내보내기 결과 반영 후 크롤링 작업 상태와 원본 결과 파일 정리"""
+    now = datetime.utcnow()
+    values = {"completed_at": now}
+    if error is None:
+        values.update({"status": "completed", "progress": 100, **result})
+    else:
+        values.update({"status": "failed", "error_message": error})
+    db.query(ExportTask).filter(
+        ExportTask.id == task.id,
+        ExportTask.status == "running"
+    ).update(values, synchronize_session=False)
+
+    # Excel 결과가 준비되면 크롤링 작업 완료 처리
+    if task.format == "xlsx":
+        if error is None:
+            _export_members(db, task).update({
+                "status": "completed",
+                "result_file_path": task.file_path if result.get("stored_path") else None,
+                "completed_at": now
+            }, synchronize_session=False)
+        else:
+            _export_members(db, task).update({
+                "status": "failed",
+                "error_message": f"Excel 변환 실패: {error}",
+                "completed_at": now
+            }, synchronize_session=False)
+    db.commit()
+
+    remaining = db.query(ExportTask).filter(
+        ExportTask.results_file == task.results_file,
+        ExportTask.status.notin_(TERMINAL_STATUSES)
+    ).count()
+    if not remaining:
+        try:
+            remove_results_file(task.results_file)
+        except OSError as e:
+            logger.warning("결과 파일 삭제 실패 %s: %s", task.results_file, e)
+
+
+class ExportExecutor:
+    """DB 대기열의 내보내기 작업을 프로세스 풀에서 실행"""
+
+    def __init__(self, workers: int = EXPORT_WORKERS):
+        self.worker_id = WORKER_ID
+        self.workers = max(1, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[int, Future] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self):
+        """프로세스 풀과 디스패처 스레드 시작"""
+        with self._cond:
+            if self._thread:
+                return
+            self._stopping = False
+            self._pool = self._new_pool()
+            self._thread = threading.Thread(
+                target=self._dispatch_loop, name="export-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # 스레드가 떠 있는 서버 프로세스를 fork하지 않도록 spawn 사용
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_broken_pool(self, pool: ProcessPoolExecutor):
+        """깨진 프로세스 풀을 새로 만듦 (이미 교체됐거나 종료 중이면 그대로, _cond 안에서 호출)"""
+        if pool is None or self._stopping or self._pool is not pool:
+            return
+        logger.warning("내보내기 프로세스 풀이 깨져 새로 만듭니다.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    def _release_tasks(self, task_ids: List[int]):
+        """이 프로세스가 선점한 실행 중 작업을 대기열로 되돌림"""
+        db = SessionLocal()
+        try:
+            db.query(ExportTask).filter(
+                ExportTask.id.in_(task_ids),
+                ExportTask.status == "running",
+                ExportTask.worker_id == self.worker_id
+            ).update({
+                "status": "pending",
+                "progress": 0,
+                "worker_id": None,
+                "started_at": None
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def shutdown(self, timeout: float = 5.0):
+        """디스패처 종료 (실행 중이던 작업은 다음 실행 때 다시 처리되도록 대기열로 되돌림)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+            pool, self._pool = self._pool, None
+            task_ids = list(self._inflight)
+        if thread:
+            thread.join(timeout=timeout)
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if task_ids:
+            self._release_tasks(task_ids)
+
+    def poke(self):
+        """대기열을 즉시 다시 확인하도록 깨움"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+            try:
+                self._claim_and_submit()
+                self._fail_stale_tasks()
+            except Exception as e:
+                logger.warning("내보내기 대기열 확인 실패: %s", e)
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(EXPORT_POLL_INTERVAL)
+
+    def _claim_and_submit(self):
+        """빈 프로세스 수만큼 대기 작업을 선점해 제출"""
+        with self._cond:
+            free = self.workers - len(self._inflight)
+        if free <= 0:
+            return
+
+        db = SessionLocal()
+        try:
+            candidates = db.query(ExportTask).filter(
+                ExportTask.status == "pending"
+            ).order_by(ExportTask.id).limit(free).all()
+            for task in candidates:
+                claimed = db.query(ExportTask).filter(
+                    ExportTask.id == task.id,
+                    ExportTask.status == "pending"
+                ).update({
+                    "status": "running",
+                    "worker_id": self.worker_id,
+                    "started_at": datetime.utcnow()
+                }, synchronize_session=False)
+                db.commit()
+                if not claimed:
+                    continue  # 다른 프로세스가 먼저 선점함
+                try:
+                    submitted = self._submit(
+                        task.id, task.format, task.results_file, task.file_path, task.total_products
+                    )
+                except Exception as e:
+                    logger.warning("내보내기 %s 제출 실패: %s", task.id, e)
+                    submitted = False
+                if not submitted:
+                    # 선점만 하고 실행하지 못한 작업은 제한 시간까지 묶어 두지 않고 되돌림
+                    self._release_tasks([task.id])
+                    break
+        finally:
+            db.close()
+
+    def _submit(self, task_id: int, fmt: str, results_file: str, file_path: str, total: int) -> bool:
+        """프로세스 풀에 제출 (종료 중이면 False, 깨진 풀은 한 번 새로 만들어 다시 제출)"""
+        with self._cond:
+            if self._stopping or self._pool is None:
+                return False
+            pool = self._pool
+            try:
+                future = pool.submit(run_export_task, task_id, fmt, results_file, file_path, total)
+            except BrokenProcessPool:
+                self._replace_broken_pool(pool)
+                pool = self._pool
+                future = pool.submit(run_export_task, task_id, fmt, results_file, file_path, total)
+            self._inflight[task_id] = future
+        future.add_done_callback(lambda f: self._on_done(task_id, f, pool))
+        return True
+
+    def _on_done(self, task_id: int, future: Future, pool: Optional[ProcessPoolExecutor] = None):
+        with self._cond:
+            self._inflight.pop(task_id, None)
+            stopping = self._stopping
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                # 실행 중이던 프로세스가 비정상 종료됨: 다음 작업부터는 새 풀에서 실행
+                self._replace_broken_pool(pool)
+            self._cond.notify_all()
+        if stopping or future.cancelled():
+            return
+
+        error = None
+        result = None
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning("내보내기 %s 실패: %s", task_id, e)
+            error = str(e) or e.__class__.__name__
+
+        db = SessionLocal()
+        try:
+            task = db.query(ExportTask).filter(ExportTask.id == task_id).first()
+            if task:
+                _finish_task(db, task, result, error)
+        except Exception:
+            logger.exception("내보내기 %s 결과 반영 실패", task_id)
+            db.rollback()
+        finally:
+            db.close()
+
+    def _fail_stale_tasks(self):
+        """오래 끝나지 않은 다른 프로세스의 내보내기 정리 (프로세스가 중단된 경우)"""
+        deadline = datetime.utcnow() - timedelta(seconds=EXPORT_TASK_TIMEOUT)
+        with self._cond:
+            own = list(self._inflight)
+        db = SessionLocal()
+        try:
+            stale = db.query(ExportTask).filter(
+                ExportTask.status == "running",
+                ExportTask.started_at < deadline,
+                ExportTask.id.notin_(own)
+            ).all()
+            for task in stale:
+                _finish_task(db, task, None, "내보내기가 제한 시간 안에 끝나지 않았습니다.")
+        finally:
+            db.close()
+
+
+# 전역 내보내기 실행기
+export_executor = ExportExecutor()
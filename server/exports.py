@@ -0,0 +1,335 @@
+"""크롤링 결과 내보내기 (Excel, CSV, JSONL.gz, Parquet)
+
+결과 JSONL을 한 줄씩 읽어 (제품, 판매처) 단위의 평평한 행으로 변환해 기록한다.
+Excel과 달리 BI 도구에서 바로 적재할 수 있는 형식이다.
+생성된 파일은 내용 해시(SHA-256) 경로에 저장해 같은 내용을 공유하고 ETag로 사용한다.
+가격 변동(델타) 파일은 바뀐 행만으로 요청 시 만든다.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+
+import jsonlines
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.analytics import ANALYTICS_SHEET, PriceTableBuilder, analyze_table, save_summary
+from server.config import get_output_dir
+from crawler import PriceCompareCrawler, add_excel_styles
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 내보내기는 pyarrow가 있을 때만 사용
+    pa = None
+    pq = None
+
+# 크롤링 완료 시 생성할 형식 (쉼표 구분)
+EXPORT_FORMATS_ENABLED = [
+    fmt.strip() for fmt in os.getenv("EXPORT_FORMATS", "csv,jsonl.gz,parquet").split(",") if fmt.strip()
+]
+# Parquet 행 그룹 크기
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+# 내용 주소 기반 저장소 (파일 내용의 SHA-256으로 저장)
+EXPORT_STORE_DIR = os.getenv("EXPORT_STORE_DIR") or os.path.join(get_output_dir(), "exports")
+
+# 진행률 콜백 (누적 제품 수)
+ProgressCallback = Optional[Callable[[int], None]]
+
+# 평평한 행의 열 (제품 x 판매처)
+FLAT_COLUMNS = [
+    "product_id", "product_name", "crawled_at", "seller", "is_waffle",
+    "url", "item_price", "shipping_fee", "shipping_type", "final_price", "error",
+]
+
+# 가격 변동(델타) 열과 Excel 머리글
+DELTA_COLUMNS = [
+    "product_id", "product_name", "seller", "change_type", "previous_price",
+    "current_price", "delta", "previous_observed_at", "observed_at", "url",
+]
+DELTA_HEADERS = [
+    "제품 ID", "제품명", "판매처", "변동", "이전 가격",
+    "현재 가격", "가격차", "이전 관측", "관측 시각", "상품 url",
+]
+DELTA_SHEET = "가격 변동"
+
+
+def _to_int(value) -> Optional[int]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return int(value)
+
+
+def _to_str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def iter_flat_rows(results_file: str, on_product: ProgressCallback = None) -> Iterator[Dict]:
+    """결과 파일을 (제품, 판매처) 단위 행으로 변환"""
+    with jsonlines.open(results_file) as reader:
+        for count, result in enumerate(reader, 1):
+            if on_product:
+                on_product(count)
+            base = {
+                "product_id": _to_str(result.get("product_id")),
+                "product_name": result.get("product_name"),
+                "crawled_at": result.get("timestamp"),
+            }
+            prices = result.get("prices") or []
+            if not prices:
+                # 수집된 가격이 없는 제품도 오류와 함께 한 행 남김
+                yield {**dict.fromkeys(FLAT_COLUMNS), **base, "error": result.get("error")}
+                continue
+            for price_info in prices:
+                yield {
+                    **base,
+                    "seller": price_info.get("seller"),
+                    "is_waffle": price_info.get("seller") == "waffle",
+                    "url": price_info.get("상품 url"),
+                    "item_price": _to_int(price_info.get("상품 가격")),
+                    "shipping_fee": _to_int(price_info.get("배송비")),
+                    "shipping_type": price_info.get("배송비 여부"),
+                    "final_price": _to_int(price_info.get("최종 가격")),
+                    "error": result.get("error"),
+                }
+
+
+def write_csv(results_file: str, path: str, on_product: ProgressCallback = None) -> int:
+    """CSV 기록 (Excel에서 한글이 깨지지 않도록 BOM 포함)"""
+    count = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FLAT_COLUMNS)
+        writer.writeheader()
+        for row in iter_flat_rows(results_file, on_product):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_jsonl_gz(results_file: str, path: str, on_product: ProgressCallback = None) -> int:
+    """gzip 압축 JSONL 기록"""
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in iter_flat_rows(results_file, on_product):
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("product_id", pa.string()),
+        ("product_name", pa.string()),
+        ("crawled_at", pa.string()),
+        ("seller", pa.string()),
+        ("is_waffle", pa.bool_()),
+        ("url", pa.string()),
+        ("item_price", pa.int64()),
+        ("shipping_fee", pa.int64()),
+        ("shipping_type", pa.string()),
+        ("final_price", pa.int64()),
+        ("error", pa.string()),
+    ])
+
+
+def write_parquet(results_file: str, path: str, on_product: ProgressCallback = None) -> int:
+    """Parquet 기록 (EXPORT_BATCH_ROWS 행 단위로 행 그룹 기록)"""
+    if pq is None:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow가 필요합니다.")
+
+    schema = _parquet_schema()
+    count = 0
+    batch: Dict[str, List] = {name: [] for name in FLAT_COLUMNS}
+
+    def flush(writer):
+        writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        for values in batch.values():
+            values.clear()
+
+    with pq.ParquetWriter(path, schema, compression="snappy") as writer:
+        for row in iter_flat_rows(results_file, on_product):
+            for name in FLAT_COLUMNS:
+                batch[name].append(row[name])
+            count += 1
+            if count % EXPORT_BATCH_ROWS == 0:
+                flush(writer)
+        if count % EXPORT_BATCH_ROWS or count == 0:
+            flush(writer)
+    return count
+
+
+def write_xlsx(results_file: str, path: str, on_product: ProgressCallback = None) -> int:
+    """Excel 기록 (분석 시트 포함, 가격 분석 요약 JSON도 함께 저장)
+
+    결과 시트를 기록하며 읽은 결과로 분석용 열 배열도 함께 적재하므로 결과 파일은 한 번만 읽는다.
+    결과가 하나도 없으면 파일을 만들지 않고 0을 반환한다.
+    """
+    if os.path.getsize(results_file) == 0:
+        return 0
+
+    table = PriceTableBuilder()
+    analytics = None
+
+    def analytics_sheet():
+        nonlocal analytics
+        analytics = analyze_table(table.build())
+        return analytics.sheet_rows()
+
+    crawler = PriceCompareCrawler(results_file=results_file)
+    excel_file = crawler.export_to_excel_format(
+        excel_file=path,
+        extra_sheets=[(ANALYTICS_SHEET, analytics_sheet)],
+        keep_results_file=True,
+        on_product=on_product,
+        on_result=table.add
+    )
+    if excel_file is None or analytics is None:
+        raise RuntimeError("Excel 변환에 실패했습니다.")
+    save_summary(analytics, _final_path(path))
+    return analytics.table.product_count
+
+
+def _final_path(path: str) -> str:
+    """임시 파일 경로(.tmp)에 대응하는 최종 경로"""
+    return path[:-len(".tmp")] if path.endswith(".tmp") else path
+
+
+class ExportFormat(NamedTuple):
+    """내보내기 형식"""
+    extension: str
+    media_type: str
+    writer: Callable[[str, str, ProgressCallback], int]
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "xlsx": ExportFormat(
+        ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx
+    ),
+    "csv": ExportFormat(".csv", "text/csv; charset=utf-8", write_csv),
+    "jsonl.gz": ExportFormat(".jsonl.gz", "application/gzip", write_jsonl_gz),
+    "parquet": ExportFormat(".parquet", "application/vnd.apache.parquet", write_parquet),
+}
+
+
+def is_format_available(fmt: str) -> bool:
+    """형식 사용 가능 여부 (Parquet은 pyarrow 필요)"""
+    if fmt not in EXPORT_FORMATS:
+        return False
+    return fmt != "parquet" or pq is not None
+
+
+def export_path(result_file_path: str, fmt: str) -> str:
+    """Excel 결과 파일 경로에 대응하는 형식별 파일 경로"""
+    return os.path.splitext(result_file_path)[0] + EXPORT_FORMATS[fmt].extension
+
+
+def write_export(results_file: str, fmt: str, path: str, on_product: ProgressCallback = None) -> int:
+    """형식 하나를 임시 파일에 기록한 뒤 교체 (기록한 행 수 반환)"""
+    tmp_path = f"{path}.tmp"
+    try:
+        count = EXPORT_FORMATS[fmt].writer(results_file, tmp_path, on_product)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+        return count
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class StoredExport(NamedTuple):
+    """저장소에 보관된 내보내기 파일"""
+    content_hash: str
+    stored_path: str
+    size: int
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_export(path: str, fmt: str, store_dir: str = None) -> StoredExport:
+    """생성된 파일을 내용 해시 경로로 옮기고 원래 경로에는 하드 링크를 남김
+
+    같은 내용의 파일이 이미 있으면 새 파일을 버리고 기존 파일을 공유한다.
+    """
+    content_hash = file_sha256(path)
+    store_dir = store_dir or EXPORT_STORE_DIR
+    stored_path = os.path.join(
+        store_dir, content_hash[:2], content_hash + EXPORT_FORMATS[fmt].extension
+    )
+    os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+
+    if os.path.exists(stored_path):
+        os.remove(path)
+    else:
+        shutil.move(path, stored_path)
+
+    try:
+        os.link(stored_path, path)
+    except OSError:
+        shutil.copyfile(stored_path, path)  # 하드 링크를 지원하지 않는 파일시스템
+    return StoredExport(content_hash, stored_path, os.path.getsize(stored_path))
+
+
+def _delta_values(change) -> List:
+    return [getattr(change, name) for name in DELTA_COLUMNS]
+
+
+def delta_csv(changes: Iterable) -> bytes:
+    """가격 변동 CSV (BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DELTA_COLUMNS)
+    for change in changes:
+        writer.writerow(_delta_values(change))
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def delta_xlsx(changes: Iterable) -> bytes:
+    """가격 변동 Excel (한 시트)"""
+    wb = Workbook(write_only=True)
+    add_excel_styles(wb)
+    ws = wb.create_sheet(DELTA_SHEET)
+    header = []
+    for title in DELTA_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.style = "summary_header"
+        header.append(cell)
+    ws.append(header)
+    for change in changes:
+        ws.append(_delta_values(change))
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+# 가격 변동 파일 형식별 생성 함수
+DELTA_WRITERS: Dict[str, Callable[[Iterable], bytes]] = {
+    "csv": delta_csv,
+    "xlsx": delta_xlsx,
+}
+
+
+def enabled_export_formats() -> List[str]:
+    """크롤링 완료 시 생성할 (사용 가능한) 평평한 형식 목록"""
+    return [
+        fmt for fmt in EXPORT_FORMATS_ENABLED
+        if fmt != "xlsx" and is_format_available(fmt)
+    ]
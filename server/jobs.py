@@ -0,0 +1,639 @@
+"""크롤링 작업 실행기
+
+작업 상태·대기열·취소 신호는 모두 crawling_jobs 테이블에 저장된다. 따라서 API를
+여러 프로세스(uvicorn/gunicorn 워커)로 띄워도 어느 프로세스가 요청을 받든 같은
+결과를 돌려준다.
+
+- 대기열: status="pending"인 작업. 각 프로세스의 작업 슬롯이 조건부 UPDATE로
+  작업을 선점(claim)한다. 사용자별·사이트별 동시 실행 한도를 넘지 않는 작업부터 시작한다.
+- 공유 실행: 같은 사이트·같은 카탈로그(카탈로그 내용 해시)의 작업은 하나의 크롤링으로 합쳐지며,
+  합류한 작업은 coalesced_into_id로 원본 작업(리더)을 가리킨다.
+- 취소: API는 status="cancelling"만 기록하고, 실행 중인 프로세스가 주기적으로 확인한다.
+- 생존 신호: 실행 프로세스는 heartbeat_at을 갱신하며, 오래 갱신되지 않은 작업은 실패 처리된다.
+
+요청은 프로세스별 공유 워커 풀(FairTaskScheduler)에서 작업 간 가중 라운드 로빈으로 실행된다.
+"""
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import os
+import sys
+import threading
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+
+from server.catalogs import catalog_cache
+from server.config import WORKER_ID
+from server.database import SessionLocal
+from server.export_tasks import schedule_exports
+from server.models import Catalog, CrawlingJob
+from server.observations import ObservationWriter
+from server.progress import progress_store
+from server.recrawl import plan_partial_run, retry_export_target, scope_key
+from server.durations import crawl_task_order, url_durations
+from server.scheduler import FairTaskScheduler, lane_weight
+from crawler import PriceCompareCrawler
+
+# 프로세스별 동시에 실행되는 작업 수
+JOB_WORKER_SLOTS = int(os.getenv("JOB_WORKER_SLOTS", "2"))
+# 대기열 최대 길이 (대기 중인 크롤링 묶음 수)
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "20"))
+# 프로세스의 모든 작업이 공유하는 동시 요청 수
+CRAWLER_GLOBAL_WORKERS = int(os.getenv("CRAWLER_GLOBAL_WORKERS", "14"))
+# 작업 하나가 동시에 사용할 수 있는 요청 워커 수
+CRAWLER_WORKERS = max(1, min(int(os.getenv("CRAWLER_WORKERS", "7")), 7))
+# 사용자별 / 사이트별 동시 실행 작업 수
+MAX_JOBS_PER_USER = int(os.getenv("MAX_JOBS_PER_USER", "1"))
+MAX_JOBS_PER_SITE = int(os.getenv("MAX_JOBS_PER_SITE", "2"))
+# 최근 완료된 같은 카탈로그 결과를 재사용하는 시간 (초, 0이면 재사용 안 함)
+CRAWL_COALESCE_WINDOW = int(os.getenv("CRAWL_COALESCE_WINDOW", "600"))
+# 대기열·취소 신호 확인 주기 (초)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# 생존 신호 주기 / 응답 없음으로 판단하는 시간 (초)
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "120"))
+
+ACTIVE_STATUSES = ("running", "cancelling")
+CANCELLED_MESSAGE = "사용자 요청으로 취소되었습니다."
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """대기열이 가득 찬 경우"""
+    pass
+
+
+def find_recent_result(db: Session, site_name: str, catalog_hash: str) -> Optional[CrawlingJob]:
+    """재사용 가능한 최근 완료 작업 조회"""
+    if CRAWL_COALESCE_WINDOW <= 0:
+        return None
+
+    since = datetime.utcnow() - timedelta(seconds=CRAWL_COALESCE_WINDOW)
+    job = db.query(CrawlingJob).filter(
+        CrawlingJob.site_name == site_name,
+        CrawlingJob.catalog_hash == catalog_hash,
+        CrawlingJob.status == "completed",
+        CrawlingJob.completed_at >= since
+    ).order_by(CrawlingJob.completed_at.desc()).first()
+
+    if job and job.result_file_path and os.path.exists(job.result_file_path):
+        return job
+    return None
+
+
+def _pending_groups(db: Session) -> "OrderedDict[Tuple[str, str], List[CrawlingJob]]":
+    """대기 중인 작업을 (사이트, 카탈로그) 묶음으로 정리 (먼저 들어온 순)"""
+    groups: "OrderedDict[Tuple[str, str], List[CrawlingJob]]" = OrderedDict()
+    pending = db.query(CrawlingJob).filter(
+        CrawlingJob.status == "pending"
+    ).order_by(CrawlingJob.id).all()
+    for job in pending:
+        groups.setdefault((job.site_name, job.catalog_hash), []).append(job)
+    return groups
+
+
+def enqueue_job(db: Session, job: CrawlingJob) -> Tuple[Optional[int], Optional[int]]:
+    """작업을 대기열에 넣거나 실행 중인 같은 카탈로그 크롤링에 합류
+
+    job은 status="pending"으로 커밋된 상태여야 한다.
+    (대기 순번, 합류한 원본 작업 ID)를 반환하며, 실행 중인 크롤링에 합류하면 순번은 None이다.
+    """
+    leader = db.query(CrawlingJob).filter(
+        CrawlingJob.site_name == job.site_name,
+        CrawlingJob.catalog_hash == job.catalog_hash,
+        CrawlingJob.status == "running",
+        CrawlingJob.coalesced_into_id.is_(None),
+        CrawlingJob.id != job.id
+    ).order_by(CrawlingJob.id.desc()).first()
+
+    if leader:
+        # 리더가 아직 실행 중일 때만 합류 (같은 문장 안에서 확인)
+        leader_alias = aliased(CrawlingJob)
+        leader_running = db.query(leader_alias.id).filter(
+            leader_alias.id == leader.id,
+            leader_alias.status == "running"
+        ).exists()
+        joined = db.query(CrawlingJob).filter(
+            CrawlingJob.id == job.id,
+            CrawlingJob.status == "pending",
+            leader_running
+        ).update({
+            "status": "running",
+            "started_at": datetime.utcnow(),
+            "coalesced_into_id": leader.id
+        }, synchronize_session=False)
+        db.commit()
+        if joined:
+            db.refresh(job)
+            return None, leader.id
+
+    groups = _pending_groups(db)
+    key = (job.site_name, job.catalog_hash)
+    members = groups.get(key, [])
+    # 기존 대기 묶음에 합쳐지지 않고 새 묶음을 만드는 경우에만 대기열 길이 제한
+    if len(members) == 1 and members[0].id == job.id and len(groups) > MAX_PENDING_JOBS:
+        raise JobQueueFullError(
+            f"대기 중인 작업이 너무 많습니다. (최대 {MAX_PENDING_JOBS}개)"
+        )
+
+    job_executor.poke()
+    position = list(groups).index(key) + 1 if key in groups else None
+    return position, None
+
+
+def new_crawl_job(
+    user_id: int,
+    catalog: Catalog,
+    scope: str = "full",
+    base: Optional[Catalog] = None,
+    request_budget: Optional[int] = None,
+    **fields
+) -> CrawlingJob:
+    """카탈로그 버전을 크롤링하는 새 작업 (부분 크롤링은 범위까지 같은 작업끼리만 합류)"""
+    if scope == "priority":
+        base_key = f"budget:{request_budget}"
+    else:
+        base_key = base.content_hash if base else None
+    return CrawlingJob(
+        user_id=user_id,
+        site_name=catalog.site_name,
+        status="pending",
+        catalog_id=catalog.id,
+        catalog_hash=scope_key(catalog.content_hash, scope, base_key),
+        config_file_path=catalog.file_path,
+        total_products=catalog.product_count,
+        scope=scope,
+        base_catalog_id=base.id if base else None,
+        request_budget=request_budget,
+        **fields
+    )
+
+
+def submit_job(db: Session, job: CrawlingJob) -> Optional[int]:
+    """새 작업을 저장하고 최근 결과를 재사용하거나 대기열에 추가 (대기 순번 반환)
+
+    대기열이 가득 차면 작업을 지우고 JobQueueFullError를 낸다.
+    """
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    # 같은 카탈로그를 최근에 크롤링한 결과가 있으면 재사용
+    recent_job = find_recent_result(db, job.site_name, job.catalog_hash)
+    if recent_job:
+        now = datetime.utcnow()
+        job.status = "completed"
+        job.progress = 100
+        job.total_products = recent_job.total_products
+        job.current_product = recent_job.total_products
+        job.result_file_path = recent_job.result_file_path
+        job.coalesced_into_id = recent_job.coalesced_into_id or recent_job.id
+        job.started_at = now
+        job.completed_at = now
+        db.commit()
+        logger.info("Job %s reuses result of job %s", job.id, job.coalesced_into_id)
+        return None
+
+    # 대기열에 추가 (같은 카탈로그를 크롤링 중이면 합류)
+    try:
+        position, leader_id = enqueue_job(db, job)
+    except JobQueueFullError:
+        db.delete(job)
+        db.commit()
+        raise
+
+    if leader_id is not None:
+        logger.info("Job %s joined crawl of job %s", job.id, leader_id)
+    db.refresh(job)
+    return position
+
+
+def queue_position(db: Session, job: CrawlingJob) -> Optional[int]:
+    """대기 순번 조회 (대기 중이 아니면 None)"""
+    if job.status != "pending":
+        return None
+    keys = list(_pending_groups(db))
+    key = (job.site_name, job.catalog_hash)
+    return keys.index(key) + 1 if key in keys else None
+
+
+def request_cancel(db: Session, job: CrawlingJob) -> CrawlingJob:
+    """작업 취소 요청
+
+    대기 중이면 바로 취소하고, 실행 중이면 cancelling으로 표시해 실행 프로세스가 처리하게 한다.
+    """
+    cancelled = db.query(CrawlingJob).filter(
+        CrawlingJob.id == job.id,
+        CrawlingJob.status == "pending"
+    ).update({
+        "status": "cancelled",
+        "completed_at": datetime.utcnow(),
+        "error_message": CANCELLED_MESSAGE
+    }, synchronize_session=False)
+
+    if not cancelled:
+        db.query(CrawlingJob).filter(
+            CrawlingJob.id == job.id,
+            CrawlingJob.status == "running"
+        ).update({"status": "cancelling"}, synchronize_session=False)
+    db.commit()
+    db.refresh(job)
+    job_executor.poke()
+    return job
+
+
+def _run_members(db: Session, leader_id: int):
+    """공유 실행에 참여 중인 작업 조회 쿼리"""
+    return db.query(CrawlingJob).filter(
+        or_(CrawlingJob.id == leader_id, CrawlingJob.coalesced_into_id == leader_id),
+        CrawlingJob.status.in_(ACTIVE_STATUSES)
+    )
+
+
+class CrawlRun:
+    """이 프로세스가 선점해 실행 중인 크롤링 (리더 작업 기준)"""
+
+    def __init__(self, job: CrawlingJob):
+        self.leader_id = job.id
+        self.site_name = job.site_name
+        self.catalog_hash = job.catalog_hash
+        self.config_file_path = job.config_file_path
+        self.total_products = job.total_products or 0
+        self.catalog_id = job.catalog_id
+        self.scope = job.scope or "full"
+        self.base_catalog_id = job.base_catalog_id
+        self.parent_job_id = job.parent_job_id
+        self.schedule_id = job.schedule_id
+        self.request_budget = job.request_budget
+        self.crawler: Optional[PriceCompareCrawler] = None
+        self.cancel_requested = False
+
+
+def run_crawler_task(run: CrawlRun, executor: "JobExecutor"):
+    """크롤링 실행 (작업 전용 DB 세션 사용)"""
+    leader_id = run.leader_id
+    db = SessionLocal()
+    try:
+        # 크롤러 인스턴스 생성 (진행률은 리더 작업 기준으로 메모리 저장소에 기록)
+        # 도착한 결과는 가격 관측으로 일괄 기록
+        observations = ObservationWriter(leader_id, run.site_name)
+        # 카탈로그 버전의 제품 목록은 캐시에서 (카탈로그 없이 만든 이전 작업은 입력 파일에서)
+        products = catalog_cache.get_by_id(run.catalog_id) if run.catalog_id else None
+        # 부분 크롤링이면 선택한 (제품, 판매처)만 크롤링하고 끝난 뒤 전체 결과로 합친다
+        plan = plan_partial_run(db, run)
+        crawler = PriceCompareCrawler(
+            config_file=run.config_file_path,
+            site_name=run.site_name,
+            products=plan.products if plan else products,
+            # 예상 작업 시간이 긴 제품부터 제출하고, 예약 작업은 실행마다 순서를 섞어
+            # 같은 상품 페이지에 요청이 몰리지 않게 함
+            task_order=crawl_task_order(
+                url_durations(db, run.site_name),
+                f"{run.schedule_id}:{leader_id}" if run.schedule_id else None
+            ),
+            progress_callback=lambda p: progress_store.update(
+                leader_id, p["current"], p["total"], p["percentage"]
+            ),
+            result_callback=observations.add_result
+        )
+        run.crawler = crawler
+        if executor.is_stopping() or run.cancel_requested:
+            crawler.request_cancel()
+
+        # 크롤링 실행 (공유 워커 풀의 전용 레인 사용)
+        lane = executor.task_scheduler.open_lane(
+            f"job-{leader_id}",
+            weight=lane_weight(len(plan.products) if plan else run.total_products),
+            max_inflight=CRAWLER_WORKERS
+        )
+        cancelled = crawler.run_crawling(task_executor=lane)
+
+        # 작업 종료 시점의 진행률과 남은 관측 반영 (취소된 작업의 관측도 보관)
+        # 관측을 끝내 기록하지 못하면 작업 실패로 처리
+        progress_store.flush([leader_id])
+        observations.close()
+
+        if cancelled:
+            _run_members(db, leader_id).update({
+                "status": "cancelled",
+                "progress": crawler.progress,
+                "current_product": crawler.current_product,
+                "result_file_path": None,
+                "error_message": CANCELLED_MESSAGE,
+                "completed_at": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+            return
+
+        export_job_id, excel_file = leader_id, crawler.csv_file
+        if plan:
+            crawler.merge_results(list(products), plan.fallback)
+            # 재시도는 합친 결과를 원래 작업의 내보내기로 다시 내보내 원래 작업의 다운로드에 반영
+            if run.scope == "retry":
+                export_job_id, excel_file = (
+                    retry_export_target(db, run.parent_job_id) or (export_job_id, excel_file)
+                )
+
+        # 내보내기(Excel 등)는 별도 대기열에서 처리하고 작업 슬롯은 바로 반환
+        # Excel이 완성되면 exporting -> completed로 바뀐다
+        now = datetime.utcnow()
+        members = _run_members(db, leader_id)
+        members.filter(CrawlingJob.status == "running").update({
+            "status": "exporting",
+            "progress": 100,
+            "current_product": crawler.total_products,
+            "result_file_path": excel_file
+        }, synchronize_session=False)
+        members.filter(CrawlingJob.status == "cancelling").update({
+            "status": "cancelled",
+            "error_message": CANCELLED_MESSAGE,
+            "completed_at": now
+        }, synchronize_session=False)
+        schedule_exports(  # 상태 변경과 함께 커밋
+            db, export_job_id, crawler.results_file, excel_file, crawler.total_products
+        )
+
+    except Exception as e:
+        logger.exception("크롤링 실행 %s 실패", leader_id)
+        db.rollback()
+        _run_members(db, leader_id).update({
+            "status": "failed",
+            "error_message": str(e),
+            "completed_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        # 진행률 및 실행 정보 정리
+        progress_store.discard(leader_id)
+        executor._finish(run)
+        db.close()
+
+
+class JobExecutor:
+    """DB 대기열에서 작업을 선점해 실행하는 프로세스별 실행기"""
+
+    def __init__(
+        self,
+        worker_slots: int = JOB_WORKER_SLOTS,
+        request_budget: int = CRAWLER_GLOBAL_WORKERS
+    ):
+        self.worker_id = WORKER_ID
+        self.worker_slots = max(1, worker_slots)
+        self.task_scheduler = FairTaskScheduler(request_budget)
+        self._running: Dict[int, CrawlRun] = {}  # {리더 작업 ID: 실행}
+        self._cond = threading.Condition()
+        self._claim_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self):
+        """작업 슬롯과 감시 스레드 시작"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            self.task_scheduler.start()
+            for i in range(self.worker_slots):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"crawl-job-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            monitor = threading.Thread(
+                target=self._monitor_loop, name="crawl-job-monitor", daemon=True
+            )
+            monitor.start()
+            self._threads.append(monitor)
+
+    def shutdown(self, timeout: float = 5.0):
+        """실행 중인 작업에 취소를 요청하고 스레드 종료"""
+        with self._cond:
+            self._stopping = True
+            for run in self._running.values():
+                run.cancel_requested = True
+                if run.crawler:
+                    run.crawler.request_cancel()
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=timeout)
+        self.task_scheduler.shutdown(timeout=timeout)
+
+    def is_stopping(self) -> bool:
+        return self._stopping
+
+    def poke(self):
+        """대기열·취소 신호를 즉시 다시 확인하도록 깨움"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _finish(self, run: CrawlRun):
+        with self._cond:
+            self._running.pop(run.leader_id, None)
+            self._cond.notify_all()
+
+    def _claim_next(self) -> Optional[CrawlRun]:
+        """한도 안에서 가장 먼저 들어온 대기 묶음을 선점
+
+        여러 사용자가 합류한 묶음은 그중 한 명이라도 한도에 여유가 있으면 시작할 수 있고,
+        실행 중에는 합류한 모든 사용자의 한도를 차지한다.
+        """
+        with self._claim_lock:
+            db = SessionLocal()
+            try:
+                groups = _pending_groups(db)
+                if not groups:
+                    return None
+
+                active = db.query(CrawlingJob).filter(
+                    CrawlingJob.status.in_(ACTIVE_STATUSES)
+                ).all()
+                user_counts = Counter(job.user_id for job in active)
+                site_counts = Counter(
+                    job.site_name for job in active if job.coalesced_into_id is None
+                )
+
+                for (site_name, _), jobs in groups.items():
+                    if site_counts[site_name] >= MAX_JOBS_PER_SITE:
+                        continue
+                    if not any(user_counts[job.user_id] < MAX_JOBS_PER_USER for job in jobs):
+                        continue
+
+                    leader, followers = jobs[0], jobs[1:]
+                    now = datetime.utcnow()
+                    claimed = db.query(CrawlingJob).filter(
+                        CrawlingJob.id == leader.id,
+                        CrawlingJob.status == "pending"
+                    ).update({
+                        "status": "running",
+                        "started_at": now,
+                        "worker_id": self.worker_id,
+                        "heartbeat_at": now
+                    }, synchronize_session=False)
+                    if not claimed:
+                        # 다른 프로세스가 먼저 선점함
+                        db.rollback()
+                        continue
+
+                    if followers:
+                        db.query(CrawlingJob).filter(
+                            CrawlingJob.id.in_([job.id for job in followers]),
+                            CrawlingJob.status == "pending"
+                        ).update({
+                            "status": "running",
+                            "started_at": now,
+                            "coalesced_into_id": leader.id
+                        }, synchronize_session=False)
+                    db.commit()
+                    db.refresh(leader)
+                    return CrawlRun(leader)
+                return None
+            finally:
+                db.close()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+            try:
+                run = self._claim_next()
+            except Exception as e:
+                logger.warning("대기 작업 선점 실패: %s", e)
+                run = None
+
+            if run is None:
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(JOB_POLL_INTERVAL)
+                continue
+
+            with self._cond:
+                self._running[run.leader_id] = run
+            run_crawler_task(run, self)
+
+    def _monitor_loop(self):
+        last_heartbeat = 0.0
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(JOB_POLL_INTERVAL)
+                if self._stopping:
+                    return
+            try:
+                self._check_cancellations()
+                now = datetime.utcnow().timestamp()
+                if now - last_heartbeat >= JOB_HEARTBEAT_INTERVAL:
+                    self._send_heartbeats()
+                    self._recover_stale_jobs()
+                    last_heartbeat = now
+            except Exception as e:
+                logger.warning("작업 상태 확인 실패: %s", e)
+
+    def _check_cancellations(self):
+        """cancelling 표시된 작업 처리
+
+        공유 실행의 다른 참여 작업이 남아 있으면 해당 작업만 분리(cancelled)하고,
+        모두 취소를 원하면 크롤러에 취소를 요청한다.
+        """
+        with self._cond:
+            runs = list(self._running.values())
+        if not runs:
+            return
+
+        db = SessionLocal()
+        try:
+            for run in runs:
+                members = _run_members(db, run.leader_id).all()
+                cancelling = [job.id for job in members if job.status == "cancelling"]
+                if not cancelling:
+                    continue
+                if len(cancelling) == len(members):
+                    run.cancel_requested = True
+                    if run.crawler:
+                        run.crawler.request_cancel()
+                    continue
+                db.query(CrawlingJob).filter(
+                    CrawlingJob.id.in_(cancelling),
+                    CrawlingJob.status == "cancelling"
+                ).update({
+                    "status": "cancelled",
+                    "error_message": CANCELLED_MESSAGE,
+                    "completed_at": datetime.utcnow()
+                }, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    def _send_heartbeats(self):
+        """이 프로세스가 실행 중인 리더 작업의 생존 신호 갱신"""
+        with self._cond:
+            leader_ids = list(self._running)
+        if not leader_ids:
+            return
+
+        db = SessionLocal()
+        try:
+            db.query(CrawlingJob).filter(CrawlingJob.id.in_(leader_ids)).update(
+                {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _recover_stale_jobs(self):
+        """생존 신호가 끊긴 작업과 리더를 잃은 합류 작업 정리"""
+        deadline = datetime.utcnow() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+        with self._cond:
+            local_ids = set(self._running)
+
+        db = SessionLocal()
+        try:
+            stale_leaders = db.query(CrawlingJob).filter(
+                CrawlingJob.status.in_(ACTIVE_STATUSES),
+                CrawlingJob.coalesced_into_id.is_(None),
+                CrawlingJob.heartbeat_at < deadline
+            ).all()
+            for job in stale_leaders:
+                if job.id in local_ids:
+                    continue
+                logger.warning("작업 %s의 실행 프로세스(%s) 응답 없음", job.id, job.worker_id)
+                job.status = "failed"
+                job.error_message = "작업을 실행하던 서버 프로세스가 응답하지 않습니다."
+                job.completed_at = datetime.utcnow()
+            db.commit()
+
+            # 리더의 실행이 끝났는데 활성 상태로 남은 합류 작업은 리더 결과를 따른다
+            leader = aliased(CrawlingJob)
+            orphans = db.query(CrawlingJob, leader).join(
+                leader, CrawlingJob.coalesced_into_id == leader.id
+            ).filter(
+                CrawlingJob.status.in_(ACTIVE_STATUSES),
+                leader.status.in_(("completed", "failed", "cancelled")),
+                leader.heartbeat_at < deadline
+            ).all()
+            for job, leader_job in orphans:
+                if leader_job.id in local_ids:
+                    continue
+                job.status = leader_job.status
+                job.progress = leader_job.progress
+                job.current_product = leader_job.current_product
+                job.result_file_path = leader_job.result_file_path
+                job.error_message = leader_job.error_message
+                job.completed_at = leader_job.completed_at or datetime.utcnow()
+            db.commit()
+        finally:
+            db.close()
+
+
+# 이 프로세스의 작업 실행기
+job_executor = JobExecutor()
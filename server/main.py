@@ -13,7 +13,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from server.database import init_db, get_db
 from server.models import User
 from server.auth import get_password_hash
-from server.routers import auth, crawler, admin
+from server.progress import start_progress_flusher, stop_progress_flusher
+from server.archive import start_archiver, stop_archiver
+from server.schedules import start_schedule_runner, stop_schedule_runner
+from server.jobs import job_executor
+from server.export_tasks import export_executor
+from server.observations import rebuild_latest_prices
+from server.routers import auth, crawler, admin, prices, catalogs, schedules
 
 # 정적 파일 디렉토리 생성
 os.makedirs("server/static", exist_ok=True)
@@ -40,12 +46,26 @@ async def lifespan(app: FastAPI):
         db.add(admin_user)
         db.commit()
         print("기본 관리자 계정이 생성되었습니다. (username: admin, password: admin123)")
+
+    # 최신 가격 테이블이 비어 있으면 관측 기록에서 다시 채움
+    rebuild_latest_prices(db)
     db.close()
+
+    # 진행률 DB 반영 스레드, 작업 실행기, 내보내기 실행기, 관측 보관 스레드, 예약 스레드 시작
+    start_progress_flusher()
+    job_executor.start()
+    export_executor.start()
+    start_archiver()
+    start_schedule_runner()
     
     yield  # 애플리케이션이 실행 중
     
-    # 종료 시 실행 (필요한 경우)
-    pass
+    # 종료 시 실행: 예약을 멈추고 작업 중단 후 남은 진행률 반영
+    stop_schedule_runner()
+    job_executor.shutdown()
+    export_executor.shutdown()
+    stop_archiver()
+    stop_progress_flusher()
 
 
 app = FastAPI(
@@ -68,6 +88,9 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(crawler.router)
 app.include_router(admin.router)
+app.include_router(prices.router)
+app.include_router(catalogs.router)
+app.include_router(schedules.router)
 
 # 정적 파일 서빙 (관리자 페이지용)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
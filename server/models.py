@@ -1,5 +1,5 @@
 """데이터베이스 모델"""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import sys
@@ -36,7 +36,7 @@ class CrawlingJob(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     site_name = Column(String(50), nullable=False)  # ssg, ssg_shoping, samsung
-    status = Column(String(20), default="pending")  # pending, running, completed, failed
+    status = Column(String(20), default="pending")  # pending, running, cancelling, exporting, completed, failed, cancelled
     progress = Column(Integer, default=0)  # 0-100
     current_product = Column(Integer, default=0)
     total_products = Column(Integer, default=0)
@@ -45,7 +45,193 @@ class CrawlingJob(Base):
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    catalog_hash = Column(String(64), nullable=True, index=True)  # 입력 파일 내용 해시 (카탈로그 버전)
+    coalesced_into_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=True)  # 결과를 공유하는 원본 작업
+    config_file_path = Column(String(500), nullable=True)  # 크롤링 입력 파일
+    worker_id = Column(String(100), nullable=True)  # 작업을 실행 중인 서버 프로세스
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # 실행 프로세스의 마지막 생존 신호
+    catalog_id = Column(Integer, ForeignKey("catalogs.id"), nullable=True)  # 크롤링한 카탈로그 버전
+    scope = Column(String(20), default="full")  # full: 전체, changed: 이전 버전 대비 바뀐 행만, retry: 실패한 행만, priority: 우선순위 상위 행만
+    base_catalog_id = Column(Integer, ForeignKey("catalogs.id"), nullable=True)  # changed 범위의 비교 기준 버전
+    parent_job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=True)  # retry 범위의 원래 작업
+    schedule_id = Column(Integer, ForeignKey("crawl_schedules.id"), nullable=True)  # 작업을 만든 예약
+    request_budget = Column(Integer, nullable=True)  # priority 범위에서 크롤링할 행 수
 
     # 관계
     user = relationship("User", back_populates="crawling_jobs")
 
+
+
+class CrawlSchedule(Base):
+    """반복 크롤링 예약 (cron 식, 사이트·카탈로그별)"""
+    __tablename__ = "crawl_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # 예약 작업의 소유자
+    site_name = Column(String(50), nullable=False)
+    catalog_version = Column(Integer, nullable=True)  # None이면 실행 시점의 최신 버전
+    cron = Column(String(100), nullable=False)  # 분 시 일 월 요일 (서버 로컬 시각)
+    scope = Column(String(20), default="full")  # full, changed, priority
+    requests_per_hour = Column(Integer, nullable=True)  # priority 범위의 시간당 요청 예산
+    jitter_seconds = Column(Integer, default=0)  # 예약 시각 뒤로 시작을 흩뜨리는 구간
+    enabled = Column(Boolean, default=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=True, index=True)  # 흩뜨린 다음 실행 시각 (UTC)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_job_id = Column(Integer, nullable=True)  # 마지막으로 만든 작업 (crawling_jobs와 순환 참조를 피해 FK 없음)
+    last_error = Column(Text, nullable=True)  # 마지막 실행에서 작업을 만들지 못한 이유
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Catalog(Base):
+    """크롤링 입력 카탈로그 버전 (업로드 시 검증해 정규화한 JSONL로 저장)"""
+    __tablename__ = "catalogs"
+    __table_args__ = (
+        Index("ux_catalogs_site_version", "site_name", "version", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    site_name = Column(String(50), nullable=False)
+    version = Column(Integer, nullable=False)  # 사이트별 1부터 증가
+    content_hash = Column(String(64), nullable=False, index=True)  # 정규화한 JSONL의 SHA-256
+    file_path = Column(String(500), nullable=False)  # 정규화한 JSONL
+    product_count = Column(Integer, default=0)
+    source_name = Column(String(255), nullable=True)  # 업로드한 파일 이름
+    source_format = Column(String(20), nullable=True)  # jsonl, xlsx, file (데이터 폴더에서 가져옴)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 직전 버전 대비 (제품, 판매처) 행 변경 수
+    base_version = Column(Integer, nullable=True)
+    added_entries = Column(Integer, nullable=True)
+    changed_entries = Column(Integer, nullable=True)
+    removed_entries = Column(Integer, nullable=True)
+
+
+class CatalogEntry(Base):
+    """카탈로그 버전의 (제품, 판매처) URL과 정규 ID (정규 ID -> 참조하는 카탈로그 행 색인)"""
+    __tablename__ = "catalog_entries"
+    __table_args__ = (
+        Index("ix_catalog_entries_catalog_canonical", "catalog_id", "canonical_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    catalog_id = Column(Integer, ForeignKey("catalogs.id"), nullable=False)
+    product_id = Column(String(100), nullable=False)
+    seller = Column(String(100), nullable=False)  # waffle 또는 경쟁사 이름
+    url = Column(String(1000), nullable=True)  # 카탈로그의 원래 URL
+    canonical_id = Column(String(100), nullable=True, index=True)  # URL이 없으면 None
+
+
+class ExportTask(Base):
+    """결과 내보내기 작업 모델 (크롤링 완료 후 형식별로 생성)"""
+    __tablename__ = "export_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=False, index=True)  # 리더 작업
+    format = Column(String(20), nullable=False)  # xlsx, csv, jsonl.gz, parquet
+    status = Column(String(20), default="pending", index=True)  # pending, running, completed, failed
+    progress = Column(Integer, default=0)  # 0-100
+    total_products = Column(Integer, default=0)
+    rows_written = Column(Integer, nullable=True)
+    results_file = Column(String(500), nullable=False)  # 원본 결과 JSONL
+    file_path = Column(String(500), nullable=False, index=True)  # 생성할 파일 (저장소 파일의 하드 링크)
+    content_hash = Column(String(64), nullable=True, index=True)  # 파일 내용 SHA-256 (ETag)
+    stored_path = Column(String(500), nullable=True)  # 내용 해시 기반 저장 경로
+    size = Column(Integer, nullable=True)  # 파일 크기 (바이트)
+    error_message = Column(Text, nullable=True)
+    worker_id = Column(String(100), nullable=True)  # 작업을 실행 중인 서버 프로세스
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PriceObservation(Base):
+    """가격 관측 모델 (크롤링 결과의 제품 x 판매처 한 건)"""
+    __tablename__ = "price_observations"
+    __table_args__ = (
+        Index(
+            "ix_price_observations_product_seller_site_time", "product_id", "seller", "site_name", "observed_at"
+        ),
+        Index("ix_price_observations_canonical_time", "canonical_id", "observed_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=False, index=True)  # 리더 작업
+    site_name = Column(String(50), nullable=False)
+    product_id = Column(String(100), nullable=False)
+    product_name = Column(String(500), nullable=True)
+    seller = Column(String(100), nullable=False)  # waffle 또는 경쟁사 이름
+    url = Column(String(1000), nullable=True)
+    product_price = Column(Integer, nullable=True)
+    delivery_fee = Column(Integer, nullable=True)
+    final_price = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False)  # ok, no_price, error
+    observed_at = Column(DateTime(timezone=True), nullable=False)  # 가격 추출 시각 (UTC)
+    canonical_id = Column(String(100), nullable=True)  # 상품 URL의 정규 ID (예: ssg:1000035622592)
+    delivery_type = Column(String(200), nullable=True)  # 배송비 여부 (무료, 조건부 무료 등)
+    fetch_ms = Column(Integer, nullable=True)  # 요청 시간 (재시도·백오프 포함 밀리초, 요청을 공유했으면 None)
+
+
+class LatestPrice(Base):
+    """(사이트, 제품, 판매처)별 최신 가격 (가격 관측을 기록할 때 함께 갱신)"""
+    __tablename__ = "latest_prices"
+    __table_args__ = (
+        Index("ux_latest_prices_key", "product_id", "site_name", "seller", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    site_name = Column(String(50), nullable=False)
+    product_id = Column(String(100), nullable=False)
+    product_name = Column(String(500), nullable=True)
+    seller = Column(String(100), nullable=False)
+    url = Column(String(1000), nullable=True)
+    product_price = Column(Integer, nullable=True)
+    delivery_fee = Column(Integer, nullable=True)
+    final_price = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False)  # ok, no_price, error
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+    job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=False)  # 마지막으로 관측한 작업
+    canonical_id = Column(String(100), nullable=True, index=True)  # 상품 URL의 정규 ID
+    delivery_type = Column(String(200), nullable=True)
+
+
+class PriceChange(Base):
+    """직전 관측 대비 가격 변동 (크롤링 작업의 제품 x 판매처, 바뀐 것만 기록)"""
+    __tablename__ = "price_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=False, index=True)  # 변동을 관측한 리더 작업
+    previous_job_id = Column(Integer, ForeignKey("crawling_jobs.id"), nullable=True)  # 비교 대상 관측의 작업
+    site_name = Column(String(50), nullable=False)
+    product_id = Column(String(100), nullable=False)
+    product_name = Column(String(500), nullable=True)
+    seller = Column(String(100), nullable=False)
+    url = Column(String(1000), nullable=True)
+    change_type = Column(String(20), nullable=False)  # changed, new, available, unavailable
+    previous_price = Column(Integer, nullable=True)  # 이전 최종 가격
+    current_price = Column(Integer, nullable=True)  # 현재 최종 가격
+    delta = Column(Integer, nullable=True)  # 현재 - 이전
+    previous_observed_at = Column(DateTime(timezone=True), nullable=True)
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ObservationArchive(Base):
+    """보관된 가격 관측 파일 목록 (월별 Parquet 파일과 파일별 최소/최대 통계)"""
+    __tablename__ = "observation_archives"
+    __table_args__ = (
+        Index("ux_observation_archives_part", "month", "part", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(String(7), nullable=False)  # YYYY-MM (observed_at 기준)
+    part = Column(Integer, nullable=False)  # 같은 달에 여러 번 보관한 경우 순번
+    path = Column(String(500), nullable=False)
+    status = Column(String(20), default="writing", index=True)  # writing, completed
+    rows = Column(Integer, default=0)
+    size = Column(Integer, nullable=True)  # 파일 크기 (바이트)
+    min_observed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    max_observed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    min_product_id = Column(String(100), nullable=True)
+    max_product_id = Column(String(100), nullable=True)
+    min_final_price = Column(Integer, nullable=True)
+    max_final_price = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
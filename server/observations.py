@@ -0,0 +1,484 @@
+"""가격 관측 저장소
+
+크롤링 결과가 도착할 때마다 (제품, 판매처) 단위 관측을 버퍼에 모았다가
+OBSERVATION_BATCH_SIZE 건씩 price_observations 테이블에 일괄 INSERT 한다.
+결과 JSONL은 내보내기 후 삭제되지만 관측은 남으므로 가격 이력 조회의 기반이 된다.
+
+같은 트랜잭션에서 latest_prices를 (제품, 사이트, 판매처) 키로 upsert 하므로
+현재 가격 조회는 결과 파일을 훑지 않고 키 조회로 끝난다. upsert 직전의 latest_prices가
+곧 직전 실행의 가격이므로, 이와 다른 가격만 price_changes에 남긴다.
+가격 이력은 DB에서 시간 구간별로 집계하고 키셋 커서로 나눠 돌려준다.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import base64
+import json
+import os
+import sys
+import time
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import and_, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from server.archive import archived_history, merge_aggregate
+from server.database import SessionLocal
+from server.models import LatestPrice, PriceChange, PriceObservation
+
+# 한 번에 INSERT 하는 관측 수
+OBSERVATION_BATCH_SIZE = int(os.getenv("OBSERVATION_BATCH_SIZE", "500"))
+# 작업 종료 시 남은 관측 기록을 시도하는 횟수 (실패하면 작업 실패)
+OBSERVATION_FLUSH_RETRIES = int(os.getenv("OBSERVATION_FLUSH_RETRIES", "3"))
+
+# 가격 이력 집계 구간
+HISTORY_INTERVALS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# latest_prices의 키와 관측에서 복사하는 열
+LATEST_KEY = ("product_id", "site_name", "seller")
+LATEST_COLUMNS = LATEST_KEY + (
+    "product_name", "url", "product_price", "delivery_fee", "final_price",
+    "status", "observed_at", "job_id", "canonical_id", "delivery_type",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_int(value) -> Optional[int]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return int(value)
+
+
+def _to_str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def observation_status(price_info: Dict) -> str:
+    """관측 상태 (ok: 가격 수집, no_price: 가격 없음, error: 요청 실패)"""
+    if price_info.get("에러 발생"):
+        return "error"
+    if _to_int(price_info.get("최종 가격")) is None:
+        return "no_price"
+    return "ok"
+
+
+def _observed_at(value, default: datetime) -> datetime:
+    """크롤러의 로컬 ISO 시각 -> UTC (naive)"""
+    try:
+        observed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+    return observed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def observation_rows(result: Dict, job_id: int, site_name: str) -> List[Dict]:
+    """제품 결과 하나를 관측 행 목록으로 변환"""
+    now = datetime.utcnow()
+    product_observed_at = _observed_at(result.get("timestamp"), now)
+    rows = []
+    for price_info in result.get("prices") or []:
+        rows.append({
+            "job_id": job_id,
+            "site_name": site_name,
+            "product_id": str(result.get("product_id")),
+            "product_name": result.get("product_name"),
+            "seller": price_info.get("seller"),
+            "url": price_info.get("상품 url"),
+            "product_price": _to_int(price_info.get("상품 가격")),
+            "delivery_fee": _to_int(price_info.get("배송비")),
+            "final_price": _to_int(price_info.get("최종 가격")),
+            "status": observation_status(price_info),
+            "observed_at": _observed_at(price_info.get("추출 날짜"), product_observed_at),
+            "canonical_id": price_info.get("canonical_id"),
+            "delivery_type": _to_str(price_info.get("배송비 여부")),
+            "fetch_ms": _to_int(price_info.get("fetch_ms")),
+        })
+    return rows
+
+
+def _dialect_insert(db: Session):
+    """ON CONFLICT를 지원하는 방언의 insert (지원하지 않으면 None)"""
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def newest_by_key(rows: List[Dict]) -> List[Dict]:
+    """키별 가장 최근 관측만 남김 (요청 실패(error) 관측은 가격 비교에서 제외)"""
+    latest: Dict[Tuple, Dict] = {}
+    for row in rows:
+        if row["status"] == "error":
+            continue
+        key = tuple(row[name] for name in LATEST_KEY)
+        current = latest.get(key)
+        if current is None or row["observed_at"] >= current["observed_at"]:
+            latest[key] = row
+    return list(latest.values())
+
+
+def _change_type(previous: Optional[LatestPrice], current_price: Optional[int]) -> Optional[str]:
+    """이전 최신 가격 대비 변동 종류 (변동이 없으면 None)"""
+    if previous is None:
+        return "new"
+    if previous.final_price == current_price:
+        return None
+    if previous.final_price is None:
+        return "available"
+    if current_price is None:
+        return "unavailable"
+    return "changed"
+
+
+def record_price_changes(db: Session, rows: List[Dict]) -> int:
+    """latest_prices(직전 관측)와 비교해 바뀐 가격만 price_changes에 기록 (커밋은 호출자)
+
+    rows는 newest_by_key로 정리한 관측이며, 비교 비용은 관측 수에 비례한다.
+    기록한 변동 수를 반환한다.
+    """
+    if not rows:
+        return 0
+    previous: Dict[Tuple, LatestPrice] = {}
+    for site_name in {row["site_name"] for row in rows}:
+        product_ids = {row["product_id"] for row in rows if row["site_name"] == site_name}
+        for entry in db.query(LatestPrice).filter(
+            LatestPrice.product_id.in_(product_ids),
+            LatestPrice.site_name == site_name
+        ):
+            previous[tuple(getattr(entry, name) for name in LATEST_KEY)] = entry
+
+    changes = []
+    for row in rows:
+        entry = previous.get(tuple(row[name] for name in LATEST_KEY))
+        if entry is not None and (entry.job_id == row["job_id"] or _as_datetime(entry.observed_at) > row["observed_at"]):
+            continue  # 같은 작업의 재기록이거나 더 오래된 관측
+        change_type = _change_type(entry, row["final_price"])
+        if change_type is None:
+            continue
+        previous_price = entry.final_price if entry is not None else None
+        changes.append({
+            "job_id": row["job_id"],
+            "previous_job_id": entry.job_id if entry is not None else None,
+            "site_name": row["site_name"],
+            "product_id": row["product_id"],
+            "product_name": row["product_name"],
+            "seller": row["seller"],
+            "url": row["url"],
+            "change_type": change_type,
+            "previous_price": previous_price,
+            "current_price": row["final_price"],
+            "delta": (
+                row["final_price"] - previous_price
+                if change_type == "changed" else None
+            ),
+            "previous_observed_at": entry.observed_at if entry is not None else None,
+            "observed_at": row["observed_at"],
+        })
+    if changes:
+        db.execute(insert(PriceChange), changes)
+    return len(changes)
+
+
+def upsert_latest_prices(db: Session, rows: List[Dict]):
+    """관측으로 latest_prices 갱신 (더 오래된 관측으로는 덮어쓰지 않음, 커밋은 호출자)
+
+    rows는 newest_by_key로 정리한 관측이다.
+    """
+    if not rows:
+        return
+    values = [{name: row[name] for name in LATEST_COLUMNS} for row in rows]
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        # ON CONFLICT가 없는 DB는 키별로 조회 후 갱신
+        for value in values:
+            entry = db.query(LatestPrice).filter_by(
+                **{name: value[name] for name in LATEST_KEY}
+            ).first()
+            if entry is None:
+                db.add(LatestPrice(**value))
+            elif value["observed_at"] >= entry.observed_at:
+                for name, item in value.items():
+                    setattr(entry, name, item)
+        db.flush()
+        return
+
+    stmt = dialect_insert(LatestPrice)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(LATEST_KEY),
+        set_={name: stmt.excluded[name] for name in LATEST_COLUMNS if name not in LATEST_KEY},
+        where=stmt.excluded.observed_at >= LatestPrice.observed_at
+    )
+    db.execute(stmt, values)
+
+
+def rebuild_latest_prices(db: Session) -> int:
+    """latest_prices가 비어 있으면 관측 기록에서 다시 채움 (키별 마지막 관측 기준)
+
+    채운 행 수를 반환한다.
+    """
+    if db.query(LatestPrice.id).first() is not None:
+        return 0
+    last_ids = select(func.max(PriceObservation.id)).where(
+        PriceObservation.status != "error"
+    ).group_by(
+        *(getattr(PriceObservation, name) for name in LATEST_KEY)
+    )
+    columns = [getattr(PriceObservation, name) for name in LATEST_COLUMNS]
+    result = db.execute(
+        insert(LatestPrice).from_select(
+            list(LATEST_COLUMNS),
+            select(*columns).where(PriceObservation.id.in_(last_ids))
+        )
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def canonical_product_ids(db: Session, canonical_id: str, limit: int) -> List[str]:
+    """상품 URL 정규 ID를 관측한 제품 ID 목록"""
+    rows = db.query(PriceObservation.product_id).filter(
+        PriceObservation.canonical_id == canonical_id
+    ).distinct().order_by(PriceObservation.product_id).limit(limit).all()
+    return [product_id for (product_id,) in rows]
+
+
+def latest_prices_for(
+    db: Session,
+    product_ids: Iterable[str],
+    site_name: Optional[str] = None
+) -> "OrderedDict[Tuple[str, str], List[LatestPrice]]":
+    """제품별 최신 가격 조회 ((제품 ID, 사이트) -> 판매처 목록, 요청한 제품 순)"""
+    product_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+    query = db.query(LatestPrice).filter(LatestPrice.product_id.in_(product_ids))
+    if site_name:
+        query = query.filter(LatestPrice.site_name == site_name)
+
+    order = {product_id: idx for idx, product_id in enumerate(product_ids)}
+    groups: "OrderedDict[Tuple[str, str], List[LatestPrice]]" = OrderedDict()
+    for entry in sorted(query.all(), key=lambda e: (order[e.product_id], e.site_name)):
+        groups.setdefault((entry.product_id, entry.site_name), []).append(entry)
+    return groups
+
+
+class HistoryBucket(NamedTuple):
+    """판매처별 시간 구간 가격 집계"""
+    product_id: str
+    seller: str
+    site_name: str
+    bucket: datetime
+    min_price: int
+    avg_price: float
+    max_price: int
+    observations: int
+
+
+def encode_history_cursor(item: HistoryBucket) -> str:
+    """마지막 항목의 정렬 키 -> 다음 페이지 커서"""
+    key = [item.product_id, item.seller, item.site_name, item.bucket.isoformat()]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[str, str, str, datetime]:
+    """커서 -> (제품 ID, 판매처, 사이트, 구간 시작), 잘못된 커서면 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        product_id, seller, site_name, bucket = json.loads(base64.urlsafe_b64decode(padded))
+        return str(product_id), str(seller), str(site_name), datetime.fromisoformat(bucket)
+    except (TypeError, ValueError) as e:
+        raise ValueError("잘못된 커서입니다.") from e
+
+
+def _bucket_expression(db: Session, interval: str):
+    """observed_at을 구간 시작 시각으로 자르는 SQL 식"""
+    column = PriceObservation.observed_at
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return func.date_trunc(interval, column)
+    if name == "sqlite":
+        fmt = "%Y-%m-%d %H:00:00" if interval == "hour" else "%Y-%m-%d 00:00:00"
+        return func.strftime(fmt, column)
+    raise ValueError(f"가격 이력 집계를 지원하지 않는 데이터베이스입니다: {name}")
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    return datetime.fromisoformat(value)
+
+
+def price_history(
+    db: Session,
+    product_ids: Iterable[str],
+    interval: str,
+    start: datetime,
+    end: datetime,
+    site_name: Optional[str] = None,
+    seller: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 500,
+    canonical_id: Optional[str] = None
+) -> Tuple[List[HistoryBucket], Optional[str]]:
+    """(제품, 판매처, 사이트, 구간)별 최저·평균·최고 가격과 다음 페이지 커서
+
+    가격이 수집된 관측만 집계하며, (product_id, seller, site_name, observed_at) 인덱스 순서로
+    정렬해 커서 이후 구간은 observed_at 범위 조건으로 건너뛴다. 같은 제품 ID라도 사이트가 다르면
+    별도 계열로 묶으므로 site_name을 지정하지 않아도 커서가 계열 사이를 건너뛰지 않는다.
+    조회 범위가 보관된 기간과 겹치면 보관 파일의 집계를 같은 순서로 합친다.
+    canonical_id를 지정하면 그 상품 URL의 관측만 집계한다.
+    """
+    step = HISTORY_INTERVALS[interval]
+    product_ids = [str(product_id) for product_id in product_ids]
+    bucket = _bucket_expression(db, interval).label("bucket")
+
+    query = db.query(
+        PriceObservation.product_id,
+        PriceObservation.seller,
+        PriceObservation.site_name,
+        bucket,
+        func.min(PriceObservation.final_price),
+        func.max(PriceObservation.final_price),
+        func.sum(PriceObservation.final_price),
+        func.count(PriceObservation.id)
+    ).filter(
+        PriceObservation.product_id.in_(product_ids),
+        PriceObservation.observed_at >= start,
+        PriceObservation.observed_at < end,
+        PriceObservation.final_price.isnot(None)
+    )
+    if site_name:
+        query = query.filter(PriceObservation.site_name == site_name)
+    if seller:
+        query = query.filter(PriceObservation.seller == seller)
+    if canonical_id:
+        query = query.filter(PriceObservation.canonical_id == canonical_id)
+
+    if cursor:
+        last_product, last_seller, last_site, last_bucket = decode_history_cursor(cursor)
+        group_key = tuple_(PriceObservation.product_id, PriceObservation.seller, PriceObservation.site_name)
+        query = query.filter(or_(
+            group_key > tuple_(last_product, last_seller, last_site),
+            and_(
+                PriceObservation.product_id == last_product,
+                PriceObservation.seller == last_seller,
+                PriceObservation.site_name == last_site,
+                PriceObservation.observed_at >= last_bucket + step
+            )
+        ))
+
+    rows = query.group_by(
+        PriceObservation.product_id, PriceObservation.seller, PriceObservation.site_name, bucket
+    ).order_by(
+        PriceObservation.product_id, PriceObservation.seller, PriceObservation.site_name, bucket
+    ).limit(limit + 1).all()
+
+    # (제품, 판매처, 사이트, 구간) -> [최저, 최고, 합계, 건수]
+    aggregates = {
+        (product_id, seller_name, site, _as_datetime(bucket_start)): [min_price, max_price, total, count]
+        for product_id, seller_name, site, bucket_start, min_price, max_price, total, count in rows
+    }
+    archived = archived_history(db, product_ids, interval, start, end, site_name, seller, canonical_id)
+    if archived:
+        last_key = (last_product, last_seller, last_site, last_bucket) if cursor else None
+        # DB 결과가 잘렸으면 그 마지막 키까지만 합쳐야 순서가 유지된다
+        bound = max(aggregates) if len(rows) > limit else None
+        for key, value in archived.items():
+            if (last_key is None or key > last_key) and (bound is None or key <= bound):
+                merge_aggregate(aggregates, key, value)
+
+    keys = sorted(aggregates)
+    items = [
+        HistoryBucket(
+            key[0], key[1], key[2], key[3],
+            int(aggregates[key][0]), round(aggregates[key][2] / aggregates[key][3], 2),
+            int(aggregates[key][1]), aggregates[key][3]
+        )
+        for key in keys[:limit]
+    ]
+    next_cursor = encode_history_cursor(items[-1]) if len(keys) > limit else None
+    return items, next_cursor
+
+
+class ObservationWriteError(Exception):
+    """작업 종료 시까지 관측을 기록하지 못한 경우"""
+    pass
+
+
+class ObservationWriter:
+    """크롤링 한 번의 관측을 모아 일괄 기록
+
+    크롤러의 result_callback으로 등록한다. 콜백은 결과를 모으는 스레드 하나에서만
+    호출되므로 버퍼에 락을 두지 않는다. 기록에 실패한 관측은 버퍼에 남겨 다음 기록에서
+    다시 시도하고, close에서도 기록하지 못하면 ObservationWriteError를 던진다.
+    """
+
+    def __init__(self, job_id: int, site_name: str, batch_size: int = OBSERVATION_BATCH_SIZE):
+        self.job_id = job_id
+        self.site_name = site_name
+        self.batch_size = max(1, batch_size)
+        self.written = 0
+        self.changes = 0  # 직전 관측 대비 가격 변동 수
+        self._buffer: List[Dict] = []
+        self._flush_at = self.batch_size  # 버퍼가 이만큼 차면 기록 (실패 후에는 한 묶음 더 모은 뒤 재시도)
+
+    def add_result(self, result: Dict):
+        """제품 결과 추가 (버퍼가 차면 기록)"""
+        self._buffer.extend(observation_rows(result, self.job_id, self.site_name))
+        if len(self._buffer) >= self._flush_at:
+            self.flush()
+
+    def flush(self) -> int:
+        """버퍼의 관측을 기록하고 기록한 건수를 반환 (실패하면 버퍼에 남겨 두고 0)"""
+        try:
+            return self._write()
+        except Exception as e:
+            logger.warning("작업 %s 가격 관측 %d건 기록 실패 (다음에 재시도): %s", self.job_id, len(self._buffer), e)
+            self._flush_at = len(self._buffer) + self.batch_size
+            return 0
+
+    def close(self, retries: int = OBSERVATION_FLUSH_RETRIES) -> int:
+        """남은 관측을 모두 기록 (retries번 모두 실패하면 ObservationWriteError)"""
+        for attempt in range(max(1, retries)):
+            try:
+                return self._write()
+            except Exception as e:
+                logger.warning(
+                    "작업 %s 가격 관측 %d건 기록 실패 (%d/%d): %s",
+                    self.job_id, len(self._buffer), attempt + 1, retries, e
+                )
+                if attempt < retries - 1:
+                    time.sleep(2 ** attempt)
+        raise ObservationWriteError(f"가격 관측 {len(self._buffer)}건을 기록하지 못했습니다.")
+
+    def _write(self) -> int:
+        """버퍼의 관측을 한 트랜잭션으로 기록 (실패하면 버퍼를 그대로 두고 예외)"""
+        rows = self._buffer
+        if not rows:
+            return 0
+        db = SessionLocal()
+        try:
+            db.execute(insert(PriceObservation), rows)
+            newest = newest_by_key(rows)
+            changes = record_price_changes(db, newest)
+            upsert_latest_prices(db, newest)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._buffer = self._buffer[len(rows):]
+        self._flush_at = self.batch_size
+        self.changes += changes
+        self.written += len(rows)
+        return len(rows)
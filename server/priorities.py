@@ -0,0 +1,199 @@
+"""변동성 기반 크롤링 우선순위
+
+상품 URL의 정규 ID(canonical_id)마다 최근 VOLATILITY_WINDOW_DAYS일의 가격 변동(price_changes)
+횟수와 관측 기간으로 변동률(일당 변동 횟수)을 추정하고, 마지막 관측 이후 가격이 바뀌었을 확률
+1 - exp(-변동률 × 경과 일수)를 우선순위 점수로 쓴다. 같은 상품을 가리키는 카탈로그 행은 같은
+점수를 갖고, 정규 ID로 관측한 기록이 없는 행은 (제품, 판매처) 기록으로 추정한다.
+
+- 변동률은 사전값(VOLATILITY_PRIOR_DAYS일에 한 번 변동)과 섞어, 관측이 적은 행이 0이나
+  극단값으로 치우치지 않게 한다.
+- 현재 가격이 역전된(경쟁사가 Waffle보다 저렴한) 제품의 행은 INVERSION_PRIORITY_WEIGHT배로 가중한다.
+- 관측이 없는 행은 항상 먼저 크롤링한다.
+
+요청 예산이 정해진 크롤링(scope=priority)은 점수가 높은 행부터 예산만큼만 크롤링하므로,
+자주 바뀌는 상품은 자주, 안정적인 상품은 드물게 다시 확인하게 된다. 같은 상품을 가리키는 행은
+한 번의 요청을 공유하므로 예산에서도 하나로 센다.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+import math
+import os
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from server.catalogs import product_urls
+from server.models import LatestPrice, PriceChange, PriceObservation
+from crawler import canonical_url, summarize_prices
+
+# 변동률을 추정하는 최근 기간 (일)
+VOLATILITY_WINDOW_DAYS = int(os.getenv("VOLATILITY_WINDOW_DAYS", "14"))
+# 사전 변동률: 이 기간(일)에 한 번 변동
+VOLATILITY_PRIOR_DAYS = float(os.getenv("VOLATILITY_PRIOR_DAYS", "7"))
+# 가격이 역전된 제품의 가중치
+INVERSION_PRIORITY_WEIGHT = float(os.getenv("INVERSION_PRIORITY_WEIGHT", "3"))
+
+EntryKey = Tuple[str, str]  # (제품 ID, 판매처)
+StatsKey = Union[str, EntryKey]  # 정규 ID 또는 (제품 ID, 판매처)
+
+
+class EntryPriority(NamedTuple):
+    """(제품, 판매처)의 크롤링 우선순위"""
+    product_id: str
+    seller: str
+    canonical_id: Optional[str]  # 상품 URL의 정규 ID
+    changes: int  # 기간 내 가격 변동 횟수 (처음 관측 제외)
+    change_rate: float  # 추정 변동률 (일당 횟수)
+    age_hours: Optional[float]  # 마지막 관측 이후 시간 (관측이 없으면 None)
+    inverted: bool  # 제품의 현재 가격이 역전됐는지
+    score: float  # 마지막 관측 이후 가격이 바뀌었을 확률 × 가중치 (관측이 없으면 inf)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def change_counts(db: Session, site_name: str, since: datetime) -> Dict[StatsKey, int]:
+    """since 이후 정규 ID별, (제품, 판매처)별 가격 변동 횟수
+
+    정규 ID별 횟수는 변동을 관측한 작업 수로 센다. 같은 상품을 가리키는 행이 한 작업에서
+    함께 바뀌어도 한 번이다.
+    """
+    rows = db.query(
+        PriceChange.product_id, PriceChange.seller, func.count(PriceChange.id)
+    ).filter(
+        PriceChange.site_name == site_name,
+        PriceChange.observed_at >= since,
+        PriceChange.change_type != "new"
+    ).group_by(PriceChange.product_id, PriceChange.seller)
+    counts: Dict[StatsKey, int] = {(product_id, seller): count for product_id, seller, count in rows}
+
+    # price_changes에는 정규 ID가 없으므로 같은 작업의 관측에서 가져옴
+    rows = db.query(
+        PriceObservation.canonical_id, func.count(func.distinct(PriceChange.job_id))
+    ).join(PriceObservation, and_(
+        PriceObservation.job_id == PriceChange.job_id,
+        PriceObservation.site_name == PriceChange.site_name,
+        PriceObservation.product_id == PriceChange.product_id,
+        PriceObservation.seller == PriceChange.seller
+    )).filter(
+        PriceChange.site_name == site_name,
+        PriceChange.observed_at >= since,
+        PriceChange.change_type != "new",
+        PriceObservation.canonical_id.isnot(None)
+    ).group_by(PriceObservation.canonical_id)
+    counts.update({canonical_id: count for canonical_id, count in rows})
+    return counts
+
+
+def first_observed(db: Session, site_name: str, since: datetime) -> Dict[StatsKey, datetime]:
+    """since 이후 정규 ID별, (제품, 판매처)별 첫 관측 시각 (변동률의 관측 기간)"""
+    rows = db.query(
+        PriceObservation.product_id, PriceObservation.seller, func.min(PriceObservation.observed_at)
+    ).filter(
+        PriceObservation.site_name == site_name,
+        PriceObservation.observed_at >= since
+    ).group_by(PriceObservation.product_id, PriceObservation.seller)
+    first: Dict[StatsKey, datetime] = {
+        (product_id, seller): _naive_utc(observed_at) for product_id, seller, observed_at in rows
+    }
+
+    rows = db.query(
+        PriceObservation.canonical_id, func.min(PriceObservation.observed_at)
+    ).filter(
+        PriceObservation.site_name == site_name,
+        PriceObservation.observed_at >= since,
+        PriceObservation.canonical_id.isnot(None)
+    ).group_by(PriceObservation.canonical_id)
+    first.update({canonical_id: _naive_utc(observed_at) for canonical_id, observed_at in rows})
+    return first
+
+
+def change_rate(changes: int, observed_days: float) -> float:
+    """사전값을 섞은 일당 변동률"""
+    return (changes + 1) / (observed_days + VOLATILITY_PRIOR_DAYS)
+
+
+def entry_priorities(
+    db: Session,
+    site_name: str,
+    products: Iterable[Dict],
+    now: Optional[datetime] = None
+) -> List[EntryPriority]:
+    """카탈로그의 URL이 있는 (제품, 판매처)를 우선순위 높은 순으로 (UTC 기준)"""
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=VOLATILITY_WINDOW_DAYS)
+    changes = change_counts(db, site_name, since)
+    first = first_observed(db, site_name, since)
+
+    # 마지막 관측 시각 (정규 ID는 그 상품을 가리키는 행 중 가장 최근)
+    latest: Dict[StatsKey, datetime] = {}
+    prices_by_product: Dict[str, List[Dict]] = defaultdict(list)
+    for row in db.query(
+        LatestPrice.product_id, LatestPrice.seller, LatestPrice.final_price, LatestPrice.observed_at,
+        LatestPrice.canonical_id
+    ).filter(LatestPrice.site_name == site_name):
+        observed_at = _naive_utc(row.observed_at)
+        latest[(row.product_id, row.seller)] = observed_at
+        if row.canonical_id and observed_at > latest.get(row.canonical_id, datetime.min):
+            latest[row.canonical_id] = observed_at
+        prices_by_product[row.product_id].append({"seller": row.seller, "최종 가격": row.final_price})
+    inverted = {
+        product_id for product_id, prices in prices_by_product.items()
+        if summarize_prices(prices)["inversion"]
+    }
+
+    priorities = []
+    for product in products:
+        product_id = str(product["product_id"])
+        for seller, url in product_urls(product):
+            if not url:
+                continue
+            canonical_id = canonical_url(url)[0]
+            # 정규 ID로 관측한 기록이 없으면 (제품, 판매처) 기록으로 추정
+            key = canonical_id if canonical_id in latest else (product_id, seller)
+            count = changes.get(key, 0)
+            start = first.get(key)
+            observed_days = (now - start).total_seconds() / 86400 if start else 0.0
+            rate = change_rate(count, max(0.0, observed_days))
+            observed_at = latest.get(key)
+            if observed_at is None:
+                age_hours, score = None, math.inf
+            else:
+                age_days = max(0.0, (now - observed_at).total_seconds() / 86400)
+                age_hours = age_days * 24
+                score = 1 - math.exp(-rate * age_days)
+                if product_id in inverted:
+                    score *= INVERSION_PRIORITY_WEIGHT
+            priorities.append(EntryPriority(
+                product_id, seller, canonical_id, count, rate, age_hours, product_id in inverted, score
+            ))
+
+    # 점수가 같으면 오래 관측하지 않은 행부터
+    priorities.sort(key=lambda entry: (
+        -entry.score, -(entry.age_hours if entry.age_hours is not None else math.inf)
+    ))
+    return priorities
+
+
+def select_by_budget(priorities: List[EntryPriority], budget: int) -> Set[EntryKey]:
+    """우선순위가 높은 행부터 요청 예산만큼 선택 (같은 정규 ID의 행은 요청 하나로 셈)"""
+    selected: Set[EntryKey] = set()
+    requests: Set[StatsKey] = set()
+    for entry in priorities:
+        request = entry.canonical_id or (entry.product_id, entry.seller)
+        if request not in requests:
+            if len(requests) >= budget:
+                continue
+            requests.add(request)
+        selected.add((entry.product_id, entry.seller))
+    return selected
@@ -0,0 +1,137 @@
+"""크롤링 진행률 메모리 저장소
+
+크롤러가 갱신한 진행률을 메모리에 보관하고, 백그라운드 스레드가
+일정 주기로 crawling_jobs 테이블에 일괄 반영한다.
+"""
+from typing import Dict, Iterable, NamedTuple, Optional
+import os
+import sys
+import threading
+import time
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.database import SessionLocal
+from server.models import CrawlingJob
+
+# DB 반영 주기 (초)
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressSnapshot(NamedTuple):
+    """특정 시점의 작업 진행률"""
+    current: int
+    total: int
+    percentage: int
+    updated_at: float
+
+
+class ProgressStore:
+    """작업별 진행률 저장소
+
+    스냅샷은 불변 튜플로 통째로 교체하므로 조회 시 락이 필요 없다.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[int, ProgressSnapshot] = {}
+        self._flushed: Dict[int, ProgressSnapshot] = {}
+        self._flush_lock = threading.Lock()
+
+    def update(self, job_id: int, current: int, total: int, percentage: int):
+        """진행률 갱신 (크롤러 스레드에서 호출)"""
+        self._snapshots[job_id] = ProgressSnapshot(current, total, percentage, time.time())
+
+    def get(self, job_id: int) -> Optional[ProgressSnapshot]:
+        """진행률 조회 (O(1), 락 없음)"""
+        return self._snapshots.get(job_id)
+
+    def discard(self, job_id: int):
+        """작업 종료 후 스냅샷 제거"""
+        self._snapshots.pop(job_id, None)
+        self._flushed.pop(job_id, None)
+
+    def flush(self, job_ids: Optional[Iterable[int]] = None) -> int:
+        """변경된 스냅샷을 DB에 일괄 반영하고 반영한 건수를 반환"""
+        with self._flush_lock:
+            snapshots = dict(self._snapshots)
+            if job_ids is not None:
+                wanted = set(job_ids)
+                snapshots = {k: v for k, v in snapshots.items() if k in wanted}
+
+            changed = {
+                job_id: snapshot
+                for job_id, snapshot in snapshots.items()
+                if self._flushed.get(job_id) != snapshot
+            }
+            if not changed:
+                return 0
+
+            db = SessionLocal()
+            try:
+                db.bulk_update_mappings(CrawlingJob, [
+                    {
+                        "id": job_id,
+                        "progress": snapshot.percentage,
+                        "current_product": snapshot.current,
+                    }
+                    for job_id, snapshot in changed.items()
+                ])
+                db.commit()
+            finally:
+                db.close()
+
+            self._flushed.update(changed)
+            return len(changed)
+
+
+class ProgressFlusher(threading.Thread):
+    """주기적으로 진행률을 DB에 반영하는 백그라운드 스레드"""
+
+    def __init__(self, store: ProgressStore, interval: float = PROGRESS_FLUSH_INTERVAL):
+        super().__init__(name="progress-flusher", daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.store.flush()
+            except Exception as e:
+                logger.warning("진행률 DB 반영 실패: %s", e)
+
+    def stop(self):
+        """스레드 종료 후 남은 진행률 반영"""
+        self._stop_event.set()
+        self.join(timeout=self.interval + 1)
+        try:
+            self.store.flush()
+        except Exception as e:
+            logger.warning("진행률 DB 반영 실패: %s", e)
+
+
+# 전역 진행률 저장소
+progress_store = ProgressStore()
+_flusher: Optional[ProgressFlusher] = None
+
+
+def start_progress_flusher():
+    """진행률 반영 스레드 시작"""
+    global _flusher
+    if _flusher is None:
+        _flusher = ProgressFlusher(progress_store)
+        _flusher.start()
+
+
+def stop_progress_flusher():
+    """진행률 반영 스레드 종료"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
@@ -0,0 +1,272 @@
+"""부분 크롤링
+
+카탈로그의 일부 (제품, 판매처)만 크롤링하고, 나머지는 이미 관측한 가격으로 채워
+카탈로그 전체 결과(결과 파일·내보내기)를 만든다.
+
+- changed: 이전 카탈로그 버전 대비 추가·변경된 행과 아직 관측이 없는 행만 크롤링하고
+  나머지는 latest_prices(최신 관측)로 채운다.
+- retry: 원래 작업에서 요청 실패·가격 없음으로 끝난 행만 다시 크롤링하고 나머지는 원래 작업
+  (재시도를 거듭했으면 이전 재시도까지)의 관측으로 채운다. 결과 파일은 내보내기 후 삭제되므로
+  원래 결과는 price_observations에서 다시 만든다. 합친 결과는 원래 작업의 내보내기로 다시
+  내보내므로 원래 작업의 다운로드에도 재시도 결과가 반영된다.
+- priority: 변동성 우선순위(server.priorities)가 높은 행부터 요청 예산만큼 크롤링하고
+  나머지는 latest_prices로 채운다.
+"""
+from datetime import timezone
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import os
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy.orm import Session
+
+from server.catalogs import catalog_cache, diff_catalogs, product_urls
+from server.export_tasks import exports_finished, job_exports, source_job_id
+from server.models import Catalog, CrawlingJob, LatestPrice, PriceObservation
+from server.priorities import entry_priorities, select_by_budget
+
+EntryKey = Tuple[str, str]  # (제품 ID, 판매처)
+Fallback = Callable[[Dict, str], Optional[Dict]]
+
+# 크롤링 범위
+CRAWL_SCOPES = ("full", "changed", "retry", "priority")
+# 재시도 대상 관측 상태
+RETRY_STATUSES = ("error", "no_price")
+
+
+class JobResults(NamedTuple):
+    """작업 결과의 (제품, 판매처)별 가격 정보와 관측 상태"""
+    observed: Dict[EntryKey, Dict]
+    statuses: Dict[EntryKey, str]
+    complete: bool  # 처음 작업이 카탈로그 전체를 크롤링했는지 (관측이 없는 행도 실패)
+
+
+class PartialPlan(NamedTuple):
+    """부분 크롤링 계획: 크롤링할 제품(선택한 판매처만)과 나머지 판매처의 가격 정보"""
+    products: List[Dict]
+    fallback: Fallback
+
+
+def scope_key(catalog_hash: str, scope: str, base_key: Optional[str] = None) -> str:
+    """작업 합류·결과 재사용에 쓰는 키 (전체 크롤링은 카탈로그 해시 그대로)
+
+    base_key는 범위의 기준 (changed: 기준 버전 해시, retry: 원래 작업, priority: 요청 예산)
+    """
+    if scope == "full":
+        return catalog_hash
+    return hashlib.sha256(f"{catalog_hash}:{scope}:{base_key or ''}".encode()).hexdigest()
+
+
+def select_entries(products: Iterable[Dict], keys: Set[EntryKey]) -> List[Dict]:
+    """선택한 (제품, 판매처)만 남긴 제품 목록 (선택된 판매처가 없는 제품은 제외)"""
+    selected = []
+    for product in products:
+        product_id = str(product["product_id"])
+        subset = {
+            "product_id": product["product_id"],
+            "product_name": product["product_name"],
+            "competitors": [
+                competitor for competitor in product.get("competitors", [])
+                if (product_id, competitor["name"]) in keys
+            ],
+        }
+        if "waffle" in product and (product_id, "waffle") in keys:
+            subset["waffle"] = product["waffle"]
+        if "waffle" in subset or subset["competitors"]:
+            selected.append(subset)
+    return selected
+
+
+def _local_iso(value) -> str:
+    """DB의 UTC 시각 -> 크롤러 결과와 같은 로컬 ISO 시각"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone().replace(tzinfo=None).isoformat()
+
+
+def price_info_from(row) -> Dict:
+    """관측(또는 최신 가격) 행 -> 크롤러 결과의 가격 정보"""
+    price_info = {
+        "상품 url": row.url,
+        "상품 가격": row.product_price,
+        "배송비": row.delivery_fee,
+        "배송비 여부": row.delivery_type,
+        "최종 가격": row.final_price,
+        "추출 날짜": _local_iso(row.observed_at),
+    }
+    if row.canonical_id:
+        price_info["canonical_id"] = row.canonical_id
+    if getattr(row, "status", None) == "error":
+        price_info["에러 발생"] = "요청 실패"
+    return price_info
+
+
+def latest_price_infos(db: Session, site_name: str) -> Dict[EntryKey, Dict]:
+    """사이트의 (제품, 판매처)별 최신 가격 정보"""
+    rows = db.query(
+        LatestPrice.product_id, LatestPrice.seller, LatestPrice.url,
+        LatestPrice.product_price, LatestPrice.delivery_fee, LatestPrice.delivery_type,
+        LatestPrice.final_price, LatestPrice.observed_at, LatestPrice.canonical_id
+    ).filter(LatestPrice.site_name == site_name)
+    return {(row.product_id, row.seller): price_info_from(row) for row in rows}
+
+
+def job_observations(db: Session, job_id: int) -> Dict[EntryKey, PriceObservation]:
+    """작업의 (제품, 판매처)별 관측 (같은 키가 여러 번이면 마지막 관측)"""
+    rows = db.query(
+        PriceObservation.product_id, PriceObservation.seller, PriceObservation.url,
+        PriceObservation.product_price, PriceObservation.delivery_fee, PriceObservation.delivery_type,
+        PriceObservation.final_price, PriceObservation.observed_at, PriceObservation.canonical_id,
+        PriceObservation.status
+    ).filter(PriceObservation.job_id == job_id).order_by(PriceObservation.id)
+    return {(row.product_id, row.seller): row for row in rows}
+
+
+def _fallback(observed: Dict[EntryKey, Dict]) -> Fallback:
+    """크롤링하지 않은 판매처를 observed로 채우는 fallback"""
+    def fallback(product: Dict, seller: str) -> Optional[Dict]:
+        price_info = observed.get((str(product["product_id"]), seller))
+        if price_info is None or price_info["상품 url"] is None:
+            return price_info
+        # 추적용 쿼리만 바뀐 URL은 카탈로그의 현재 URL로 표시
+        return {**price_info, "상품 url": dict(product_urls(product)).get(seller)}
+    return fallback
+
+
+def retry_lineage(db: Session, job: CrawlingJob) -> List[int]:
+    """작업 결과를 만든 크롤링 작업 ID (오래된 순)
+
+    재시도를 거슬러 올라가고, 작업 결과 파일로 다시 내보낸(합친) 재시도 작업도 포함한다.
+    """
+    lineage: List[int] = []
+    seen = set()
+    current = job
+    while current is not None and current.id not in seen:
+        seen.add(current.id)
+        lineage.append(source_job_id(db, current))
+        if current.parent_job_id is None:
+            break
+        current = db.query(CrawlingJob).filter(CrawlingJob.id == current.parent_job_id).first()
+    lineage.reverse()
+
+    if job.result_file_path:
+        merged = db.query(CrawlingJob.id).filter(
+            CrawlingJob.scope == "retry",
+            CrawlingJob.result_file_path == job.result_file_path,
+            CrawlingJob.coalesced_into_id.is_(None),
+            CrawlingJob.status.in_(("exporting", "completed"))
+        ).order_by(CrawlingJob.id)
+        lineage += [job_id for job_id, in merged if job_id not in lineage]
+    return lineage
+
+
+def retry_export_target(db: Session, parent_job_id: int) -> Optional[Tuple[int, str]]:
+    """재시도 결과를 다시 내보낼 원래 작업의 (내보내기 작업 ID, Excel 파일 경로)
+
+    원래 작업의 내보내기가 없거나 아직 끝나지 않았으면 None (재시도 작업이 따로 내보냄)
+    """
+    parent = db.query(CrawlingJob).filter(CrawlingJob.id == parent_job_id).first()
+    tasks = job_exports(db, parent) if parent else []
+    excel = next((task for task in tasks if task.format == "xlsx"), None)
+    if excel is None or not exports_finished(tasks):
+        return None
+    return excel.job_id, excel.file_path
+
+
+def job_results(db: Session, job: CrawlingJob) -> JobResults:
+    """작업 결과 (재시도 결과를 차례로 덮어씀)
+
+    작업에서 관측하지 않은 행(부분 크롤링에서 채운 행)은 최신 관측으로 채운다.
+    """
+    lineage = retry_lineage(db, job)
+    root = db.query(CrawlingJob.scope).filter(CrawlingJob.id == lineage[0]).first()
+    observed = latest_price_infos(db, job.site_name)
+    statuses: Dict[EntryKey, str] = {}
+    for job_id in lineage:
+        for key, row in job_observations(db, job_id).items():
+            observed[key] = price_info_from(row)
+            statuses[key] = row.status
+    return JobResults(observed, statuses, root is not None and (root.scope or "full") == "full")
+
+
+def failed_targets(products: Iterable[Dict], results: JobResults) -> Set[EntryKey]:
+    """요청 실패·가격 없음으로 끝난 행 (URL이 없는 행은 다시 크롤링해도 같으므로 제외)
+
+    전체 크롤링에서 관측이 없는 행(제품 단위 오류로 중단된 판매처)도 실패로 본다.
+    """
+    targets = set()
+    for product in products:
+        for seller, url in product_urls(product):
+            key = (str(product["product_id"]), seller)
+            status = results.statuses.get(key)
+            if url and (status in RETRY_STATUSES or (status is None and results.complete)):
+                targets.add(key)
+    return targets
+
+
+def changed_targets(
+    base: Optional[Catalog],
+    catalog: Catalog,
+    observed: Dict[EntryKey, Dict]
+) -> Set[EntryKey]:
+    """이전 버전 대비 추가·변경된 행과 최신 관측이 없는 행"""
+    diff = diff_catalogs(base, catalog)
+    targets = {(entry.product_id, entry.seller) for entry in diff.added + diff.changed}
+    for product in catalog_cache.get(catalog):
+        for seller, _ in product_urls(product):
+            key = (str(product["product_id"]), seller)
+            if key not in observed:
+                targets.add(key)
+    return targets
+
+
+def plan_changed_run(
+    db: Session,
+    site_name: str,
+    catalog: Catalog,
+    base: Optional[Catalog]
+) -> PartialPlan:
+    """changed 범위 계획 (나머지 행은 최신 관측으로 채움)"""
+    observed = latest_price_infos(db, site_name)
+    targets = changed_targets(base, catalog, observed)
+    products = select_entries(catalog_cache.get(catalog), targets)
+
+    return PartialPlan(products, _fallback(observed))
+
+
+def plan_retry_run(db: Session, catalog: Catalog, parent: CrawlingJob) -> PartialPlan:
+    """retry 범위 계획 (나머지 행은 원래 작업의 관측으로 채움)"""
+    results = job_results(db, parent)
+    products = catalog_cache.get(catalog)
+    targets = failed_targets(products, results)
+    return PartialPlan(select_entries(products, targets), _fallback(results.observed))
+
+
+def plan_priority_run(db: Session, site_name: str, catalog: Catalog, budget: int) -> PartialPlan:
+    """priority 범위 계획 (우선순위 상위 budget개 행만 크롤링, 나머지는 최신 관측으로 채움)"""
+    products = catalog_cache.get(catalog)
+    targets = select_by_budget(entry_priorities(db, site_name, products), budget)
+    return PartialPlan(select_entries(products, targets), _fallback(latest_price_infos(db, site_name)))
+
+
+def plan_partial_run(db: Session, run) -> Optional[PartialPlan]:
+    """작업 범위에 맞는 부분 크롤링 계획 (전체 크롤링이면 None)"""
+    if run.scope == "priority" and run.catalog_id and run.request_budget:
+        catalog = db.query(Catalog).filter(Catalog.id == run.catalog_id).first()
+        return plan_priority_run(db, run.site_name, catalog, run.request_budget)
+    if run.scope == "retry" and run.catalog_id and run.parent_job_id:
+        catalog = db.query(Catalog).filter(Catalog.id == run.catalog_id).first()
+        parent = db.query(CrawlingJob).filter(CrawlingJob.id == run.parent_job_id).first()
+        return plan_retry_run(db, catalog, parent)
+    if run.scope == "changed" and run.catalog_id:
+        catalog = db.query(Catalog).filter(Catalog.id == run.catalog_id).first()
+        base = None
+        if run.base_catalog_id:
+            base = db.query(Catalog).filter(Catalog.id == run.base_catalog_id).first()
+        return plan_changed_run(db, run.site_name, catalog, base)
+    return None
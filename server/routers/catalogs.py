@@ -0,0 +1,143 @@
+"""카탈로그 라우터"""
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Path, UploadFile
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import os
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '../..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.database import get_db
+from server.models import Catalog, User
+from server.schemas import (
+    CatalogDiffResponse, CatalogEntryChange, CatalogEntryResponse, CatalogResponse, CatalogUrlGroup
+)
+from server.auth import get_current_active_user
+from server.catalogs import (
+    CATALOG_FORMATS, CatalogValidationError, catalog_format, diff_catalogs, get_catalog, parse_catalog,
+    previous_catalog, store_catalog, url_index
+)
+
+router = APIRouter(prefix="/api/catalogs", tags=["catalogs"])
+
+# 업로드 파일 최대 크기 (바이트)
+CATALOG_MAX_UPLOAD_BYTES = int(os.getenv("CATALOG_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# 사이트 이름 (카탈로그 저장 경로에 사용)
+SITE_NAME_PATTERN = "^[A-Za-z0-9_-]+$"
+
+
+@router.post("/{site_name}", response_model=CatalogResponse)
+def upload_catalog(
+    site_name: str = Path(..., pattern=SITE_NAME_PATTERN),
+    file: UploadFile = File(..., description="카탈로그 JSONL 또는 가격조사 엑셀"),
+    sheet: Optional[str] = Form(None, description="엑셀 시트 이름 (기본: 첫 시트)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """카탈로그 업로드 (검증 후 새 버전으로 저장, 내용이 최신 버전과 같으면 최신 버전 반환)"""
+    fmt = catalog_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 파일 형식입니다. (가능: {', '.join(CATALOG_FORMATS)})"
+        )
+    content = file.file.read(CATALOG_MAX_UPLOAD_BYTES + 1)
+    if len(content) > CATALOG_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"파일이 너무 큽니다. (최대 {CATALOG_MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"
+        )
+
+    try:
+        products = parse_catalog(content, fmt, sheet)
+    except CatalogValidationError as e:
+        raise HTTPException(status_code=400, detail={"message": "카탈로그 검증 실패", "errors": e.errors})
+
+    catalog, is_new = store_catalog(
+        db, site_name, products,
+        source_name=file.filename,
+        source_format=fmt,
+        uploaded_by=current_user.id
+    )
+    response = CatalogResponse.model_validate(catalog)
+    response.is_new = is_new
+    return response
+
+
+@router.get("/{site_name}", response_model=List[CatalogResponse])
+def get_catalogs(
+    site_name: str,
+    limit: int = 20,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """사이트의 카탈로그 버전 목록 (최신순)"""
+    return db.query(Catalog).filter(
+        Catalog.site_name == site_name
+    ).order_by(Catalog.version.desc()).limit(limit).all()
+
+
+@router.get("/{site_name}/{version}", response_model=CatalogResponse)
+def get_catalog_version(
+    site_name: str,
+    version: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """카탈로그 버전 하나 조회"""
+    catalog = get_catalog(db, site_name, version)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{version}이(가) 없습니다.")
+    return catalog
+
+
+@router.get("/{site_name}/{version}/urls", response_model=List[CatalogUrlGroup])
+def get_catalog_urls(
+    site_name: str,
+    version: int,
+    canonical_id: Optional[str] = None,
+    shared_only: bool = False,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """상품 정규 ID별로 이를 참조하는 카탈로그 행 (shared_only: 여러 행이 같은 상품을 가리키는 경우만)"""
+    catalog = get_catalog(db, site_name, version)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{version}이(가) 없습니다.")
+    return [
+        CatalogUrlGroup(
+            canonical_id=key,
+            entries=[CatalogEntryResponse.model_validate(entry) for entry in entries]
+        )
+        for key, entries in url_index(db, catalog, canonical_id, shared_only).items()
+    ]
+
+
+@router.get("/{site_name}/{version}/diff", response_model=CatalogDiffResponse)
+def get_catalog_diff(
+    site_name: str,
+    version: int,
+    base: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """기준 버전(기본: 직전 버전) 대비 추가·변경·삭제된 (제품, 판매처) 행"""
+    catalog = get_catalog(db, site_name, version)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{version}이(가) 없습니다.")
+    base_catalog = get_catalog(db, site_name, base) if base is not None else previous_catalog(db, catalog)
+    if base is not None and base_catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{base}이(가) 없습니다.")
+
+    diff = diff_catalogs(base_catalog, catalog)
+    return CatalogDiffResponse(
+        site_name=site_name,
+        version=catalog.version,
+        base_version=base_catalog.version if base_catalog else None,
+        added=[CatalogEntryChange(**entry._asdict()) for entry in diff.added],
+        changed=[CatalogEntryChange(**entry._asdict()) for entry in diff.changed],
+        removed=[CatalogEntryChange(**entry._asdict()) for entry in diff.removed]
+    )
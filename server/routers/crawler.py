@@ -1,11 +1,8 @@
 """크롤링 라우터"""
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import Optional
 import os
-import time
-import threading
 from datetime import datetime
 import sys
 import logging
@@ -16,160 +13,138 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from server.database import get_db
-from server.models import CrawlingJob, User
-from server.schemas import CrawlingJobCreate, CrawlingJobResponse, CrawlingProgress
+from server.models import Catalog, CrawlingJob, PriceChange, User
+from server.schemas import (
+    CrawlingJobCreate, CrawlingJobResponse, CrawlingProgress, ExportTaskResponse, PriceChangeList,
+    PriceSummary
+)
 from server.auth import get_current_active_user
-from server.config import get_data_dir
-from crawler import PriceCompareCrawler
+from server.catalogs import (
+    CatalogValidationError, catalog_cache, find_data_file, get_catalog, import_data_file, previous_catalog
+)
+from server.progress import progress_store
+from server.analytics import load_summary
+from server.exports import DELTA_WRITERS, EXPORT_FORMATS, export_path, is_format_available
+from server.export_tasks import exports_finished, find_export, job_exports, source_job_id
+from server.downloads import bytes_response, file_response
+from server.recrawl import failed_targets, job_results, scope_key
+from server.jobs import JobQueueFullError, new_crawl_job, queue_position, request_cancel, submit_job
 
 router = APIRouter(prefix="/api/crawler", tags=["crawler"])
 
-# 전역 크롤러 상태 관리
-crawler_instances = {}  # {user_id: {job_id: crawler_instance}}
 logger = logging.getLogger(__name__)
 
 
-def run_crawler_task(
-    db: Session,
-    job_id: int,
-    user_id: int,
+@router.post("/start/{site_name}", response_model=CrawlingJobResponse)
+def start_crawling(
     site_name: str,
-    config_file_path: str
+    version: Optional[int] = Query(None, description="크롤링할 카탈로그 버전 (기본: 최신)"),
+    scope: str = Query(
+        "full", pattern="^(full|changed|priority)$",
+        description="changed: 기준 버전 대비 바뀐 행만, priority: 변동성 우선순위 상위 budget개 행만"
+    ),
+    base_version: Optional[int] = Query(None, description="changed 범위의 기준 버전 (기본: 직전 버전)"),
+    budget: Optional[int] = Query(None, ge=1, description="priority 범위에서 크롤링할 행 수"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
-    """백그라운드 크롤링 작업"""
-    try:
-        job = db.query(CrawlingJob).filter(CrawlingJob.id == job_id).first()
-        if not job:
-            return
-        
-        job.status = "running"
-        job.started_at = datetime.utcnow()
-        db.commit()
-        
-        # 크롤러 인스턴스 생성
-        crawler = PriceCompareCrawler(
-            config_file=config_file_path,
-            site_name=site_name
-        )
-        
-        # 전역 상태에 저장
-        if user_id not in crawler_instances:
-            crawler_instances[user_id] = {}
-        crawler_instances[user_id][job_id] = crawler
-        
-        # 크롤링 실행
-        cancelled = crawler.run_crawling()
-        
-        if cancelled:
-            job.status = "cancelled"
-            job.progress = crawler.progress
-            job.current_product = crawler.current_product
-            job.result_file_path = None
-            job.error_message = "사용자 요청으로 취소되었습니다."
-            job.completed_at = datetime.utcnow()
-            db.commit()
-            return
-        
-        # Excel 변환
-        excel_file = crawler.export_to_excel_format()
-        
-        job.status = "completed"
-        job.progress = 100
-        job.current_product = job.total_products
-        job.result_file_path = excel_file
-        job.completed_at = datetime.utcnow()
-        db.commit()
-        
-    except Exception as e:
-        job = db.query(CrawlingJob).filter(CrawlingJob.id == job_id).first()
-        if job:
-            job.status = "failed"
-            job.error_message = str(e)
-            job.completed_at = datetime.utcnow()
-            db.commit()
-    finally:
-        # 크롤러 인스턴스 정리
-        if user_id in crawler_instances and job_id in crawler_instances[user_id]:
-            del crawler_instances[user_id][job_id]
+    """크롤링 시작 (실행 중인 작업이 있으면 대기열에 추가)
 
+    업로드된 카탈로그 버전을 그대로 참조하므로 입력 파일을 다시 읽지 않는다.
+    scope=changed면 기준 버전 대비 추가·변경된 (제품, 판매처)와 관측이 없는 행만 크롤링하고
+    나머지는 최신 관측으로 채워 전체 결과를 만든다. scope=priority도 크롤링하지 않은 행은 같은 방식으로 채운다.
+    """
+    if scope == "priority" and budget is None:
+        raise HTTPException(status_code=400, detail="priority 범위는 budget이 필요합니다.")
+    catalog = get_catalog(db, site_name, version)
+    if catalog is None and version is None:
+        # 업로드된 카탈로그가 없으면 데이터 폴더의 입력 파일을 처음 한 번 가져옴
+        found_file, search_paths = find_data_file(site_name)
+        if not found_file:
+            logger.error("Failed to locate %s file. Checked: %s", site_name, search_paths)
+            raise HTTPException(
+                status_code=404,
+                detail=(
+                    f"{site_name} 카탈로그가 없습니다. 카탈로그를 업로드하거나 "
+                    f"{site_name}_input_list.jsonl 파일을 데이터 폴더에 두세요. "
+                    f"확인한 경로: {', '.join(search_paths)}"
+                ),
+            )
+        try:
+            catalog = import_data_file(db, site_name, found_file)
+        except CatalogValidationError as e:
+            raise HTTPException(status_code=400, detail=f"{found_file}: {e}")
+        logger.info("Imported %s as %s catalog v%s", found_file, site_name, catalog.version)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{version}이(가) 없습니다.")
 
-@router.post("/start/{site_name}", response_model=CrawlingJobResponse)
-def start_crawling(
-    site_name: str,
-    background_tasks: BackgroundTasks,
+    base = None
+    if scope == "changed":
+        base = get_catalog(db, site_name, base_version) if base_version else previous_catalog(db, catalog)
+        if base is None and base_version is not None:
+            raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그 v{base_version}이(가) 없습니다.")
+
+    return _submit_job(db, new_crawl_job(
+        current_user.id, catalog, scope, base, budget if scope == "priority" else None
+    ))
+
+
+@router.post("/jobs/{job_id}/retry", response_model=CrawlingJobResponse)
+def retry_failed(
+    job_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """크롤링 시작"""
-    # 이미 실행 중인 작업이 있는지 확인
-    running_job = db.query(CrawlingJob).filter(
-        CrawlingJob.user_id == current_user.id,
-        CrawlingJob.status.in_(["running", "cancelling"])
+    """작업에서 요청 실패·가격 없음으로 끝난 (제품, 판매처)만 다시 크롤링
+
+    나머지 행은 원래 작업의 관측으로 채우므로 새 작업의 결과는 원래 작업 결과에 재시도 결과를
+    합친 전체 결과가 된다. 합친 결과는 원래 작업의 내보내기로 다시 내보내므로 원래 작업의
+    다운로드(와 ETag)도 바뀐다.
+    """
+    parent = db.query(CrawlingJob).filter(
+        CrawlingJob.id == job_id,
+        CrawlingJob.user_id == current_user.id
     ).first()
-    
-    if running_job:
-        raise HTTPException(
-            status_code=400,
-            detail="이미 크롤링이 진행 중입니다."
-        )
-    
-    # 설정 파일 경로 확인 (환경 변수 또는 상대 경로)
-    data_dir = get_data_dir()
-    logger.info("Preparing to start %s crawl. DATA_DIR=%s", site_name, data_dir)
-
-    config_file = os.path.join(data_dir, f"{site_name}_input_list.jsonl")
-    base_dir = os.path.dirname(__file__)
-    search_paths = [
-        config_file,
-        os.path.join(os.getcwd(), f"{site_name}_input_list.jsonl"),
-        os.path.join(base_dir, "data", f"{site_name}_input_list.jsonl"),
-        os.path.join(os.path.dirname(base_dir), "data", f"{site_name}_input_list.jsonl"),
-    ]
-    logger.info("Search paths for %s: %s", site_name, search_paths)
-
-    found_file = next((os.path.abspath(p) for p in search_paths if os.path.exists(p)), None)
-
-    if not found_file:
-        logger.error("Failed to locate %s file. Checked: %s", site_name, search_paths)
-        raise HTTPException(
-            status_code=404,
-            detail=(
-                f"{site_name}_input_list.jsonl 파일을 찾을 수 없습니다. "
-                f"확인한 경로: {', '.join(search_paths)}. "
-                f"DATA_DIR 환경 변수 또는 data 폴더 위치를 다시 확인해주세요."
-            ),
-        )
+    if not parent:
+        raise HTTPException(status_code=404, detail="작업이 없습니다.")
+    if parent.status not in ("completed", "exporting"):
+        raise HTTPException(status_code=409, detail="크롤링이 끝난 작업만 재시도할 수 있습니다.")
+    if not exports_finished(job_exports(db, parent)):
+        raise HTTPException(status_code=409, detail="결과 파일 생성이 끝난 뒤 재시도할 수 있습니다.")
+    catalog = None
+    if parent.catalog_id:
+        catalog = db.query(Catalog).filter(Catalog.id == parent.catalog_id).first()
+    if catalog is None:
+        raise HTTPException(status_code=400, detail="카탈로그 버전이 없는 작업은 재시도할 수 없습니다.")
 
-    config_file = found_file
-    
-    # 새 작업 생성
+    if not failed_targets(catalog_cache.get(catalog), job_results(db, parent)):
+        raise HTTPException(status_code=400, detail="재시도할 실패 행이 없습니다.")
+
+    # 같은 작업의 재시도끼리만 합류
     new_job = CrawlingJob(
         user_id=current_user.id,
-        site_name=site_name,
-        status="pending"
+        site_name=parent.site_name,
+        status="pending",
+        catalog_id=catalog.id,
+        catalog_hash=scope_key(catalog.content_hash, "retry", f"job:{source_job_id(db, parent)}"),
+        config_file_path=catalog.file_path,
+        total_products=catalog.product_count,
+        scope="retry",
+        parent_job_id=parent.id
     )
-    db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
-    
-    # 제품 수 확인 (크롤러로)
-    crawler_temp = PriceCompareCrawler(config_file=config_file, site_name=site_name)
-    products = crawler_temp.load_products()
-    new_job.total_products = len(products)
-    db.commit()
-    
-    # 백그라운드 작업 시작 (정규화된 경로 전달)
-    config_file_path = os.path.abspath(config_file) if not os.path.isabs(config_file) else config_file
-    background_tasks.add_task(
-        run_crawler_task,
-        db=db,
-        job_id=new_job.id,
-        user_id=current_user.id,
-        site_name=site_name,
-        config_file_path=config_file_path
-    )
-    
-    return new_job
+    return _submit_job(db, new_job)
+
+
+def _submit_job(db: Session, new_job: CrawlingJob) -> CrawlingJobResponse:
+    """새 작업을 저장하고 최근 결과를 재사용하거나 대기열에 추가"""
+    try:
+        position = submit_job(db, new_job)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    response = CrawlingJobResponse.model_validate(new_job)
+    response.queue_position = position
+    return response
 
 
 @router.get("/progress", response_model=CrawlingProgress)
@@ -193,17 +168,22 @@ def get_progress(
             elapsed_time=0
         )
     
-    # 크롤러 인스턴스에서 진행률 가져오기 (실행 중일 때만)
-    if (
-        job.status in ("running", "cancelling")
-        and current_user.id in crawler_instances
-        and job.id in crawler_instances[current_user.id]
-    ):
-        crawler = crawler_instances[current_user.id][job.id]
-        progress_data = crawler.get_progress()
-        job.progress = progress_data["percentage"]
-        job.current_product = progress_data["current"]
-        db.commit()
+    progress = job.progress
+    current = job.current_product
+
+    # 실행 중이면 리더 작업의 진행률 사용 (DB 쓰기 없음)
+    # 이 프로세스가 실행 중이면 메모리 저장소에서, 아니면 주기적으로 반영된 DB 값에서 읽는다
+    if job.status in ("running", "cancelling"):
+        leader_id = job.coalesced_into_id or job.id
+        snapshot = progress_store.get(leader_id)
+        if snapshot:
+            progress = snapshot.percentage
+            current = snapshot.current
+        elif leader_id != job.id:
+            leader = db.query(CrawlingJob).filter(CrawlingJob.id == leader_id).first()
+            if leader:
+                progress = leader.progress
+                current = leader.current_product
     
     # 경과 시간 계산 (timezone-aware 안전 처리)
     def _to_naive(dt: Optional[datetime]) -> Optional[datetime]:
@@ -220,44 +200,196 @@ def get_progress(
     else:
         elapsed_time = 0
     
+    export_progress = None
+    if job.status == "exporting" and job.result_file_path:
+        excel_task = find_export(db, job.result_file_path)
+        export_progress = excel_task.progress if excel_task else 0
+
     return CrawlingProgress(
         status=job.status,
-        progress=job.progress,
-        current=job.current_product,
+        progress=progress,
+        current=current,
         total=job.total_products,
         is_crawling=(job.status in ("running", "cancelling")),
-        elapsed_time=elapsed_time
+        elapsed_time=elapsed_time,
+        queue_position=queue_position(db, job),
+        export_progress=export_progress
     )
 
 
 @router.get("/download")
 def download_file(
+    request: Request,
+    job_id: Optional[int] = None,
+    fmt: str = Query("xlsx", alias="format"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Excel 파일 다운로드"""
-    # 가장 최근 완료된 작업 조회
-    job = db.query(CrawlingJob).filter(
+    """결과 파일 다운로드 (format: xlsx, csv, jsonl.gz, parquet, job_id가 없으면 가장 최근 작업)
+
+    내용 해시를 ETag로 사용하며 조건부 요청(304)과 Range(206)를 지원한다.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 형식입니다: {fmt} (가능: {', '.join(EXPORT_FORMATS)})"
+        )
+    if not is_format_available(fmt):
+        raise HTTPException(status_code=400, detail=f"{fmt} 형식을 사용할 수 없습니다.")
+
+    # 가장 최근 완료된(또는 파일 생성 중인) 작업 조회
+    query = db.query(CrawlingJob).filter(
         CrawlingJob.user_id == current_user.id,
-        CrawlingJob.status == "completed"
-    ).order_by(CrawlingJob.completed_at.desc()).first()
+        CrawlingJob.status.in_(["completed", "exporting"])
+    )
+    if job_id is not None:
+        query = query.filter(CrawlingJob.id == job_id)
+    job = query.order_by(CrawlingJob.created_at.desc(), CrawlingJob.id.desc()).first()
     
     if not job or not job.result_file_path:
         raise HTTPException(
             status_code=404,
             detail="다운로드할 파일이 없습니다."
         )
-    
-    if not os.path.exists(job.result_file_path):
+
+    file_path = export_path(job.result_file_path, fmt)
+    task = find_export(db, file_path)
+    if task and task.status in ("pending", "running"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"{fmt} 파일을 생성 중입니다. ({task.progress}%)"
+        )
+    if task and task.status == "failed":
+        raise HTTPException(
+            status_code=404,
+            detail=f"{fmt} 파일 생성에 실패했습니다: {task.error_message}"
+        )
+
+    # 내용 해시 저장소에 있으면 그 파일을, 아니면 (이전 작업) 원래 경로의 파일을 전송
+    if task and task.stored_path and os.path.exists(task.stored_path):
+        serve_path = task.stored_path
+        etag, last_modified, size = task.content_hash, task.completed_at, task.size
+    else:
+        serve_path = file_path
+        etag, last_modified, size = None, None, None
+    if not os.path.exists(serve_path):
         raise HTTPException(
             status_code=404,
             detail="파일이 존재하지 않습니다."
         )
-    
-    return FileResponse(
-        job.result_file_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=os.path.basename(job.result_file_path)
+
+    return file_response(
+        request,
+        serve_path,
+        media_type=EXPORT_FORMATS[fmt].media_type,
+        filename=os.path.basename(file_path),
+        etag=etag,
+        last_modified=last_modified,
+        size=size
+    )
+
+
+@router.get("/exports", response_model=list[ExportTaskResponse])
+def get_exports(
+    job_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """작업의 형식별 내보내기 상태 조회 (job_id가 없으면 가장 최근 작업)"""
+    query = db.query(CrawlingJob).filter(CrawlingJob.user_id == current_user.id)
+    if job_id is not None:
+        query = query.filter(CrawlingJob.id == job_id)
+    job = query.order_by(CrawlingJob.created_at.desc(), CrawlingJob.id.desc()).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="작업이 없습니다.")
+
+    return job_exports(db, job)
+
+
+@router.get("/summary", response_model=PriceSummary)
+def get_price_summary(
+    job_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """완료된 작업의 가격 분석 요약 조회 (job_id가 없으면 가장 최근 작업)"""
+    query = db.query(CrawlingJob).filter(
+        CrawlingJob.user_id == current_user.id,
+        CrawlingJob.status == "completed"
+    )
+    if job_id is not None:
+        query = query.filter(CrawlingJob.id == job_id)
+    job = query.order_by(CrawlingJob.completed_at.desc()).first()
+
+    if not job or not job.result_file_path:
+        raise HTTPException(status_code=404, detail="완료된 작업이 없습니다.")
+
+    summary = load_summary(job.result_file_path)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="가격 분석 결과가 없습니다.")
+
+    return PriceSummary(job_id=job.id, **summary)
+
+
+def _changed_job(db: Session, user: User, job_id: Optional[int]) -> CrawlingJob:
+    """가격 변동을 조회할 작업 (job_id가 없으면 가장 최근에 크롤링이 끝난 작업)"""
+    query = db.query(CrawlingJob).filter(
+        CrawlingJob.user_id == user.id,
+        CrawlingJob.status.in_(["completed", "exporting"])
+    )
+    if job_id is not None:
+        query = query.filter(CrawlingJob.id == job_id)
+    job = query.order_by(CrawlingJob.created_at.desc(), CrawlingJob.id.desc()).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="완료된 작업이 없습니다.")
+    return job
+
+
+def _price_changes(db: Session, source_id: int, change_type: Optional[str]):
+    query = db.query(PriceChange).filter(PriceChange.job_id == source_id)
+    if change_type:
+        query = query.filter(PriceChange.change_type == change_type)
+    return query.order_by(PriceChange.id)
+
+
+@router.get("/changes", response_model=PriceChangeList)
+def get_price_changes(
+    job_id: Optional[int] = None,
+    change_type: Optional[str] = Query(None, pattern="^(changed|new|available|unavailable)$"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """직전 실행 대비 가격이 바뀐 (제품, 판매처) 목록"""
+    job = _changed_job(db, current_user, job_id)
+    source_id = source_job_id(db, job)
+    changes = _price_changes(db, source_id, change_type).all()
+    return PriceChangeList(job_id=job.id, source_job_id=source_id, total=len(changes), changes=changes)
+
+
+@router.get("/changes/download")
+def download_price_changes(
+    job_id: Optional[int] = None,
+    fmt: str = Query("xlsx", alias="format"),
+    change_type: Optional[str] = Query(None, pattern="^(changed|new|available|unavailable)$"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """가격 변동(델타) 파일 다운로드 (format: xlsx, csv, 바뀐 행만 포함)"""
+    if fmt not in DELTA_WRITERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 형식입니다: {fmt} (가능: {', '.join(DELTA_WRITERS)})"
+        )
+    job = _changed_job(db, current_user, job_id)
+    source_id = source_job_id(db, job)
+    content = DELTA_WRITERS[fmt](_price_changes(db, source_id, change_type).yield_per(1000))
+
+    base = os.path.splitext(os.path.basename(job.result_file_path or f"{job.site_name}_{job.id}"))[0]
+    return bytes_response(
+        content,
+        media_type=EXPORT_FORMATS[fmt].media_type,
+        filename=f"{base}_가격변동{EXPORT_FORMATS[fmt].extension}"
     )
 
 
@@ -289,22 +421,4 @@ def cancel_job(
     if not job:
         raise HTTPException(status_code=404, detail="취소할 진행 중인 작업이 없습니다.")
     
-    user_jobs = crawler_instances.get(current_user.id, {})
-    crawler = user_jobs.get(job.id)
-    
-    if crawler:
-        crawler.request_cancel()
-        job.status = "cancelling"
-    else:
-        # 아직 실행되지 않았거나 이미 종료된 경우
-        job.status = "cancelled"
-        job.progress = job.progress or 0
-        job.current_product = job.current_product or 0
-        job.completed_at = datetime.utcnow()
-        job.error_message = "사용자 요청으로 취소되었습니다."
-    
-    db.commit()
-    db.refresh(job)
-    
-    return job
-
+    return request_cancel(db, job)
@@ -0,0 +1,218 @@
+"""가격 조회 라우터"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '../..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.database import get_db
+from server.models import LatestPrice, User
+from server.schemas import (
+    EntryPriorityResponse, LatestSellerPrice, PriceHistoryBucket, PriceHistoryPage, ProductLatestPrices
+)
+from server.auth import get_current_active_user
+from server.observations import canonical_product_ids, latest_prices_for, price_history
+from server.catalogs import catalog_cache, get_catalog
+from server.priorities import entry_priorities
+from crawler import summarize_prices
+
+router = APIRouter(prefix="/api/prices", tags=["prices"])
+
+# 한 번에 조회할 수 있는 제품 수
+MAX_BULK_PRODUCTS = int(os.getenv("MAX_BULK_PRODUCTS", "500"))
+# 가격 이력 기본 조회 기간 (일)
+HISTORY_DEFAULT_DAYS = int(os.getenv("HISTORY_DEFAULT_DAYS", "30"))
+# 가격 이력 한 페이지 최대 항목 수
+HISTORY_MAX_PAGE_SIZE = 5000
+
+
+def _parse_product_ids(product_ids: str) -> List[str]:
+    """쉼표로 구분한 제품 ID 목록 확인"""
+    ids = [product_id.strip() for product_id in product_ids.split(",") if product_id.strip()]
+    if not ids:
+        raise HTTPException(status_code=400, detail="제품 ID를 입력하세요.")
+    if len(ids) > MAX_BULK_PRODUCTS:
+        raise HTTPException(
+            status_code=400, detail=f"한 번에 최대 {MAX_BULK_PRODUCTS}개 제품까지 조회할 수 있습니다."
+        )
+    return ids
+
+
+def _history_page(
+    db: Session,
+    product_ids: List[str],
+    interval: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    site_name: Optional[str],
+    seller: Optional[str],
+    cursor: Optional[str],
+    limit: int,
+    canonical_id: Optional[str] = None
+) -> PriceHistoryPage:
+    """가격 이력 한 페이지 조회 (기간 기본값: 최근 HISTORY_DEFAULT_DAYS일, UTC)"""
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=HISTORY_DEFAULT_DAYS)
+    if end.tzinfo:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    if start.tzinfo:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="조회 시작 시각이 종료 시각보다 빨라야 합니다.")
+
+    try:
+        items, next_cursor = price_history(
+            db, product_ids, interval, start, end,
+            site_name=site_name, seller=seller, cursor=cursor, limit=limit, canonical_id=canonical_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PriceHistoryPage(
+        interval=interval,
+        start=start,
+        end=end,
+        items=[PriceHistoryBucket(**item._asdict()) for item in items],
+        next_cursor=next_cursor
+    )
+
+
+def _seller_order(entry: LatestPrice):
+    """Waffle 먼저, 이후 최종 가격 오름차순 (가격 없음은 뒤로)"""
+    return (entry.seller != "waffle", entry.final_price is None, entry.final_price or 0, entry.seller)
+
+
+def _product_latest(product_id: str, site_name: str, entries: List[LatestPrice]) -> ProductLatestPrices:
+    """판매처별 최신 가격으로 제품의 현재 가격 비교 구성"""
+    entries = sorted(entries, key=_seller_order)
+    summary = summarize_prices([
+        {"seller": entry.seller, "최종 가격": entry.final_price} for entry in entries
+    ])
+    return ProductLatestPrices(
+        product_id=product_id,
+        site_name=site_name,
+        product_name=next((entry.product_name for entry in entries if entry.product_name), None),
+        observed_at=max(entry.observed_at for entry in entries),
+        waffle_price=summary["waffle_price"],
+        min_competitor=summary["min_competitor"],
+        min_competitor_price=summary["min_competitor_price"],
+        price_gap=summary["price_gap"],
+        rank=summary["rank"],
+        inversion=summary["inversion"],
+        sellers=[LatestSellerPrice.model_validate(entry) for entry in entries]
+    )
+
+
+@router.get("/latest", response_model=List[ProductLatestPrices])
+def get_latest_prices(
+    product_ids: str = Query(..., description="쉼표로 구분한 제품 ID"),
+    site_name: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """여러 제품의 최신 가격 조회 (관측이 없는 제품은 생략)"""
+    groups = latest_prices_for(db, _parse_product_ids(product_ids), site_name)
+    return [
+        _product_latest(product_id, site, entries)
+        for (product_id, site), entries in groups.items()
+    ]
+
+
+@router.get("/priorities", response_model=List[EntryPriorityResponse])
+def get_crawl_priorities(
+    site_name: str,
+    version: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """카탈로그(기본: 최신 버전) 행의 변동성 크롤링 우선순위 (높은 순, scope=priority가 고르는 순서)"""
+    catalog = get_catalog(db, site_name, version)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"{site_name} 카탈로그가 없습니다.")
+    return [
+        EntryPriorityResponse(**{
+            **entry._asdict(),
+            "score": None if entry.age_hours is None else entry.score
+        })
+        for entry in entry_priorities(db, site_name, catalog_cache.get(catalog))[:limit]
+    ]
+
+
+@router.get("/{product_id}/latest", response_model=List[ProductLatestPrices])
+def get_product_latest_prices(
+    product_id: str,
+    site_name: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """제품 하나의 최신 가격 조회 (사이트별 하나씩)"""
+    groups = latest_prices_for(db, [product_id], site_name)
+    if not groups:
+        raise HTTPException(status_code=404, detail="가격 관측 기록이 없습니다.")
+    return [
+        _product_latest(pid, site, entries)
+        for (pid, site), entries in groups.items()
+    ]
+
+
+@router.get("/history", response_model=PriceHistoryPage)
+def get_prices_history(
+    product_ids: str = Query(..., description="쉼표로 구분한 제품 ID"),
+    interval: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    site_name: Optional[str] = None,
+    seller: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """여러 제품의 판매처별 시간 구간 최저·평균·최고 가격 (next_cursor로 다음 페이지)"""
+    return _history_page(
+        db, _parse_product_ids(product_ids), interval, start, end, site_name, seller, cursor, limit
+    )
+
+
+@router.get("/{product_id}/history", response_model=PriceHistoryPage)
+def get_product_price_history(
+    product_id: str,
+    interval: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    site_name: Optional[str] = None,
+    seller: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """제품 하나의 판매처별 시간 구간 최저·평균·최고 가격"""
+    return _history_page(db, [product_id], interval, start, end, site_name, seller, cursor, limit)
+
+
+@router.get("/urls/{canonical_id}/history", response_model=PriceHistoryPage)
+def get_url_price_history(
+    canonical_id: str,
+    interval: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    site_name: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """상품 URL 정규 ID(예: ssg:1000035622592)의 시간 구간 가격 (이를 참조한 제품·판매처별)"""
+    product_ids = canonical_product_ids(db, canonical_id, MAX_BULK_PRODUCTS)
+    if not product_ids:
+        raise HTTPException(status_code=404, detail="가격 관측 기록이 없습니다.")
+    return _history_page(
+        db, product_ids, interval, start, end, site_name, None, cursor, limit, canonical_id
+    )
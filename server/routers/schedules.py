@@ -0,0 +1,159 @@
+"""크롤링 예약 라우터"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+import os
+import re
+import sys
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '../..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from server.database import get_db
+from server.models import CrawlingJob, CrawlSchedule, User
+from server.schemas import (
+    CrawlingJobResponse, CrawlScheduleCreate, CrawlScheduleResponse, CrawlScheduleUpdate
+)
+from server.auth import get_current_active_user
+from server.catalogs import get_catalog
+from server.routers.catalogs import SITE_NAME_PATTERN
+from server.schedules import (
+    SCHEDULE_DEFAULT_JITTER, SCHEDULE_SCOPES, CronExpression, next_run_time, run_schedule
+)
+
+router = APIRouter(prefix="/api/schedules", tags=["schedules"])
+
+
+def _get_schedule(db: Session, user: User, schedule_id: int) -> CrawlSchedule:
+    """사용자의 예약 조회 (관리자는 모든 예약)"""
+    query = db.query(CrawlSchedule).filter(CrawlSchedule.id == schedule_id)
+    if not user.is_admin:
+        query = query.filter(CrawlSchedule.user_id == user.id)
+    schedule = query.first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="예약이 없습니다.")
+    return schedule
+
+
+def _validate(db: Session, schedule: CrawlSchedule):
+    """예약 설정 검증 (올바르지 않으면 400)"""
+    if not re.match(SITE_NAME_PATTERN, schedule.site_name):
+        raise HTTPException(status_code=400, detail=f"사이트 이름이 올바르지 않습니다: {schedule.site_name}")
+    if schedule.scope not in SCHEDULE_SCOPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 범위입니다: {schedule.scope} (가능: {', '.join(SCHEDULE_SCOPES)})"
+        )
+    if schedule.scope == "priority" and not schedule.requests_per_hour:
+        raise HTTPException(status_code=400, detail="priority 범위는 requests_per_hour가 필요합니다.")
+    if schedule.requests_per_hour is not None and schedule.requests_per_hour < 1:
+        raise HTTPException(status_code=400, detail="requests_per_hour는 1 이상이어야 합니다.")
+    if schedule.jitter_seconds < 0:
+        raise HTTPException(status_code=400, detail="jitter_seconds는 0 이상이어야 합니다.")
+    try:
+        CronExpression(schedule.cron)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if schedule.catalog_version is not None and get_catalog(
+        db, schedule.site_name, schedule.catalog_version
+    ) is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"{schedule.site_name} 카탈로그 v{schedule.catalog_version}이(가) 없습니다."
+        )
+
+
+@router.post("", response_model=CrawlScheduleResponse)
+def create_schedule(
+    request: CrawlScheduleCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """반복 크롤링 예약 생성 (cron: 분 시 일 월 요일, 서버 로컬 시각)
+
+    실행 시각은 예약 시각 뒤 jitter_seconds 안에서 예약마다 다르게 늦춰진다.
+    """
+    schedule = CrawlSchedule(
+        user_id=current_user.id,
+        site_name=request.site_name,
+        catalog_version=request.catalog_version,
+        cron=" ".join(request.cron.split()),
+        scope=request.scope,
+        requests_per_hour=request.requests_per_hour,
+        jitter_seconds=SCHEDULE_DEFAULT_JITTER if request.jitter_seconds is None else request.jitter_seconds,
+        enabled=request.enabled
+    )
+    _validate(db, schedule)
+    db.add(schedule)
+    db.flush()  # 흩뜨림 계산에 예약 ID 사용
+    schedule.next_run_at = next_run_time(schedule)
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.get("", response_model=List[CrawlScheduleResponse])
+def get_schedules(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """예약 목록 (관리자는 모든 사용자의 예약)"""
+    query = db.query(CrawlSchedule)
+    if not current_user.is_admin:
+        query = query.filter(CrawlSchedule.user_id == current_user.id)
+    return query.order_by(CrawlSchedule.id).all()
+
+
+@router.patch("/{schedule_id}", response_model=CrawlScheduleResponse)
+def update_schedule(
+    schedule_id: int,
+    request: CrawlScheduleUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """예약 수정 (cron·흩뜨림이 바뀌거나 다시 켜면 다음 실행 시각을 새로 계산)"""
+    schedule = _get_schedule(db, current_user, schedule_id)
+    changes = request.model_dump(exclude_unset=True)
+    if changes.get("cron"):
+        changes["cron"] = " ".join(changes["cron"].split())
+    for name, value in changes.items():
+        if name in ("catalog_version", "requests_per_hour") or value is not None:
+            setattr(schedule, name, value)
+    _validate(db, schedule)
+    if {"cron", "jitter_seconds", "enabled"} & set(changes):
+        schedule.next_run_at = next_run_time(schedule)
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.delete("/{schedule_id}")
+def delete_schedule(
+    schedule_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """예약 삭제 (이미 만든 작업은 그대로 둠)"""
+    schedule = _get_schedule(db, current_user, schedule_id)
+    db.query(CrawlingJob).filter(CrawlingJob.schedule_id == schedule.id).update(
+        {"schedule_id": None}, synchronize_session=False
+    )
+    db.delete(schedule)
+    db.commit()
+    return {"message": "예약이 삭제되었습니다."}
+
+
+@router.post("/{schedule_id}/run", response_model=CrawlingJobResponse)
+def run_schedule_now(
+    schedule_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """예약을 지금 한 번 실행 (다음 예약 시각은 그대로)"""
+    schedule = _get_schedule(db, current_user, schedule_id)
+    job = run_schedule(db, schedule)
+    if job is None:
+        raise HTTPException(status_code=409, detail=schedule.last_error)
+    return job
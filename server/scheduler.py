@@ -0,0 +1,225 @@
+"""공정 작업 스케줄러
+
+모든 크롤링 작업이 하나의 요청 워커 풀을 공유한다. 작업마다 레인(TaskLane)을 열고,
+워커는 가중 라운드 로빈으로 레인을 돌며 작업을 꺼내므로 큰 작업이 작은 작업을
+굶기지 않는다. 레인 가중치는 작업 수가 적을수록 크게 줘(lane_weight) 작은 작업이
+큰 작업 뒤에서 오래 기다리지 않고 먼저 끝나게 한다.
+"""
+from collections import deque
+from concurrent.futures import Future, wait as wait_futures
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+import math
+import os
+import random
+import threading
+import logging
+
+# 작업 수가 가장 적은 레인의 가중치 (작업 수가 10배 늘 때마다 1씩 낮아지며 최소 1)
+LANE_MAX_WEIGHT = max(1, int(os.getenv("LANE_MAX_WEIGHT", "4")))
+
+logger = logging.getLogger(__name__)
+
+
+def lane_weight(task_count: int) -> int:
+    """작업 수에 따른 레인 가중치 (1~9개: LANE_MAX_WEIGHT, 10~99개: 1 낮음, ...)"""
+    return max(1, LANE_MAX_WEIGHT - int(math.log10(max(1, task_count))))
+
+
+def spread_task_order(seed: str) -> Callable[[List[Dict]], List[int]]:
+    """seed마다 다른 제품 제출 순서 (크롤러의 task_order, 결과 파일은 카탈로그 순서 그대로)"""
+    def order(products: List[Dict]) -> List[int]:
+        indices = list(range(len(products)))
+        random.Random(seed).shuffle(indices)
+        return indices
+    return order
+
+
+def longest_first_order(
+    durations: List[float],
+    hosts: List[FrozenSet[str]],
+    seed: Optional[str] = None,
+    bucket_ratio: float = 1.0
+) -> List[int]:
+    """예상 시간이 긴 작업부터, 호스트가 겹치는 작업이 연달아 오지 않게 번갈아 고른 제출 순서
+
+    hosts는 작업별로 요청하는 호스트 전체의 집합이다. 같은 호스트 집합끼리 대기열을 예상 시간
+    내림차순으로 만들고, 매번 직전 작업과 호스트가 하나도 겹치지 않는 대기열 중 맨 앞 작업이
+    가장 긴 대기열에서 꺼낸다(겹치지 않는 대기열이 없으면 전체 중에서).
+
+    seed가 있으면 예상 시간을 bucket_ratio배 간격의 구간으로 나눠 같은 구간 안의 순서를 seed마다
+    섞는다. 구간 사이의 순서(긴 구간 먼저)는 그대로이므로, 예약 작업은 실행마다 순서가 바뀌면서도
+    긴 작업을 먼저 제출한다. bucket_ratio가 1이면 예상 시간이 같은 작업끼리만 섞는다.
+    """
+    def length(idx: int) -> float:
+        duration = durations[idx]
+        if seed is None or bucket_ratio <= 1:
+            return duration
+        if duration <= 0:
+            return -math.inf
+        return math.floor(math.log(duration, bucket_ratio))
+
+    indices = list(range(len(durations)))
+    if seed is not None:
+        random.Random(seed).shuffle(indices)
+    indices.sort(key=lambda idx: -length(idx))
+    rank = {idx: position for position, idx in enumerate(indices)}
+
+    queues: Dict[FrozenSet[str], Deque[int]] = {}
+    for idx in indices:
+        queues.setdefault(frozenset(hosts[idx]), deque()).append(idx)
+
+    order: List[int] = []
+    last_hosts: FrozenSet[str] = frozenset()
+    while queues:
+        candidates = [key for key in queues if not key & last_hosts] or list(queues)
+        key = min(candidates, key=lambda name: rank[queues[name][0]])
+        order.append(queues[key].popleft())
+        if not queues[key]:
+            del queues[key]
+        last_hosts = key
+    return order
+
+
+class TaskLane:
+    """작업 하나에 대응하는 대기열 (ThreadPoolExecutor와 같은 submit/shutdown 인터페이스)"""
+
+    def __init__(
+        self,
+        scheduler: "FairTaskScheduler",
+        name: str,
+        weight: int = 1,
+        max_inflight: Optional[int] = None
+    ):
+        self.scheduler = scheduler
+        self.name = name
+        self.weight = max(1, weight)
+        self.max_inflight = max_inflight
+        self.credits = 0
+        self.inflight = 0
+        self.tasks: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self._futures: List[Future] = []
+        self.closed = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """작업 제출"""
+        future = Future()
+        with self.scheduler._cond:
+            if self.closed:
+                raise RuntimeError(f"레인 {self.name}이(가) 이미 종료되었습니다.")
+            self.tasks.append((future, fn, args, kwargs))
+            self._futures.append(future)
+            self.scheduler._cond.notify()
+        return future
+
+    def is_ready(self) -> bool:
+        if not self.tasks:
+            return False
+        return self.max_inflight is None or self.inflight < self.max_inflight
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """레인 종료 (wait=True면 제출된 작업이 모두 끝날 때까지 대기)"""
+        with self.scheduler._cond:
+            if cancel_futures:
+                while self.tasks:
+                    future, _, _, _ = self.tasks.popleft()
+                    future.cancel()
+            self.closed = True
+        if wait:
+            wait_futures(self._futures)
+        self.scheduler._close_lane(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
+
+
+class FairTaskScheduler:
+    """레인 간 가중 라운드 로빈으로 작업을 실행하는 공유 워커 풀"""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._lanes: Deque[TaskLane] = deque()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self):
+        """워커 스레드 시작"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"crawl-fetch-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self, timeout: float = 5.0):
+        """워커 스레드 종료 (대기 중인 작업은 취소)"""
+        with self._cond:
+            self._stopping = True
+            for lane in self._lanes:
+                while lane.tasks:
+                    future, _, _, _ = lane.tasks.popleft()
+                    future.cancel()
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def open_lane(self, name: str, weight: int = 1, max_inflight: Optional[int] = None) -> TaskLane:
+        """새 레인 등록"""
+        lane = TaskLane(self, name, weight=weight, max_inflight=max_inflight)
+        with self._cond:
+            self._lanes.append(lane)
+        return lane
+
+    def _close_lane(self, lane: TaskLane):
+        with self._cond:
+            if lane in self._lanes and not lane.tasks and lane.inflight == 0:
+                self._lanes.remove(lane)
+
+    def _next_task(self):
+        """가중 라운드 로빈으로 다음 작업 선택 (락을 잡은 상태에서 호출)"""
+        for _ in range(len(self._lanes)):
+            lane = self._lanes[0]
+            if not lane.is_ready():
+                lane.credits = 0
+                self._lanes.rotate(-1)
+                continue
+            if lane.credits <= 0:
+                lane.credits = lane.weight
+            lane.credits -= 1
+            if lane.credits == 0:
+                self._lanes.rotate(-1)
+            lane.inflight += 1
+            return lane, lane.tasks.popleft()
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                picked = self._next_task()
+                while picked is None and not self._stopping:
+                    self._cond.wait()
+                    picked = self._next_task()
+                if picked is None:
+                    return
+            lane, (future, fn, args, kwargs) = picked
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._cond:
+                lane.inflight -= 1
+                if lane.closed and not lane.tasks and lane.inflight == 0 and lane in self._lanes:
+                    self._lanes.remove(lane)
+                self._cond.notify_all()
@@ -0,0 +1,276 @@
+"""반복 크롤링 예약
+
+예약마다 cron 식(분 시 일 월 요일, 서버 로컬 시각)으로 크롤링 작업을 만든다.
+
+- 부하 분산: 실행 시각은 예약 시각 뒤 jitter_seconds 구간 안에서 (예약, 예약 시각)별로
+  정해진 만큼 늦춰, 같은 정각에 잡힌 여러 카탈로그의 크롤링이 동시에 시작하지 않는다.
+  예약 작업은 제품 제출 순서도 실행마다 섞어 같은 상품 페이지를 한꺼번에 요청하지 않는다.
+- 대기열 연동: 예약 작업도 일반 작업처럼 submit_job으로 들어가므로 같은 카탈로그를
+  크롤링 중이면 합류하고, 최근 결과가 있으면 재사용하며, 사용자·사이트별 한도를 따른다.
+  scope=changed 예약은 직전 버전 대비 바뀐 행과 관측이 없는 행만 크롤링한다.
+  scope=priority 예약은 시간당 요청 예산(requests_per_hour) × 예약 간격만큼 변동성 우선순위가
+  높은 행부터 크롤링한다.
+- 여러 프로세스: 각 프로세스의 예약 스레드가 next_run_at 조건부 UPDATE로 실행을 선점하므로
+  예약 하나는 한 번만 실행된다. 서버가 멈춰 놓친 실행은 몰아서 실행하지 않고 한 번만 실행한다.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+import hashlib
+import math
+import os
+import sys
+import threading
+import logging
+
+# 프로젝트 루트 경로 추가
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy.orm import Session
+
+from server.catalogs import get_catalog, previous_catalog
+from server.database import SessionLocal
+from server.jobs import JobQueueFullError, new_crawl_job, submit_job
+from server.models import CrawlingJob, CrawlSchedule
+
+# 예약 확인 주기 (초)
+SCHEDULE_POLL_INTERVAL = float(os.getenv("SCHEDULE_POLL_INTERVAL", "30"))
+# 예약을 만들 때 jitter_seconds를 지정하지 않으면 쓰는 값 (초)
+SCHEDULE_DEFAULT_JITTER = int(os.getenv("SCHEDULE_DEFAULT_JITTER", "900"))
+
+SCHEDULE_SCOPES = ("full", "changed", "priority")
+
+logger = logging.getLogger(__name__)
+
+
+class CronExpression:
+    """5필드 cron 식 (분 시 일 월 요일)
+
+    필드마다 *, 숫자, 범위(a-b), 간격(*/n, a-b/n), 목록(a,b)을 지원한다.
+    요일은 0(일)~6(토)이며 7도 일요일이다. 일과 요일이 모두 *가 아니면 둘 중 하나만 맞아도 된다.
+    """
+
+    FIELDS = (("분", 0, 59), ("시", 0, 23), ("일", 1, 31), ("월", 1, 12), ("요일", 0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = " ".join(expression.split())
+        fields = self.expression.split(" ")
+        if len(fields) != len(self.FIELDS):
+            raise ValueError("cron 식은 '분 시 일 월 요일' 5개 필드여야 합니다.")
+        parsed = [
+            self._parse_field(field, name, low, high)
+            for field, (name, low, high) in zip(fields, self.FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, name: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                if not step_text.isdigit() or int(step_text) < 1:
+                    raise ValueError(f"{name} 필드의 간격이 올바르지 않습니다: {field}")
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                if not (start_text.isdigit() and end_text.isdigit()):
+                    raise ValueError(f"{name} 필드가 올바르지 않습니다: {field}")
+                start, end = int(start_text), int(end_text)
+            elif part.isdigit():
+                start = end = int(part)
+                if step > 1:
+                    end = high
+            else:
+                raise ValueError(f"{name} 필드가 올바르지 않습니다: {field}")
+            if start < low or end > high or start > end:
+                raise ValueError(f"{name} 필드는 {low}~{high} 범위여야 합니다: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, value: datetime) -> bool:
+        day_ok = value.day in self.days
+        weekday_ok = (value.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """after보다 늦은 첫 예약 시각 (분 단위)"""
+        value = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = value + timedelta(days=366 * 5)
+        while value < limit:
+            if value.month not in self.months:
+                value = (value.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(value):
+                value = (value + timedelta(days=1)).replace(hour=0, minute=0)
+            elif value.hour not in self.hours:
+                value = (value + timedelta(hours=1)).replace(minute=0)
+            elif value.minute not in self.minutes:
+                value += timedelta(minutes=1)
+            else:
+                return value
+        raise ValueError(f"실행 시각이 없는 cron 식입니다: {self.expression}")
+
+
+def _to_local(value: datetime) -> datetime:
+    """UTC (naive) -> 서버 로컬 시각 (naive)"""
+    return value.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def _to_utc(value: datetime) -> datetime:
+    """서버 로컬 시각 (naive) -> UTC (naive)"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _as_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def start_offset(schedule_id: int, slot: datetime, jitter_seconds: int) -> int:
+    """예약 시각 뒤로 늦추는 시간 (초, 같은 예약·예약 시각이면 어느 프로세스에서나 같음)"""
+    if not jitter_seconds or jitter_seconds <= 0:
+        return 0
+    digest = hashlib.sha256(f"{schedule_id}:{slot.isoformat()}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % (jitter_seconds + 1)
+
+
+def next_run_time(schedule: CrawlSchedule, after: Optional[datetime] = None) -> datetime:
+    """after(UTC, 기본: 지금)보다 늦은 첫 실행 시각 (예약 시각 + 흩뜨림, UTC)
+
+    흩뜨림 구간이 예약 간격보다 길어도 예약 시각을 건너뛰지 않도록
+    after - jitter_seconds 이후의 예약 시각부터 차례로 본다.
+    """
+    after = _as_naive(after) if after else datetime.utcnow()
+    cron = CronExpression(schedule.cron)
+    jitter = schedule.jitter_seconds or 0
+    local = _to_local(after - timedelta(seconds=jitter))
+    while True:
+        local = cron.next_after(local)
+        slot = _to_utc(local)
+        run_at = slot + timedelta(seconds=start_offset(schedule.id, slot, jitter))
+        if run_at > after:
+            return run_at
+
+
+def run_budget(schedule: CrawlSchedule, now: Optional[datetime] = None) -> int:
+    """priority 예약 한 번의 요청 예산 (시간당 예산 × 다음 예약 간격)"""
+    cron = CronExpression(schedule.cron)
+    slot = cron.next_after(_to_local(_as_naive(now) if now else datetime.utcnow()))
+    hours = (cron.next_after(slot) - slot).total_seconds() / 3600
+    return max(1, math.ceil((schedule.requests_per_hour or 0) * hours))
+
+
+def run_schedule(db: Session, schedule: CrawlSchedule) -> Optional[CrawlingJob]:
+    """예약 한 번 실행 (작업을 만들지 못하면 last_error에 기록하고 None)"""
+    catalog = get_catalog(db, schedule.site_name, schedule.catalog_version)
+    if catalog is None:
+        version = f"v{schedule.catalog_version}" if schedule.catalog_version else "최신"
+        schedule.last_error = f"{schedule.site_name} 카탈로그({version})가 없습니다."
+        db.commit()
+        return None
+
+    scope = schedule.scope or "full"
+    base = previous_catalog(db, catalog) if scope == "changed" else None
+    budget = run_budget(schedule) if scope == "priority" else None
+    job = new_crawl_job(schedule.user_id, catalog, scope, base, budget, schedule_id=schedule.id)
+    try:
+        submit_job(db, job)
+    except JobQueueFullError as e:
+        db.rollback()
+        schedule.last_error = str(e)
+        db.commit()
+        return None
+
+    schedule.last_job_id = job.id
+    schedule.last_error = None
+    db.commit()
+    logger.info("Schedule %s started job %s (%s v%s)", schedule.id, job.id, catalog.site_name, catalog.version)
+    return job
+
+
+def run_due_schedules(db: Session, now: Optional[datetime] = None) -> int:
+    """실행 시각이 된 예약을 선점해 실행하고 실행한 예약 수를 반환"""
+    now = now or datetime.utcnow()
+    due = db.query(CrawlSchedule).filter(
+        CrawlSchedule.enabled == True,
+        CrawlSchedule.next_run_at <= now
+    ).order_by(CrawlSchedule.next_run_at).all()
+
+    count = 0
+    for schedule in due:
+        # 놓친 실행은 몰아서 하지 않고 지금 이후의 다음 시각으로 넘어간다
+        claimed = db.query(CrawlSchedule).filter(
+            CrawlSchedule.id == schedule.id,
+            CrawlSchedule.enabled == True,
+            CrawlSchedule.next_run_at == schedule.next_run_at
+        ).update({
+            "next_run_at": next_run_time(schedule, now),
+            "last_run_at": now
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            continue  # 다른 프로세스가 먼저 실행
+        db.refresh(schedule)
+        try:
+            run_schedule(db, schedule)
+        except Exception as e:
+            logger.exception("예약 %s 실행 실패", schedule.id)
+            db.rollback()
+            schedule.last_error = str(e)
+            db.commit()
+        count += 1
+    return count
+
+
+class ScheduleRunner(threading.Thread):
+    """주기적으로 실행 시각이 된 예약을 실행하는 백그라운드 스레드"""
+
+    def __init__(self, interval: float = SCHEDULE_POLL_INTERVAL):
+        super().__init__(name="crawl-schedule-runner", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            db = SessionLocal()
+            try:
+                run_due_schedules(db)
+            except Exception as e:
+                logger.warning("크롤링 예약 확인 실패: %s", e)
+            finally:
+                db.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+
+_runner: Optional[ScheduleRunner] = None
+
+
+def start_schedule_runner():
+    """예약 스레드 시작"""
+    global _runner
+    if _runner is None:
+        _runner = ScheduleRunner()
+        _runner.start()
+
+
+def stop_schedule_runner():
+    """예약 스레드 종료"""
+    global _runner
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
@@ -1,6 +1,6 @@
 """Pydantic 스키마"""
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 
@@ -69,6 +69,13 @@ class CrawlingJobResponse(CrawlingJobBase):
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     created_at: datetime
+    coalesced_into_id: Optional[int] = None  # 같은 카탈로그의 다른 작업 결과를 공유하는 경우
+    queue_position: Optional[int] = None  # 대기열 순번 (대기 중일 때만)
+    catalog_id: Optional[int] = None  # 크롤링한 카탈로그 버전
+    scope: Optional[str] = None  # full, changed, retry, priority
+    request_budget: Optional[int] = None  # priority 범위에서 크롤링할 행 수
+    parent_job_id: Optional[int] = None  # retry 범위의 원래 작업
+    schedule_id: Optional[int] = None  # 작업을 만든 예약
 
     class Config:
         from_attributes = True
@@ -81,6 +88,243 @@ class CrawlingProgress(BaseModel):
     total: int
     is_crawling: bool
     elapsed_time: int
+    queue_position: Optional[int] = None
+    export_progress: Optional[int] = None  # Excel 생성 진행률 (exporting일 때만)
+
+
+class ExportTaskResponse(BaseModel):
+    id: int
+    job_id: int
+    format: str
+    status: str
+    progress: int
+    rows_written: Optional[int] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# 가격 분석 스키마
+class SellerPriceStats(BaseModel):
+    seller: str
+    compared: int  # Waffle 가격과 비교 가능한 제품 수
+    cheaper: int  # Waffle보다 저렴했던 제품 수
+    win_rate: Optional[float] = None  # 경쟁사가 더 저렴했던 비율 (%)
+    average_delta: Optional[float] = None  # 평균 (Waffle - 경쟁사) 가격차
+    average_fee: Optional[float] = None
+    paid_shipping_rate: Optional[float] = None  # 유료 배송 비율 (%)
+
+
+class ShippingFeeImpact(BaseModel):
+    item_price_inversions: int  # 상품 가격 기준 역전 제품 수
+    final_price_inversions: int  # 최종 가격(배송비 포함) 기준 역전 제품 수
+    fee_caused_inversions: int  # 배송비 때문에 생긴 역전
+    fee_resolved_inversions: int  # 배송비 덕분에 해소된 역전
+
+
+class ProductInversion(BaseModel):
+    product_id: Optional[Union[int, str]] = None
+    product_name: Optional[str] = None
+    waffle_price: Optional[float] = None
+    min_competitor_price: Optional[float] = None
+    median_competitor_price: Optional[float] = None
+    rank: Optional[int] = None  # 비교할 경쟁사 가격이 없으면 None
+    delta: Optional[float] = None
+
+
+class PriceSummary(BaseModel):
+    job_id: int
+    products: int
+    observations: int
+    compared: int
+    inversions: int
+    inversion_rate: float
+    average_delta: float
+    max_delta: float
+    cheapest_rate: float  # Waffle이 최저가인 제품 비율 (%)
+    sellers: List[SellerPriceStats]
+    fee_impact: ShippingFeeImpact
+    top_inversions: List[ProductInversion]
+
+
+# 가격 변동 스키마
+class PriceChangeResponse(BaseModel):
+    product_id: str
+    product_name: Optional[str] = None
+    site_name: str
+    seller: str
+    url: Optional[str] = None
+    change_type: str  # changed, new, available, unavailable
+    previous_price: Optional[int] = None
+    current_price: Optional[int] = None
+    delta: Optional[int] = None  # 현재 - 이전 (changed일 때만)
+    previous_job_id: Optional[int] = None
+    previous_observed_at: Optional[datetime] = None
+    observed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PriceChangeList(BaseModel):
+    job_id: int
+    source_job_id: int  # 가격을 실제로 관측한 크롤링 작업
+    total: int
+    changes: List[PriceChangeResponse]
+
+
+# 가격 조회 스키마
+class LatestSellerPrice(BaseModel):
+    seller: str
+    url: Optional[str] = None
+    product_price: Optional[int] = None
+    delivery_fee: Optional[int] = None
+    final_price: Optional[int] = None
+    status: str  # ok, no_price, error
+    observed_at: datetime
+    job_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class ProductLatestPrices(BaseModel):
+    product_id: str
+    site_name: str
+    product_name: Optional[str] = None
+    observed_at: datetime  # 판매처 중 가장 최근 관측 시각
+    waffle_price: Optional[int] = None
+    min_competitor: Optional[str] = None
+    min_competitor_price: Optional[int] = None
+    price_gap: Optional[int] = None  # Waffle - 최저 경쟁사 (양수면 경쟁사가 더 저렴)
+    rank: Optional[int] = None  # Waffle 가격 순위 (1 = 최저가)
+    inversion: bool = False
+    sellers: List[LatestSellerPrice]
+
+
+class PriceHistoryBucket(BaseModel):
+    product_id: str
+    seller: str
+    site_name: str
+    bucket: datetime  # 구간 시작 시각 (UTC)
+    min_price: int
+    avg_price: float
+    max_price: int
+    observations: int
+
+
+class EntryPriorityResponse(BaseModel):
+    product_id: str
+    seller: str
+    canonical_id: Optional[str] = None  # 상품 URL의 정규 ID (같은 ID의 행은 점수를 공유)
+    changes: int  # 최근 기간의 가격 변동 횟수
+    change_rate: float  # 추정 변동률 (일당 횟수)
+    age_hours: Optional[float] = None  # 마지막 관측 이후 시간 (관측이 없으면 None)
+    inverted: bool
+    score: Optional[float] = None  # 가격이 바뀌었을 확률 × 가중치 (관측이 없으면 None: 항상 먼저)
+
+
+class PriceHistoryPage(BaseModel):
+    interval: str  # hour, day
+    start: datetime
+    end: datetime
+    items: List[PriceHistoryBucket]
+    next_cursor: Optional[str] = None  # 다음 페이지 요청 시 cursor로 전달
+
+
+# 카탈로그 스키마
+class CatalogResponse(BaseModel):
+    id: int
+    site_name: str
+    version: int
+    content_hash: str
+    product_count: int
+    source_name: Optional[str] = None
+    source_format: Optional[str] = None
+    uploaded_by: Optional[int] = None
+    created_at: datetime
+    base_version: Optional[int] = None  # 직전 버전 (변경 수의 비교 기준)
+    added_entries: Optional[int] = None
+    changed_entries: Optional[int] = None
+    removed_entries: Optional[int] = None
+    is_new: Optional[bool] = None  # 업로드 결과가 새 버전인지 (내용이 같으면 기존 최신 버전)
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogEntryResponse(BaseModel):
+    product_id: str
+    seller: str
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogUrlGroup(BaseModel):
+    canonical_id: str  # 사이트별 상품 고유 ID (예: ssg:1000035622592)
+    entries: List[CatalogEntryResponse]  # 이 상품을 참조하는 카탈로그 행
+
+
+class CatalogEntryChange(BaseModel):
+    product_id: str
+    seller: str
+    url: Optional[str] = None
+    previous_url: Optional[str] = None
+
+
+class CatalogDiffResponse(BaseModel):
+    site_name: str
+    version: int
+    base_version: Optional[int] = None
+    added: List[CatalogEntryChange]
+    changed: List[CatalogEntryChange]  # 다른 상품을 가리키게 된 행
+    removed: List[CatalogEntryChange]
+
+
+# 크롤링 예약 스키마
+class CrawlScheduleCreate(BaseModel):
+    site_name: str
+    cron: str  # 분 시 일 월 요일 (서버 로컬 시각)
+    catalog_version: Optional[int] = None  # 기본: 실행 시점의 최신 버전
+    scope: str = "full"  # full, changed, priority
+    requests_per_hour: Optional[int] = None  # priority 범위의 시간당 요청 예산
+    jitter_seconds: Optional[int] = None  # 기본: SCHEDULE_DEFAULT_JITTER
+    enabled: bool = True
+
+
+class CrawlScheduleUpdate(BaseModel):
+    cron: Optional[str] = None
+    catalog_version: Optional[int] = None
+    scope: Optional[str] = None
+    requests_per_hour: Optional[int] = None
+    jitter_seconds: Optional[int] = None
+    enabled: Optional[bool] = None
+
+
+class CrawlScheduleResponse(BaseModel):
+    id: int
+    user_id: int
+    site_name: str
+    catalog_version: Optional[int] = None
+    cron: str
+    scope: str
+    requests_per_hour: Optional[int] = None
+    jitter_seconds: int
+    enabled: bool
+    next_run_at: Optional[datetime] = None  # 흩뜨림을 더한 다음 실행 시각 (UTC)
+    last_run_at: Optional[datetime] = None
+    last_job_id: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
 
 
 # Admin 스키마
@@ -0,0 +1,64 @@
+"""테스트 공통 설정
+
+서버 모듈을 불러오기 전에 DB·출력 경로를 임시 디렉토리로 바꾸고,
+테스트마다 모든 테이블을 비운다.
+"""
+import os
+import sys
+import tempfile
+
+_work_dir = tempfile.mkdtemp(prefix="perfume_web_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_work_dir}/test.db"
+os.environ["OUTPUT_DIR"] = _work_dir
+os.environ["DATA_DIR"] = _work_dir
+
+project_root = os.path.join(os.path.dirname(__file__), '..')
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+
+from server.database import Base, SessionLocal, engine, init_db
+from server.models import CrawlingJob, User
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _database():
+    init_db()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username: str) -> User:
+        user = User(username=username, hashed_password="x", is_active=True)
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_job(db):
+    def make(user: User, status: str = "pending", site_name: str = "ssg", catalog_hash: str = "h1", **fields) -> CrawlingJob:
+        job = CrawlingJob(
+            user_id=user.id, site_name=site_name, status=status, catalog_hash=catalog_hash, **fields
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    return make
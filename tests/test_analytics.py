@@ -0,0 +1,48 @@
+"""가격 분석 (NumPy)"""
+import numpy as np
+
+from server.analytics import _waffle_prices, analyze_table, build_price_table
+
+
+def _result(product_id, prices):
+    return {
+        "product_id": product_id,
+        "product_name": f"p{product_id}",
+        "prices": [{"seller": seller, "최종 가격": price, "상품 가격": price, "배송비": 0} for seller, price in prices],
+    }
+
+
+def test_waffle_price_uses_first_waffle_row_of_each_product():
+    table = build_price_table([
+        _result(1, [("waffle", 100), ("A", 90), ("waffle", 300)]),
+        _result(2, [("A", 50)]),
+        _result(3, [("waffle", 70), ("waffle", 80), ("waffle", 60)]),
+    ])
+
+    waffle = _waffle_prices(table, table.final_price)
+
+    assert waffle[0] == 100
+    assert np.isnan(waffle[1])
+    assert waffle[2] == 70
+
+
+def test_inversion_delta_against_cheapest_competitor():
+    analytics = analyze_table(build_price_table([
+        _result(1, [("waffle", 100), ("A", 90), ("B", 95)]),
+        _result(2, [("waffle", 100), ("A", 120)]),
+    ]))
+
+    assert analytics.inversion_delta.tolist() == [10.0, -20.0]
+    assert analytics.rank.tolist() == [3, 1]
+    assert analytics.summary()["inversions"] == 1
+
+
+def test_products_without_competitor_prices_have_no_rank():
+    analytics = analyze_table(build_price_table([
+        _result(1, [("waffle", 100)]),
+        _result(2, [("waffle", 100), ("A", None)]),
+        _result(3, [("waffle", 100), ("A", 100)]),
+    ]))
+
+    assert analytics.rank.tolist() == [0, 0, 1]
+    assert analytics.summary()["cheapest_rate"] == 100.0
@@ -0,0 +1,95 @@
+"""오래된 가격 관측의 월별 Parquet 보관"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from server import archive
+from server.archive import archive_observations, archived_history
+from server.models import ObservationArchive, PriceObservation
+from server.observations import price_history
+
+NOW = datetime(2026, 6, 15)
+START, END = datetime(2026, 1, 1), datetime(2026, 7, 1)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(archive, "OBSERVATION_ARCHIVE_DAYS", 90)
+    return tmp_path
+
+
+def _observe(db, product_id: str, observed_at: datetime, price, seller: str = "waffle"):
+    db.add(PriceObservation(
+        job_id=1, site_name="ssg", product_id=product_id, seller=seller, final_price=price,
+        status="ok" if price is not None else "no_price", observed_at=observed_at,
+        canonical_id=f"ssg:{product_id}"
+    ))
+
+
+@pytest.fixture
+def observations(db):
+    for day in (3, 20):
+        for product_id in ("1", "2"):
+            _observe(db, product_id, datetime(2026, 1, day, 9), 1000 + day)
+            _observe(db, product_id, datetime(2026, 2, day, 9), 2000 + day)
+        _observe(db, "1", datetime(2026, 2, day, 10), None)
+    _observe(db, "1", NOW - timedelta(days=1), 3000)  # 보관 기간 안쪽
+    db.commit()
+
+
+def _history(db, product_ids=("1", "2")):
+    items, _ = price_history(db, product_ids, "day", START, END, limit=100)
+    return items
+
+
+def test_old_observations_move_to_monthly_files(db, observations):
+    before = _history(db)
+    assert len(before) == 9
+
+    assert archive_observations(db, now=NOW) == 10
+
+    entries = db.query(ObservationArchive).order_by(ObservationArchive.month).all()
+    assert [(entry.month, entry.part, entry.status, entry.rows) for entry in entries] == [
+        ("2026-01", 1, "completed", 4), ("2026-02", 1, "completed", 6),
+    ]
+    february = entries[1]
+    assert (february.min_product_id, february.max_product_id) == ("1", "2")
+    assert (february.min_final_price, february.max_final_price) == (2003, 2020)
+    assert db.query(PriceObservation).count() == 1
+
+    # 보관 전후 가격 이력이 같음
+    assert _history(db) == before
+
+
+def test_archiving_again_adds_next_part(db, observations):
+    archive_observations(db, now=NOW)
+    _observe(db, "1", datetime(2026, 2, 25, 9), 2500)
+    db.commit()
+
+    assert archive_observations(db, now=NOW) == 1
+    parts = db.query(ObservationArchive.part).filter(ObservationArchive.month == "2026-02")
+    assert sorted(part for part, in parts) == [1, 2]
+
+
+def test_archived_history_reads_only_overlapping_files(db, observations, monkeypatch):
+    archive_observations(db, now=NOW)
+    read = []
+    read_table = archive.pq.read_table
+
+    def record_read(path, **kwargs):
+        read.append(path)
+        return read_table(path, **kwargs)
+    monkeypatch.setattr(archive.pq, "read_table", record_read)
+
+    result = archived_history(db, ["2"], "day", datetime(2026, 2, 1), datetime(2026, 3, 1))
+
+    assert len(read) == 1 and "2026-02" in read[0]
+    assert sorted((key[0], key[3].day, value) for key, value in result.items()) == [
+        ("2", 3, [2003, 2003, 2003, 1]), ("2", 20, [2020, 2020, 2020, 1]),
+    ]
+    # 제품 ID 범위 밖이면 파일을 열지 않음
+    assert archived_history(db, ["9"], "day", START, END) == {}
+    assert len(read) == 1
@@ -0,0 +1,131 @@
+"""카탈로그 업로드 검증, 버전 비교와 바뀐 행만 크롤링하는 계획"""
+from datetime import datetime
+import json
+
+import pytest
+
+from crawler import canonical_url
+from server.catalogs import (
+    CatalogValidationError, catalog_cache, diff_catalogs, diff_products, parse_jsonl, store_catalog, url_index
+)
+from server.models import LatestPrice
+from server.recrawl import plan_changed_run
+
+
+def _url(item_id: int, tracking: str = "") -> str:
+    return f"https://www.ssg.com/item/itemView.ssg?itemId={item_id}{tracking}"
+
+
+def _product(product_id, waffle_url, **competitors):
+    return {
+        "product_id": product_id,
+        "product_name": f"상품 {product_id}",
+        "waffle": {"url": waffle_url},
+        "competitors": [{"name": name, "url": url} for name, url in competitors.items()],
+    }
+
+
+BASE = [
+    _product(1, _url(1), A=_url(11), B=_url(12)),
+    _product(2, _url(2), A=_url(21)),
+]
+UPDATED = [
+    _product(1, _url(1, "&srchwdRslt=x"), A=_url(99), C=_url(13)),  # 추적 쿼리만 바뀜, A 변경, B 삭제, C 추가
+    _product(2, _url(2), A=_url(21)),
+    _product(3, _url(3)),
+]
+
+
+def _keys(entries):
+    return [(entry.product_id, entry.seller) for entry in entries]
+
+
+def _jsonl(items) -> bytes:
+    return "\n".join(json.dumps(item, ensure_ascii=False) for item in items).encode("utf-8")
+
+
+def test_parse_reports_errors_per_line():
+    content = _jsonl([BASE[0], _product(1, _url(3)), _product(4, "ftp://x")]) + b"\n{"
+
+    with pytest.raises(CatalogValidationError) as excinfo:
+        parse_jsonl(content)
+
+    errors = excinfo.value.errors
+    assert [error.split(":")[0] for error in errors] == ["4행", "2행", "3행"]
+    assert "중복" in errors[1]
+
+
+def test_same_content_reuses_latest_version_and_fills_cache(db):
+    base, created = store_catalog(db, "ssg", parse_jsonl(_jsonl(BASE)))
+    assert created and base.version == 1
+
+    assert store_catalog(db, "ssg", parse_jsonl(_jsonl(BASE))) == (base, False)
+    catalog, created = store_catalog(db, "ssg", BASE[:1])
+    assert created and (catalog.version, catalog.product_count) == (2, 1)
+
+    catalog_cache.clear()
+    assert list(catalog_cache.get_by_id(base.id)) == BASE
+
+
+def test_canonical_id_ignores_tracking_query():
+    canonical_id, _ = canonical_url(_url(1))
+
+    assert canonical_url(_url(1, "&srchwdRslt=x"))[0] == canonical_id
+    assert canonical_url(_url(2))[0] != canonical_id
+    other = canonical_url("https://shop.example.com/p?id=7&utm_source=mail#top")
+    assert other == canonical_url("https://SHOP.example.com/p?id=7")
+
+
+def test_url_index_groups_rows_sharing_a_product(db):
+    shared = [_product(1, _url(1), A=_url(11)), _product(2, _url(2), A=_url(11, "&srchwdRslt=x"))]
+    catalog, _ = store_catalog(db, "ssg", shared)
+
+    index = url_index(db, catalog, shared_only=True)
+
+    canonical_id = canonical_url(_url(11))[0]
+    assert list(index) == [canonical_id]
+    assert [(entry.product_id, entry.seller) for entry in index[canonical_id]] == [("1", "A"), ("2", "A")]
+
+
+def test_diff_products_compares_canonical_ids():
+    diff = diff_products(BASE, UPDATED)
+
+    assert _keys(diff.added) == [("1", "C"), ("3", "waffle")]
+    assert _keys(diff.changed) == [("1", "A")]
+    assert (diff.changed[0].previous_url, diff.changed[0].url) == (_url(11), _url(99))
+    assert _keys(diff.removed) == [("1", "B")]
+    assert diff.removed[0].previous_url == _url(12)
+
+
+def test_new_version_records_diff_counts_against_previous(db):
+    base, _ = store_catalog(db, "ssg", BASE)
+    assert base.base_version is None
+
+    catalog, _ = store_catalog(db, "ssg", UPDATED)
+    assert (catalog.version, catalog.base_version) == (2, 1)
+    assert (catalog.added_entries, catalog.changed_entries, catalog.removed_entries) == (2, 1, 1)
+    # 기준 버전이 없으면 모든 행이 추가
+    assert len(diff_catalogs(None, base).added) == 5
+
+
+def test_changed_run_crawls_changed_and_unobserved_rows(db):
+    base, _ = store_catalog(db, "ssg", BASE)
+    catalog, _ = store_catalog(db, "ssg", UPDATED)
+    observed_at = datetime(2026, 3, 1)
+    for product_id, seller, url in [("1", "waffle", _url(1)), ("1", "A", _url(11)), ("3", "waffle", _url(3))]:
+        db.add(LatestPrice(
+            site_name="ssg", product_id=product_id, seller=seller, url=url, final_price=1000,
+            status="ok", observed_at=observed_at, job_id=1
+        ))
+    db.commit()
+
+    plan = plan_changed_run(db, "ssg", catalog, base)
+
+    # 바뀐 행(1/A, 1/C, 3/waffle)과 관측이 없는 행(2/waffle, 2/A)
+    assert [
+        (product["product_id"], "waffle" in product, [c["name"] for c in product["competitors"]])
+        for product in plan.products
+    ] == [(1, False, ["A", "C"]), (2, True, ["A"]), (3, True, [])]
+    # 크롤링하지 않은 행은 최신 관측으로 채우고 URL은 카탈로그의 현재 URL로 표시
+    filled = plan.fallback(UPDATED[0], "waffle")
+    assert (filled["최종 가격"], filled["상품 url"]) == (1000, _url(1, "&srchwdRslt=x"))
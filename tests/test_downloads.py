@@ -0,0 +1,112 @@
+"""파일 다운로드의 Range·If-Range·조건부 요청"""
+from datetime import datetime, timezone
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from server.downloads import file_response, parse_range
+
+CONTENT = bytes(range(256)) * 4
+LAST_MODIFIED = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "result.xlsx"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    def download(request: Request):
+        return file_response(
+            request, str(path), "application/octet-stream", "결과.xlsx",
+            etag="v1", last_modified=LAST_MODIFIED
+        )
+
+    return TestClient(app)
+
+
+def _http_date(value: datetime) -> str:
+    return formatdate(value.timestamp(), usegmt=True)
+
+
+def test_full_download_headers(client):
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "filename*=utf-8''" in response.headers["content-disposition"]
+
+
+@pytest.mark.parametrize("header", [ETAG, 'W/"v1"', '"other", "v1"', "*"])
+def test_if_none_match_returns_304(client, header):
+    response = client.get("/file", headers={"If-None-Match": header})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_if_none_match_mismatch_ignores_if_modified_since(client):
+    response = client.get("/file", headers={
+        "If-None-Match": '"other"', "If-Modified-Since": _http_date(LAST_MODIFIED)
+    })
+    assert response.status_code == 200
+
+
+def test_if_modified_since(client):
+    assert client.get("/file", headers={"If-Modified-Since": _http_date(LAST_MODIFIED)}).status_code == 304
+    earlier = _http_date(datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert client.get("/file", headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-5", 1019, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+def test_range_returns_partial_content(client, header, start, end):
+    response = client.get("/file", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+    assert response.content == CONTENT[start:end + 1]
+
+
+@pytest.mark.parametrize("header", ["bytes=2000-", "bytes=-0", "bytes=20-10"])
+def test_unsatisfiable_range_returns_416(client, header):
+    response = client.get("/file", headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "items=0-5", "bytes=a-b"])
+def test_unsupported_range_sends_whole_file(client, header):
+    response = client.get("/file", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_range_etag(client):
+    matching = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert matching.status_code == 206
+    changed = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"v0"'})
+    assert changed.status_code == 200
+    assert changed.content == CONTENT
+
+
+def test_if_range_date(client):
+    current = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": _http_date(LAST_MODIFIED)})
+    assert current.status_code == 206
+    stale = _http_date(datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert client.get("/file", headers={"Range": "bytes=0-9", "If-Range": stale}).status_code == 200
+
+
+def test_parse_range_empty_file():
+    with pytest.raises(ValueError):
+        parse_range("bytes=0-", 0)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-1", 0)
@@ -0,0 +1,70 @@
+"""예상 작업 시간과 제품 제출 순서"""
+import pytest
+
+from crawler import canonical_url
+from server.durations import expected_durations, product_hosts
+from server.scheduler import longest_first_order
+
+
+def _product(product_id, *urls):
+    return {
+        "product_id": product_id,
+        "waffle": {"url": urls[0]},
+        "competitors": [{"name": f"경쟁사{n}", "url": url} for n, url in enumerate(urls[1:], 1)],
+    }
+
+
+def test_product_hosts_cover_every_seller_url():
+    product = _product(1, "https://A.example/1", "https://b.example/1", None, "https://a.example/2")
+    assert product_hosts(product) == frozenset({"a.example", "b.example"})
+
+
+def test_expected_durations_use_median_for_unknown_urls():
+    known = "https://a.example/item?itemId=1"
+    durations = {canonical_url(known)[0]: 2.0, "other": 4.0, "third": 9.0}
+    products = [_product(1, known, "https://b.example/item?itemId=2"), _product(2, None)]
+
+    assert expected_durations(products, durations, delay=0.5) == [pytest.approx(2.5 + 4.5), 0.0]
+
+
+def test_longest_first_avoids_overlapping_host_sets():
+    hosts = [
+        frozenset({"a", "b"}),  # 가장 긴 작업
+        frozenset({"b", "c"}),  # 첫 호스트는 다르지만 b가 겹침
+        frozenset({"c"}),
+        frozenset({"a"}),
+    ]
+    order = longest_first_order([10.0, 9.0, 8.0, 1.0], hosts)
+
+    assert order == [0, 2, 3, 1]
+    for previous, current in zip(order, order[1:]):
+        assert not hosts[previous] & hosts[current]
+
+
+def test_longest_first_falls_back_when_every_host_set_overlaps():
+    hosts = [frozenset({"a"})] * 3
+    assert longest_first_order([1.0, 3.0, 2.0], hosts) == [1, 2, 0]
+
+
+def test_longest_first_seed_only_breaks_ties():
+    hosts = [frozenset({str(idx)}) for idx in range(6)]
+    durations = [1.0, 1.0, 1.0, 5.0, 5.0, 5.0]
+    for seed in ("x", "y", "z"):
+        order = longest_first_order(durations, hosts, seed)
+        assert sorted(order[:3]) == [3, 4, 5]
+        assert order == longest_first_order(durations, hosts, seed)
+
+
+def test_longest_first_seed_shuffles_within_duration_buckets():
+    hosts = [frozenset({str(idx)}) for idx in range(6)]
+    durations = [1.0, 1.1, 1.2, 5.0, 5.2, 5.4]  # 1.25배 구간: [1.0, 1.1, 1.2], [5.0, 5.2, 5.4]
+    assert longest_first_order(durations, hosts) == [5, 4, 3, 2, 1, 0]
+
+    orders = set()
+    for seed in map(str, range(10)):
+        order = longest_first_order(durations, hosts, seed, bucket_ratio=1.25)
+        # 구간 안에서만 섞고 긴 구간을 먼저 제출
+        assert sorted(order[:3]) == [3, 4, 5] and sorted(order[3:]) == [0, 1, 2]
+        assert order == longest_first_order(durations, hosts, seed, bucket_ratio=1.25)
+        orders.add(tuple(order))
+    assert len(orders) > 1
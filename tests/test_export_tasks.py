@@ -0,0 +1,92 @@
+"""내보내기 작업 선점과 제출 실패 처리"""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from server.export_tasks import ExportExecutor
+from server.models import ExportTask
+
+
+class FakePool:
+    def __init__(self, broken: bool = False):
+        self.broken = broken
+        self.submitted = []
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+        self.submitted.append(args)
+        return Future()  # 끝나지 않은 작업
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def task(db):
+    task = ExportTask(
+        job_id=1, format="xlsx", status="pending", total_products=1,
+        results_file="r.jsonl", file_path="r.xlsx"
+    )
+    db.add(task)
+    db.commit()
+    return task
+
+
+def _executor(pools):
+    executor = ExportExecutor(workers=1)
+    executor.worker_id = "worker-a"
+    executor._pool = pools.pop(0)
+    executor._new_pool = lambda: pools.pop(0)
+    return executor
+
+
+def _status(db, task):
+    db.expire_all()
+    current = db.get(ExportTask, task.id)
+    return current.status, current.worker_id
+
+
+def test_broken_pool_is_replaced_and_task_submitted(db, task):
+    broken, fresh = FakePool(broken=True), FakePool()
+    executor = _executor([broken, fresh])
+
+    executor._claim_and_submit()
+
+    assert broken.shut_down
+    assert executor._pool is fresh
+    assert [args[0] for args in fresh.submitted] == [task.id]
+    assert task.id in executor._inflight
+    assert _status(db, task) == ("running", "worker-a")
+
+
+def test_task_released_when_pool_stays_broken(db, task):
+    executor = _executor([FakePool(broken=True), FakePool(broken=True)])
+
+    executor._claim_and_submit()
+
+    assert executor._inflight == {}
+    assert _status(db, task) == ("pending", None)
+
+
+def test_task_released_when_stopping_after_claim(db, task):
+    executor = _executor([FakePool()])
+    executor._stopping = True
+
+    executor._claim_and_submit()
+
+    assert _status(db, task) == ("pending", None)
+
+
+def test_running_task_killed_with_pool_replaces_pool(db, task):
+    pool, fresh = FakePool(), FakePool()
+    executor = _executor([pool, fresh])
+    executor._claim_and_submit()
+
+    executor._inflight[task.id].set_exception(BrokenProcessPool("terminated"))
+
+    assert executor._pool is fresh
+    assert pool.shut_down
+    assert _status(db, task)[0] == "failed"
@@ -0,0 +1,66 @@
+"""평평한 형식 내보내기 (CSV, JSONL.gz, Parquet)"""
+import csv
+import gzip
+import json
+
+import jsonlines
+import pytest
+
+from server.exports import FLAT_COLUMNS, export_path, write_export
+
+
+@pytest.fixture
+def results_file(tmp_path):
+    path = str(tmp_path / "ssg_results.jsonl")
+    with jsonlines.open(path, mode="w") as writer:
+        writer.write({
+            "product_id": 1, "product_name": "상품 1", "timestamp": "2026-03-01T00:00:00",
+            "prices": [
+                {"seller": "waffle", "상품 url": "https://example.com/w/1", "상품 가격": 10000,
+                 "배송비": 0, "배송비 여부": "무료", "최종 가격": 10000},
+                {"seller": "경쟁사", "상품 url": "https://example.com/c/1", "상품 가격": 9000,
+                 "배송비": 2500, "배송비 여부": "유료", "최종 가격": 11500},
+            ],
+        })
+        writer.write({
+            "product_id": 2, "product_name": "상품 2", "timestamp": "2026-03-01T00:00:00",
+            "prices": [], "error": "timeout",
+        })
+    return path
+
+
+def test_csv_has_one_row_per_product_and_seller(results_file, tmp_path):
+    path = export_path(str(tmp_path / "out.xlsx"), "csv")
+
+    assert write_export(results_file, "csv", path) == 3
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == FLAT_COLUMNS
+    assert [(row["product_id"], row["seller"], row["final_price"]) for row in rows] == [
+        ("1", "waffle", "10000"), ("1", "경쟁사", "11500"), ("2", "", ""),
+    ]
+    assert rows[2]["error"] == "timeout"
+
+
+def test_jsonl_gz_keeps_types(results_file, tmp_path):
+    path = export_path(str(tmp_path / "out.xlsx"), "jsonl.gz")
+
+    write_export(results_file, "jsonl.gz", path)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[0]["is_waffle"] is True
+    assert rows[1]["shipping_fee"] == 2500
+    assert rows[2]["seller"] is None
+
+
+def test_parquet_schema_and_rows(results_file, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = export_path(str(tmp_path / "out.xlsx"), "parquet")
+
+    write_export(results_file, "parquet", path)
+
+    table = pq.read_table(path)
+    assert table.column_names == FLAT_COLUMNS
+    assert table.column("final_price").to_pylist() == [10000, 11500, None]
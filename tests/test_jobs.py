@@ -0,0 +1,168 @@
+"""작업 선점·합류·한도·취소·생존 신호 복구"""
+from datetime import datetime, timedelta
+import threading
+
+import pytest
+
+from server import jobs
+from server.database import SessionLocal
+from server.jobs import CrawlRun, JobExecutor, JobQueueFullError, enqueue_job, request_cancel, submit_job
+from server.models import CrawlingJob
+
+
+def _executor(worker_id: str) -> JobExecutor:
+    executor = JobExecutor(worker_slots=1, request_budget=1)
+    executor.worker_id = worker_id
+    return executor
+
+
+def _reload(db, job: CrawlingJob) -> CrawlingJob:
+    db.expire_all()
+    return db.query(CrawlingJob).filter(CrawlingJob.id == job.id).one()
+
+
+def test_claim_takes_pending_group_and_coalesces_followers(db, make_user, make_job):
+    alice, bob = make_user("alice"), make_user("bob")
+    first = make_job(alice)
+    second = make_job(bob)
+
+    run = _executor("worker-a")._claim_next()
+
+    assert run.leader_id == first.id
+    first, second = _reload(db, first), _reload(db, second)
+    assert (first.status, first.worker_id, first.coalesced_into_id) == ("running", "worker-a", None)
+    assert (second.status, second.coalesced_into_id) == ("running", first.id)
+    assert _executor("worker-b")._claim_next() is None
+
+
+def test_claim_loses_race_to_other_process(db, make_user, make_job, monkeypatch):
+    job = make_job(make_user("alice"))
+    # 다른 프로세스가 대기열을 읽은 뒤 이 프로세스가 먼저 선점한 상황
+    other = SessionLocal()
+    try:
+        stale_groups = jobs._pending_groups(other)
+        assert _executor("worker-a")._claim_next().leader_id == job.id
+
+        monkeypatch.setattr(jobs, "_pending_groups", lambda _db: stale_groups)
+        assert _executor("worker-b")._claim_next() is None
+    finally:
+        other.close()
+    assert _reload(db, job).worker_id == "worker-a"
+
+
+def test_claim_respects_user_and_site_limits(db, make_user, make_job, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_JOBS_PER_USER", 1)
+    monkeypatch.setattr(jobs, "MAX_JOBS_PER_SITE", 1)
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    make_job(alice, status="running", catalog_hash="running")
+    make_job(alice, catalog_hash="alice-next")  # 사용자 한도 초과
+    make_job(bob, catalog_hash="bob-ssg")  # 사이트 한도 초과
+    sstv = make_job(carol, site_name="sstv", catalog_hash="carol-sstv")
+
+    run = _executor("worker-a")._claim_next()
+
+    assert run.leader_id == sstv.id
+    assert _executor("worker-a")._claim_next() is None
+
+
+def test_enqueue_joins_running_crawl_of_same_catalog(db, make_user, make_job):
+    leader = make_job(make_user("alice"), status="running")
+    job = make_job(make_user("bob"))
+
+    assert enqueue_job(db, job) == (None, leader.id)
+    job = _reload(db, job)
+    assert (job.status, job.coalesced_into_id) == ("running", leader.id)
+
+
+def test_enqueue_waits_when_leader_already_finished(db, make_user, make_job):
+    make_job(make_user("alice"), status="completed")
+    job = make_job(make_user("bob"))
+
+    assert enqueue_job(db, job) == (1, None)
+    assert _reload(db, job).status == "pending"
+
+
+def test_full_queue_rejects_new_group_but_not_joining_job(db, make_user, make_job, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_PENDING_JOBS", 1)
+    alice, bob = make_user("alice"), make_user("bob")
+    make_job(alice, catalog_hash="a")
+
+    with pytest.raises(JobQueueFullError):
+        submit_job(db, CrawlingJob(user_id=bob.id, site_name="ssg", status="pending", catalog_hash="b"))
+    # 거절된 작업은 남기지 않음
+    assert db.query(CrawlingJob).filter(CrawlingJob.catalog_hash == "b").count() == 0
+
+    # 대기 중인 묶음에 합쳐지는 작업은 대기열 길이를 늘리지 않음
+    joining = CrawlingJob(user_id=bob.id, site_name="ssg", status="pending", catalog_hash="a")
+    assert submit_job(db, joining) == 1
+
+
+def test_cancel_pending_job_immediately_and_running_job_via_flag(db, make_user, make_job):
+    alice = make_user("alice")
+    pending = make_job(alice, catalog_hash="a")
+    running = make_job(alice, status="running", catalog_hash="b")
+
+    assert request_cancel(db, pending).status == "cancelled"
+    assert request_cancel(db, running).status == "cancelling"
+
+
+def test_cancelling_one_member_detaches_it_and_all_members_stop_crawl(db, make_user, make_job):
+    leader = make_job(make_user("alice"), status="running")
+    member = make_job(make_user("bob"), status="running", coalesced_into_id=leader.id)
+    executor = _executor("worker-a")
+    run = CrawlRun(leader)
+    executor._running[leader.id] = run
+
+    # 다른 세션(API 프로세스)에서 취소 요청
+    api = SessionLocal()
+    try:
+        request_cancel(api, api.get(CrawlingJob, member.id))
+        executor._check_cancellations()
+        assert _reload(db, member).status == "cancelled"
+        assert _reload(db, leader).status == "running"
+        assert not run.cancel_requested
+
+        request_cancel(api, api.get(CrawlingJob, leader.id))
+        executor._check_cancellations()
+        assert run.cancel_requested
+    finally:
+        api.close()
+
+
+def test_recover_stale_leader_and_orphaned_member(db, make_user, make_job):
+    old = datetime.utcnow() - timedelta(seconds=jobs.JOB_HEARTBEAT_TIMEOUT + 60)
+    stale = make_job(make_user("alice"), status="running", heartbeat_at=old, catalog_hash="a")
+    finished = make_job(make_user("bob"), status="completed", heartbeat_at=old, catalog_hash="b",
+                        progress=100, result_file_path="out.xlsx")
+    orphan = make_job(make_user("carol"), status="running", catalog_hash="b",
+                      coalesced_into_id=finished.id)
+    local = make_job(make_user("dave"), status="running", heartbeat_at=old, catalog_hash="c")
+    executor = _executor("worker-a")
+    executor._running[local.id] = CrawlRun(local)
+
+    executor._recover_stale_jobs()
+
+    assert _reload(db, stale).status == "failed"
+    orphan = _reload(db, orphan)
+    assert (orphan.status, orphan.result_file_path) == ("completed", "out.xlsx")
+    assert _reload(db, local).status == "running"
+
+
+def test_worker_slot_runs_claimed_job(db, make_user, make_job, monkeypatch):
+    job = make_job(make_user("alice"))
+    ran = threading.Event()
+
+    def run_crawler_task(run, executor):
+        ran.set()
+        executor._finish(run)
+    monkeypatch.setattr(jobs, "run_crawler_task", run_crawler_task)
+
+    executor = _executor("worker-a")
+    executor.start()
+    try:
+        assert ran.wait(5)
+    finally:
+        executor.shutdown()
+    job = _reload(db, job)
+    assert (job.status, job.worker_id) == ("running", "worker-a")
+    assert executor._running == {}
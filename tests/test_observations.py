@@ -0,0 +1,88 @@
+"""가격 관측 일괄 기록"""
+import pytest
+
+from server import observations
+from server.models import LatestPrice, PriceChange, PriceObservation
+from server.observations import ObservationWriteError, ObservationWriter
+
+
+def _result(product_id: int, price: int, timestamp: str = "2026-03-01T00:00:00"):
+    return {
+        "product_id": product_id,
+        "product_name": f"p{product_id}",
+        "timestamp": timestamp,
+        "prices": [{"seller": "waffle", "상품 url": f"https://example.com/{product_id}", "최종 가격": price}],
+    }
+
+
+@pytest.fixture
+def failing_writes(monkeypatch):
+    """failures[0]번 기록을 실패시킴"""
+    failures = [0]
+    original = observations.SessionLocal
+
+    def session():
+        db = original()
+        if failures[0] > 0:
+            failures[0] -= 1
+
+            def execute(*args, **kwargs):
+                raise RuntimeError("database is locked")
+            db.execute = execute
+        return db
+
+    monkeypatch.setattr(observations, "SessionLocal", session)
+    return failures
+
+
+def test_failed_batch_stays_buffered_and_is_written_later(db, failing_writes):
+    writer = ObservationWriter(job_id=1, site_name="ssg", batch_size=2)
+    failing_writes[0] = 1
+    writer.add_result(_result(1, 100))
+    writer.add_result(_result(2, 200))  # 기록 실패 -> 버퍼에 남음
+
+    assert writer.written == 0
+    assert db.query(PriceObservation).count() == 0
+
+    writer.add_result(_result(3, 300))  # 한 묶음을 더 모을 때까지 재시도하지 않음
+    assert writer.written == 0
+    assert writer.close() == 3
+    assert db.query(PriceObservation).count() == 3
+    assert db.query(LatestPrice).count() == 3
+
+
+def test_close_raises_when_rows_cannot_be_written(db, failing_writes):
+    writer = ObservationWriter(job_id=1, site_name="ssg")
+    writer.add_result(_result(1, 100))
+    failing_writes[0] = 2
+
+    with pytest.raises(ObservationWriteError):
+        writer.close(retries=2)
+    assert db.query(PriceObservation).count() == 0
+    assert writer.close() == 1
+
+
+def test_latest_price_is_not_overwritten_by_older_observation(db):
+    for job_id, price, timestamp in ((1, 100, "2026-03-02T00:00:00"), (2, 90, "2026-03-01T00:00:00")):
+        writer = ObservationWriter(job_id=job_id, site_name="ssg")
+        writer.add_result(_result(1, price, timestamp))
+        writer.close()
+
+    latest = db.query(LatestPrice).one()
+    assert (latest.final_price, latest.job_id) == (100, 1)
+    assert db.query(PriceObservation).count() == 2
+
+
+def test_only_changed_prices_are_recorded_against_previous_run(db):
+    first = ObservationWriter(job_id=1, site_name="ssg")
+    first.add_result(_result(1, 100))
+    first.add_result(_result(2, 200))
+    first.close()
+    second = ObservationWriter(job_id=2, site_name="ssg")
+    second.add_result(_result(1, 100, "2026-03-02T00:00:00"))
+    second.add_result(_result(2, 180, "2026-03-02T00:00:00"))
+    second.close()
+
+    assert (first.changes, second.changes) == (2, 1)
+    change = db.query(PriceChange).filter(PriceChange.job_id == 2).one()
+    assert (change.product_id, change.change_type, change.previous_job_id, change.delta) == ("2", "changed", 1, -20)
@@ -0,0 +1,90 @@
+"""가격 이력 집계의 커서 페이지"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from sqlalchemy import inspect
+
+from server.database import engine
+from server.models import PriceObservation
+from server.observations import HistoryBucket, decode_history_cursor, encode_history_cursor, price_history
+
+START = datetime(2026, 3, 1)
+
+
+def _observe(db, product_id: str, seller: str, hour: int, price: int, site_name: str = "ssg"):
+    db.add(PriceObservation(
+        job_id=1, site_name=site_name, product_id=product_id, seller=seller, final_price=price,
+        status="ok", observed_at=START + timedelta(hours=hour, minutes=10)
+    ))
+
+
+@pytest.fixture
+def observations(db):
+    for product_id in ("1", "2"):
+        for seller in ("A", "waffle"):
+            for hour in range(3):
+                _observe(db, product_id, seller, hour, 1000 + hour)
+                _observe(db, product_id, seller, hour, 2000 + hour)
+    db.commit()
+
+
+def _all_pages(db, limit: int, **filters):
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = price_history(
+            db, ["1", "2"], "hour", START, START + timedelta(days=1), cursor=cursor, limit=limit, **filters
+        )
+        items.extend(page)
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 12])
+def test_cursor_pages_concatenate_to_full_result(db, observations, limit):
+    full, _ = price_history(db, ["1", "2"], "hour", START, START + timedelta(days=1), limit=100)
+    items, pages = _all_pages(db, limit)
+
+    assert len(full) == 12
+    assert items == full
+    assert pages == -(-12 // limit)
+    first = full[0]
+    assert (first.product_id, first.seller, first.bucket) == ("1", "A", START)
+    assert (first.min_price, first.avg_price, first.max_price, first.observations) == (1000, 1500.0, 2000, 2)
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7])
+def test_same_product_on_other_site_stays_a_separate_series(db, observations, limit):
+    for hour in range(3):
+        _observe(db, "1", "A", hour, 5000 + hour, site_name="sstv")
+    db.commit()
+
+    full, _ = price_history(db, ["1", "2"], "hour", START, START + timedelta(days=1), limit=100)
+    items, _ = _all_pages(db, limit)
+
+    assert len(full) == 15
+    assert items == full
+    series = [(item.product_id, item.seller, item.site_name) for item in full]
+    assert series[:6] == [("1", "A", "ssg")] * 3 + [("1", "A", "sstv")] * 3
+    assert [item.min_price for item in full[3:6]] == [5000, 5001, 5002]
+
+
+def test_history_index_covers_site_name():
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("price_observations")}
+    assert indexes["ix_price_observations_product_seller_site_time"] == [
+        "product_id", "seller", "site_name", "observed_at"
+    ]
+    assert "ix_price_observations_product_seller_time" not in indexes
+
+
+def test_cursor_round_trip():
+    key = ("1", "waffle", "ssg", datetime(2026, 3, 1, 2))
+    cursor = encode_history_cursor(HistoryBucket(*key, 1, 1.0, 1, 1))
+    assert decode_history_cursor(cursor) == key
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
@@ -0,0 +1,49 @@
+"""결과 도착 시 계산하는 가격 비교 요약"""
+from crawler import PriceSummaryStats, summarize_prices
+
+
+def _prices(*pairs):
+    return [{"seller": seller, "최종 가격": price} for seller, price in pairs]
+
+
+def test_summary_ranks_waffle_among_competitors():
+    summary = summarize_prices(_prices(("waffle", 100), ("A", 90), ("B", 100), ("C", "N/A"), ("D", 80)))
+
+    assert summary["waffle_index"] == 0
+    assert summary["competitor_count"] == 3
+    assert (summary["min_competitor"], summary["min_competitor_price"]) == ("D", 80)
+    assert summary["price_gap"] == 20
+    assert summary["rank"] == 3
+    assert summary["cheaper_indices"] == [1, 4]
+    assert summary["inversion"]
+
+
+def test_summary_without_competitor_prices_has_no_rank():
+    summary = summarize_prices(_prices(("waffle", 100), ("A", None)))
+
+    assert summary["waffle_price"] == 100
+    assert summary["rank"] is None
+    assert summary["price_gap"] is None
+    assert not summary["inversion"]
+
+
+def test_summary_without_waffle_price():
+    summary = summarize_prices(_prices(("A", 90), ("waffle", "N/A")))
+
+    assert summary["waffle_index"] == 1
+    assert summary["waffle_price"] is None
+    assert summary["rank"] is None
+    assert summary["min_competitor_price"] == 90
+
+
+def test_stats_accumulate_inversions():
+    stats = PriceSummaryStats()
+    for prices in (
+        _prices(("waffle", 100), ("A", 90)),
+        _prices(("waffle", 100), ("A", 70)),
+        _prices(("waffle", 100), ("A", 120)),
+        _prices(("waffle", 100)),
+    ):
+        stats.add(summarize_prices(prices))
+
+    assert stats.to_dict() == {"products": 4, "compared": 3, "inversions": 2, "average_gap": 20.0}
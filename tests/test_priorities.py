@@ -0,0 +1,103 @@
+"""변동성 기반 크롤링 우선순위"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from server.models import LatestPrice, PriceChange, PriceObservation
+from server.priorities import entry_priorities, select_by_budget
+
+NOW = datetime(2026, 3, 15)
+
+
+def _url(item_id: int, tracking: str = "") -> str:
+    return f"https://www.ssg.com/item/itemView.ssg?itemId={item_id}{tracking}"
+
+
+def _product(product_id, waffle_url, **competitors):
+    return {
+        "product_id": product_id,
+        "product_name": f"상품 {product_id}",
+        "waffle": {"url": waffle_url},
+        "competitors": [{"name": name, "url": url} for name, url in competitors.items()],
+    }
+
+
+@pytest.fixture
+def observe(db):
+    """(제품, 판매처)를 days_ago일 전마다 관측하고, 가격이 바뀐 관측은 변동으로 기록"""
+    def observe(product_id, seller, url, prices_by_days_ago, canonical_id=None):
+        previous = None
+        for job_id, (days_ago, price) in enumerate(sorted(prices_by_days_ago, reverse=True), 1):
+            observed_at = NOW - timedelta(days=days_ago)
+            db.add(PriceObservation(
+                job_id=job_id, site_name="ssg", product_id=product_id, seller=seller, url=url,
+                final_price=price, status="ok", observed_at=observed_at, canonical_id=canonical_id
+            ))
+            if previous is not None and previous != price:
+                db.add(PriceChange(
+                    job_id=job_id, site_name="ssg", product_id=product_id, seller=seller,
+                    change_type="changed", previous_price=previous, current_price=price,
+                    observed_at=observed_at
+                ))
+            previous = price
+        db.add(LatestPrice(
+            site_name="ssg", product_id=product_id, seller=seller, url=url, final_price=previous,
+            status="ok", observed_at=observed_at, job_id=job_id, canonical_id=canonical_id
+        ))
+        db.commit()
+    return observe
+
+
+def _by_key(priorities):
+    return {(entry.product_id, entry.seller): entry for entry in priorities}
+
+
+def test_volatile_entries_rank_above_stable_and_unobserved_first(db, observe):
+    observe("1", "waffle", _url(1), [(10, 100), (7, 110), (4, 100), (1, 120)], "ssg:1")
+    observe("2", "waffle", _url(2), [(10, 100), (7, 100), (4, 100), (1, 100)], "ssg:2")
+    products = [_product("1", _url(1)), _product("2", _url(2)), _product("3", _url(3))]
+
+    priorities = entry_priorities(db, "ssg", products, now=NOW)
+
+    assert [entry.product_id for entry in priorities] == ["3", "1", "2"]
+    volatile, stable = priorities[1], priorities[2]
+    assert (volatile.changes, stable.changes) == (3, 0)
+    assert volatile.change_rate > stable.change_rate
+    assert volatile.age_hours == pytest.approx(24)
+    assert priorities[0].age_hours is None
+
+
+def test_rows_pointing_at_the_same_item_share_history_and_one_request(db, observe):
+    # 제품 1의 Waffle 행으로만 관측해 온 상품을 제품 2의 경쟁사 행이 (추적 쿼리만 다른 URL로) 가리킴
+    observe("1", "waffle", _url(1), [(10, 100), (7, 110), (4, 100), (2, 120)], "ssg:1")
+    observe("9", "waffle", _url(9), [(10, 100), (4, 100)], "ssg:9")
+    products = [
+        _product("1", _url(1)),
+        _product("2", _url(2), 경쟁사=_url(1, "&srchwdRslt=x")),
+        _product("9", _url(9)),
+    ]
+    observe("2", "waffle", _url(2), [(1, 100)], "ssg:2")
+
+    priorities = _by_key(entry_priorities(db, "ssg", products, now=NOW))
+
+    shared, original = priorities[("2", "경쟁사")], priorities[("1", "waffle")]
+    assert shared.canonical_id == original.canonical_id == "ssg:1"
+    assert (shared.changes, shared.change_rate, shared.score) == (
+        original.changes, original.change_rate, original.score
+    )
+    assert shared.age_hours == pytest.approx(48)
+
+    # 정규 ID가 같은 두 행은 요청 하나만 차지하므로 예산 2로 다음 행까지 고른다
+    selected = select_by_budget(sorted(priorities.values(), key=lambda entry: -entry.score), 2)
+    assert selected == {("1", "waffle"), ("2", "경쟁사"), ("9", "waffle")}
+
+
+def test_rows_without_canonical_history_fall_back_to_product_and_seller(db, observe):
+    # 정규 ID를 기록하기 전의 관측
+    observe("1", "waffle", _url(1), [(10, 100), (5, 120), (1, 120)])
+
+    entry = entry_priorities(db, "ssg", [_product("1", _url(1))], now=NOW)[0]
+
+    assert entry.canonical_id == "ssg:1"
+    assert entry.changes == 1
+    assert entry.age_hours == pytest.approx(24)
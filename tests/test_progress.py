@@ -0,0 +1,40 @@
+"""진행률 메모리 저장소와 DB 일괄 반영"""
+from server.models import CrawlingJob
+from server.progress import ProgressStore
+
+
+def _progress(db, job):
+    db.expire_all()
+    current = db.get(CrawlingJob, job.id)
+    return current.progress, current.current_product
+
+
+def test_flush_writes_only_changed_snapshots(db, make_user, make_job):
+    user = make_user("alice")
+    first, second = make_job(user, status="running"), make_job(user, status="running")
+    store = ProgressStore()
+
+    store.update(first.id, 3, 10, 30)
+    store.update(second.id, 1, 4, 25)
+    assert store.get(first.id).percentage == 30
+    assert store.flush() == 2
+    assert _progress(db, first) == (30, 3)
+    assert _progress(db, second) == (25, 1)
+
+    # 바뀌지 않은 스냅샷은 다시 쓰지 않음
+    assert store.flush() == 0
+    store.update(first.id, 5, 10, 50)
+    assert store.flush([second.id]) == 0
+    assert store.flush([first.id]) == 1
+    assert _progress(db, first) == (50, 5)
+
+
+def test_discard_forgets_job(db, make_user, make_job):
+    job = make_job(make_user("alice"), status="running")
+    store = ProgressStore()
+    store.update(job.id, 1, 2, 50)
+
+    store.discard(job.id)
+
+    assert store.get(job.id) is None
+    assert store.flush() == 0
@@ -0,0 +1,133 @@
+"""실패 행 재시도와 원래 작업 결과 갱신"""
+import csv
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import crawler
+from crawler import PriceCompareCrawler
+from server.auth import get_current_active_user
+from server.catalogs import store_catalog
+from server.database import get_db
+from server.export_tasks import _finish_task, run_export_task
+from server.jobs import CrawlRun, JobExecutor, run_crawler_task
+from server.models import CrawlingJob, ExportTask
+from server.recrawl import retry_lineage
+from server.routers import crawler as crawler_router
+
+WAFFLE_URL = "https://www.ssg.com/item/itemView.ssg?itemId=1"
+RIVAL_URL = "https://www.ssg.com/item/itemView.ssg?itemId=2"
+PRODUCTS = [
+    {
+        "product_id": 1,
+        "product_name": "향수",
+        "waffle": {"url": WAFFLE_URL},
+        "competitors": [{"name": "경쟁사", "url": RIVAL_URL}],
+    },
+]
+
+
+@pytest.fixture
+def prices(monkeypatch):
+    """URL별 응답 가격 (None이면 요청 실패)"""
+    prices = {}
+
+    def crawl_price(self, url):
+        price = prices[url]
+        if price is None:
+            return {"상품 url": None, "상품 가격": None, "배송비": None, "배송비 여부": None,
+                    "최종 가격": None, "에러 발생": "요청 실패"}
+        return {"상품 url": url, "상품 가격": price, "배송비": 0, "배송비 여부": "무료", "최종 가격": price}
+
+    monkeypatch.setattr(crawler, "REQUEST_DELAY", (0, 0))
+    monkeypatch.setattr(PriceCompareCrawler, "crawl_price", crawl_price)
+    return prices
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(worker_slots=1, request_budget=2)
+    executor.task_scheduler.start()
+    yield executor
+    executor.task_scheduler.shutdown()
+
+
+@pytest.fixture
+def client(db, make_user):
+    user = make_user("alice")
+    app = FastAPI()
+    app.include_router(crawler_router.router)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+    client.user = user
+    return client
+
+
+def _crawl(db, executor, job):
+    """작업을 선점한 것처럼 실행하고 대기 중인 내보내기를 차례로 실행"""
+    job.status = "running"
+    db.commit()
+    run_crawler_task(CrawlRun(job), executor)
+    for task in db.query(ExportTask).filter(ExportTask.status == "pending").order_by(ExportTask.id).all():
+        task.status = "running"
+        db.commit()
+        result = run_export_task(
+            task.id, task.format, task.results_file, task.file_path, task.total_products
+        )
+        _finish_task(db, task, result, None)
+    db.expire_all()
+    return db.get(CrawlingJob, job.id)
+
+
+def _csv_prices(response):
+    rows = csv.DictReader(io.StringIO(response.content.decode("utf-8-sig")))
+    return {row["seller"]: row["final_price"] for row in rows}
+
+
+def test_retry_updates_parent_results_and_etag(db, prices, executor, client):
+    store_catalog(db, "ssg", PRODUCTS)
+    prices.update({WAFFLE_URL: 10000, RIVAL_URL: None})
+    response = client.post("/api/crawler/start/ssg")
+    assert response.status_code == 200
+    parent = _crawl(db, executor, db.get(CrawlingJob, response.json()["id"]))
+    assert parent.status == "completed"
+
+    before = client.get("/api/crawler/download", params={"job_id": parent.id, "format": "csv"})
+    assert before.status_code == 200
+    assert _csv_prices(before) == {"waffle": "10000", "경쟁사": ""}
+
+    # 실패한 경쟁사 행만 다시 크롤링
+    prices.update({WAFFLE_URL: 99999, RIVAL_URL: 9000})
+    response = client.post(f"/api/crawler/jobs/{parent.id}/retry")
+    assert response.status_code == 200
+    retry = _crawl(db, executor, db.get(CrawlingJob, response.json()["id"]))
+    assert retry.status == "completed"
+    assert retry.result_file_path == parent.result_file_path
+
+    after = client.get("/api/crawler/download", params={"job_id": parent.id, "format": "csv"})
+    assert after.status_code == 200
+    assert _csv_prices(after) == {"waffle": "10000", "경쟁사": "9000"}
+    assert after.headers["etag"] != before.headers["etag"]
+    # 내보내기 행은 새로 만들지 않고 원래 작업의 행을 다시 씀
+    assert {task.job_id for task in db.query(ExportTask)} == {parent.id}
+
+    assert retry_lineage(db, parent) == [parent.id, retry.id]
+    # 재시도한 행이 모두 성공했으므로 더 재시도할 행이 없음
+    assert client.post(f"/api/crawler/jobs/{parent.id}/retry").status_code == 400
+
+
+def test_retry_waits_for_parent_exports(db, make_job, client):
+    catalog, _ = store_catalog(db, "ssg", PRODUCTS)
+    parent = make_job(
+        client.user, status="exporting", catalog_id=catalog.id, result_file_path="/tmp/ssg.xlsx"
+    )
+    db.add(ExportTask(
+        job_id=parent.id, format="xlsx", status="running", results_file="/tmp/ssg.jsonl",
+        file_path="/tmp/ssg.xlsx"
+    ))
+    db.commit()
+
+    assert client.post(f"/api/crawler/jobs/{parent.id}/retry").status_code == 409
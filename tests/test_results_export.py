@@ -0,0 +1,118 @@
+"""결과 파일 색인과 Excel 변환"""
+import json
+
+import openpyxl
+import pytest
+
+from crawler import INVERSION_SHEET, SUMMARY_SHEET, ExcelColumnWidths, PriceCompareCrawler, ResultsIndex
+from server import analytics
+from server.analytics import ANALYTICS_SHEET, PriceTableBuilder, analyze_results_file, analyze_table, summary_path_for
+from server.exports import write_xlsx
+
+
+def _result(product_id, waffle_price, competitor_price):
+    prices = [
+        {"seller": "waffle", "상품 url": f"https://example.com/w/{product_id}", "상품 가격": waffle_price,
+         "배송비": 0, "배송비 여부": "무료", "최종 가격": waffle_price},
+        {"seller": "경쟁사", "상품 url": f"https://example.com/c/{product_id}", "상품 가격": competitor_price,
+         "배송비": 0, "배송비 여부": "무료", "최종 가격": competitor_price},
+    ]
+    return {
+        "product_id": product_id, "product_name": f"상품 {product_id}",
+        "timestamp": "2026-03-01T00:00:00", "prices": prices,
+    }
+
+
+@pytest.fixture
+def results_file(tmp_path):
+    """크롤링처럼 결과를 기록하며 색인과 열 너비를 함께 저장한 결과 파일"""
+    path = str(tmp_path / "ssg_results.jsonl")
+    index = ResultsIndex(path)
+    widths = ExcelColumnWidths()
+    with open(path, "wb") as f:
+        for product_id in range(1, 6):
+            result = _result(product_id, 10000, 9000 if product_id % 2 else 12000)
+            index.append(f, result)
+            widths.add_result(result)
+    index.excel_widths = widths
+    index.save()
+    return path
+
+
+def test_index_round_trips_excel_widths(results_file):
+    saved = ResultsIndex.load(results_file).excel_widths
+    scanned = ExcelColumnWidths()
+    for result in PriceCompareCrawler(results_file=results_file).iter_results():
+        scanned.add_result(result)
+
+    assert saved.result_count == scanned.result_count == 5
+    assert saved.has_inversion and scanned.has_inversion
+    for sheet in (SUMMARY_SHEET, INVERSION_SHEET):
+        assert saved.column_widths(sheet) == scanned.column_widths(sheet)
+
+
+def test_index_reads_requested_products_and_is_rebuilt_after_change(results_file):
+    exporter = PriceCompareCrawler(results_file=results_file)
+    assert [r["product_id"] for r in exporter.iter_results([4, 2, 9])] == [4, 2]
+
+    with open(results_file, "ab") as f:
+        f.write((json.dumps(_result(6, 10000, 9000), ensure_ascii=False) + "\n").encode("utf-8"))
+
+    assert ResultsIndex.load(results_file) is None
+    assert 6 in ResultsIndex.open(results_file)
+    assert PriceCompareCrawler(results_file=results_file)._excel_widths_for_results().result_count == 6
+
+
+def test_export_reads_results_once_and_removes_index(results_file, tmp_path, monkeypatch):
+    exporter = PriceCompareCrawler(results_file=results_file)
+    reads = []
+    iter_results = exporter.iter_results
+    monkeypatch.setattr(
+        exporter, "iter_results",
+        lambda product_ids=None: reads.append(product_ids) or iter_results(product_ids)
+    )
+
+    excel_file = exporter.export_to_excel_format(excel_file=str(tmp_path / "out.xlsx"))
+
+    assert excel_file is not None
+    assert reads == [None]
+    wb = openpyxl.load_workbook(excel_file, read_only=True)
+    assert wb.sheetnames == [SUMMARY_SHEET, INVERSION_SHEET]
+    assert not (tmp_path / "ssg_results.jsonl.idx.json").exists()
+
+
+def test_analytics_sheet_is_built_during_the_row_pass(results_file, tmp_path, monkeypatch):
+    expected = analyze_results_file(results_file).summary()
+    monkeypatch.setattr(analytics, "load_price_table", lambda _file: pytest.fail("결과 파일을 다시 읽음"))
+    table = PriceTableBuilder()
+    summaries = []
+
+    def analytics_sheet():
+        result = analyze_table(table.build())
+        summaries.append(result.summary())
+        return result.sheet_rows()
+
+    excel_file = PriceCompareCrawler(results_file=results_file).export_to_excel_format(
+        excel_file=str(tmp_path / "out.xlsx"),
+        extra_sheets=[(ANALYTICS_SHEET, analytics_sheet)],
+        on_result=table.add
+    )
+
+    assert summaries == [expected]
+    wb = openpyxl.load_workbook(excel_file, read_only=True)
+    assert wb.sheetnames == [SUMMARY_SHEET, INVERSION_SHEET, ANALYTICS_SHEET]
+
+
+def test_write_xlsx_keeps_results_and_saves_summary(results_file, tmp_path, monkeypatch):
+    expected = analyze_results_file(results_file).summary()
+    monkeypatch.setattr(analytics, "load_price_table", lambda _file: pytest.fail("결과 파일을 다시 읽음"))
+    path = str(tmp_path / "out.xlsx")
+
+    assert write_xlsx(results_file, path) == 5
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    assert wb.sheetnames == [SUMMARY_SHEET, INVERSION_SHEET, ANALYTICS_SHEET]
+    with open(summary_path_for(path), encoding="utf-8") as f:
+        assert json.load(f) == json.loads(json.dumps(expected, ensure_ascii=False))
+    # 다른 형식도 만들 수 있도록 결과 파일은 남김
+    assert ResultsIndex.load(results_file) is not None
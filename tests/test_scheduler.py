@@ -0,0 +1,37 @@
+"""공유 워커 풀의 레인 간 가중 라운드 로빈"""
+import threading
+
+from server.scheduler import FairTaskScheduler, lane_weight
+
+
+def test_lane_weight_decreases_with_task_count():
+    assert [lane_weight(count) for count in (0, 5, 10, 99, 100, 1000, 50000)] == [4, 4, 3, 3, 2, 1, 1]
+
+
+def test_small_lane_is_not_starved_behind_large_lane():
+    scheduler = FairTaskScheduler(workers=1)
+    done = []
+    lock = threading.Lock()
+
+    def record(name):
+        with lock:
+            done.append(name)
+
+    # 큰 작업이 먼저 모든 요청을 제출한 뒤 작은 작업이 들어옴
+    large = scheduler.open_lane("large", weight=lane_weight(100))
+    small = scheduler.open_lane("small", weight=lane_weight(5))
+    for _ in range(100):
+        large.submit(record, "large")
+    for _ in range(5):
+        small.submit(record, "small")
+
+    scheduler.start()
+    try:
+        small.shutdown(wait=True)
+        large.shutdown(wait=True)
+    finally:
+        scheduler.shutdown()
+
+    # 작은 레인은 라운드마다 큰 레인의 두 배를 받아 두 라운드 만에 끝난다
+    assert done[:9] == ["large"] * 2 + ["small"] * 4 + ["large"] * 2 + ["small"]
+    assert done.count("large") == 100
@@ -0,0 +1,47 @@
+"""cron 식 파싱과 다음 실행 시각"""
+from datetime import datetime
+
+import pytest
+
+from server.schedules import CronExpression
+
+
+def _next(expression: str, after: str) -> datetime:
+    return CronExpression(expression).next_after(datetime.fromisoformat(after))
+
+
+def test_day_and_weekday_match_either():
+    # 13일 또는 월요일 (2026-03-13은 금요일, 다음 월요일은 16일)
+    assert _next("0 0 13 * 1", "2026-03-10 00:00") == datetime(2026, 3, 13)
+    assert _next("0 0 13 * 1", "2026-03-13 00:00") == datetime(2026, 3, 16)
+
+
+def test_wildcard_day_or_weekday_restricts_only_the_other():
+    assert _next("0 0 13 * *", "2026-02-01 00:00") == datetime(2026, 2, 13)
+    assert _next("0 0 * * 5", "2026-02-01 00:00") == datetime(2026, 2, 6)
+
+
+def test_sunday_as_seven():
+    assert _next("0 9 * * 7", "2026-02-02 00:00") == datetime(2026, 2, 8, 9, 0)
+
+
+def test_month_rollover_skips_short_months():
+    assert _next("30 23 31 * *", "2026-04-01 00:00") == datetime(2026, 5, 31, 23, 30)
+    assert _next("0 0 29 2 *", "2026-03-01 00:00") == datetime(2028, 2, 29)
+    assert _next("0 0 1 1 *", "2026-12-31 12:00") == datetime(2027, 1, 1)
+
+
+def test_step_and_strictly_after():
+    assert _next("*/15 * * * *", "2026-02-02 10:07") == datetime(2026, 2, 2, 10, 15)
+    assert _next("*/15 * * * *", "2026-02-02 10:15") == datetime(2026, 2, 2, 10, 30)
+
+
+@pytest.mark.parametrize("expression", ["61 * * * *", "* * *", "a * * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_expression_without_any_run_time():
+    with pytest.raises(ValueError):
+        _next("0 0 31 2 *", "2026-01-01 00:00")